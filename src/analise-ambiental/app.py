@@ -3,51 +3,199 @@
 Arquivo: app.py
 --------------------------------------------
 Aplicação Flask para análise ambiental:
-- Rota “/”: exibe a página principal com classificação de qualidade do ar e estatísticas.
-- Rota “/report_error”: recebe relatório de erro (texto + imagem) e salva em uploads/.
-- Utiliza compressão de resposta (Flask-Compress) e gestão de uploads com secure_filename.
+- Rota “/”: exibe a página principal com a classificação de qualidade do ar.
+- Rota “/estatisticas”: painel de estatísticas (gráfico Plotly + gradientes) em fragmento
+  HTML, buscado pelo navegador só quando a visualização é aberta.
+- Rota “/report_error”: recebe relatório de erro (texto + imagem) e salva em uploads/error_<id>/,
+  com o id gerado por um contador atômico no SQLite (utils/relatorios.py).
+- Anexos limitados por MAX_CONTENT_LENGTH (rejeição antecipada com 413); a recompressão
+  das imagens para WebP roda em segundo plano.
+- Rota “/report_error/lista”: listagem paginada dos relatórios (protegida por ADMIN_TOKEN).
+- Utiliza compressão de resposta (Flask-Compress); uploads passam por secure_filename.
+- Páginas e JSONs GET que só dependem dos dados passam pelo cache de respostas
+  (utils/cache_respostas.py): repetidas, não renderizam nem comprimem de novo.
+- Estáticos: os templates usam estatico(...), que aponta para a versão com hash em
+  “/static-build/” quando build_static.py já rodou (variantes .br/.gz servidas direto,
+  com cache imutável) e para “/static/” caso contrário.
 - Carrega funções de utils (classificação, meteorologia, visualizações Plotly e gradientes).
+- Renderizações caras (gradientes e HTML Plotly) passam por uma camada single-flight
+  chaveada por (artefato, versão do dataset), compartilhada entre threads e workers.
+- A versão usada é a publicada pelo serviço de reconstrução (reconstrucao.py), então
+  novos dados entram em vigor na próxima requisição, sem reiniciar os workers.
+- Consultas de medições e meteorologia usam o backend SQLite indexado quando ele foi
+  carregado (utils/banco_sqlite.py); caso contrário, as partições ano/mês dos CSVs
+  (utils/consultas_particoes.py), lendo só os meses do intervalo pedido, e por fim os CSVs.
+- Rota “/api/snapshot”: classificação de todas as estações + meteorologia de um horário,
+  a partir da grade horária pré-alinhada (utils/grade.py).
+- Rota “/api/rosa-ventos”: rosa dos ventos (direção × velocidade) de qualquer período.
+- Rotas “/api/medicoes”, “/api/iqar” e “/api/meteorologia”: séries por intervalo (SQLite
+  ou, sem ele, partições ano/mês).
+- Rota “/api/export”: exportação em massa (CSV ou JSON Lines) de medições e IQAr derivado,
+  gerada e enviada em streaming, bloco a bloco, com gzip opcional (utils/exportacao.py).
+- Rota “/api/gradientes/<versão>/<tipo>”: matrizes mês × ano dos heatmaps em JSON,
+  desenhadas no navegador (canvas); Matplotlib fica fora do caminho da requisição.
+- Rota “/gradientes/<versão>/<tipo>-<largura>.<formato>”: os mesmos heatmaps em WebP/PNG,
+  renderizados sob demanda para uso fora da página (download, incorporação). Ambas com
+  URL versionada e cache imutável no navegador.
 - Configura caminhos para bancos CSV e inicializa pasta de uploads.
+- Perfil opcional por requisição (utils/perfil.py): com PERFIL_REQUISICOES=1 ou o cabeçalho
+  X-Perfil com o ADMIN_TOKEN, a requisição roda sob cProfile e o resumo vai para o log.
 - Permite execução standalone em modo debug.
 ============================================
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, url_for, redirect, abort
 from flask_compress import Compress
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
+from datetime import datetime, timedelta
 import os
+import hmac
 
 from config import (
     DATABASE_PATH,          # Caminho para o banco de dados de qualidade do ar
-    NEW_DATABASE_PATH,      # Caminho para CSV usado nos gradientes
     METEOROLOGY_PATH,       # Caminho para o banco de dados de meteorologia
+    METEOROLOGY_NPZ_PATH,   # Meteorologia em formato numérico (.npz)
+    METEOROLOGY_PARTICOES_DIR, # Meteorologia particionada por ano/mês
+    MEDICOES_DB_PATH,       # Backend SQLite opcional (medições, IQAr e meteorologia)
+    ADMIN_TOKEN,            # Token da listagem de relatórios de erro
+    MAX_UPLOAD_BYTES,       # Tamanho máximo de uma requisição (anexos de relatório)
+    STATIC_BUILD_URL,       # Prefixo de URL dos estáticos com hash (build_static.py)
+    RESPOSTAS_CACHE_MAX_BYTES, # Limite do cache de respostas comprimidas (por processo)
+    GRADIENTE_FORMATOS,     # Formatos das imagens de gradiente servidas por URL
+    GRADIENTE_LARGURAS,     # Larguras (px) das imagens de gradiente servidas por URL
     SQLALCHEMY_DATABASE_URI # (não utilizado diretamente aqui)
 )
-from utils.classifica import classify_air
-from utils.met import get_meteorologia
-from utils.visualization_plotly import generate_plotly_html
-from utils.visualization_gradient import (
-    generate_gradient_image,
-    generate_max_gradient_image,
-    generate_min_gradient_image
+from utils.classifica import classify_air, ESTACOES, POLUENTES_COLUNAS
+from utils.met import get_meteorologia, ler_registro_npz
+from utils.artefatos import (
+    gradiente_imagem, gradiente_matrizes, plotly_html, grade_atual, versao_atual, VersaoIndisponivel,
+    TIPOS_GRADIENTE, METRICAS_PLOTLY
 )
+from utils import banco_sqlite, consultas_particoes
+from utils.exportacao import exportar, FORMATOS as FORMATOS_EXPORTACAO
+from utils.rosa_ventos import rosa_dos_ventos, SETORES_PADRAO, VELOCIDADES_PADRAO
+from utils.relatorios import criar_relatorio, listar_relatorios
+from utils.estaticos import url_estatico, resposta_estatico, MANIFESTO_PATH
+from utils.cache_respostas import CacheRespostas
+from utils.single_flight import versao_dataset
+from utils import perfil
 
 # --- Inicialização da aplicação Flask e compressão de resposta ---
 app = Flask(__name__)
-Compress(app)
+perfil.instalar(app)  # antes do Compress, para a compressão entrar no perfil
+compress = Compress(app)
+
+# --- Respostas GET já renderizadas e comprimidas, por (rota, parâmetros, versão, codificação) ---
+cache_respostas = CacheRespostas(compress, RESPOSTAS_CACHE_MAX_BYTES)
+
+# --- URLs de estáticos nos templates: {{ estatico('css/views.css') }} ---
+app.add_template_global(url_estatico, "estatico")
+
+# --- Limite das requisições: o Werkzeug rejeita pelo Content-Length antes de ler o corpo
+# --- e interrompe a leitura de envios sem Content-Length ao passar do limite ---
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
 
 # --- Pasta para armazenar relatórios de erro enviados via form ---
 # --- Futuramente vou alterar isso e os erros serão enviados de outra forma ---
 UPLOADS_FOLDER = os.path.join(app.root_path, 'uploads')
 os.makedirs(UPLOADS_FOLDER, exist_ok=True)
 
+# --- Maior intervalo aceito pelas rotas de séries (/api/*) ---
+MAX_DIAS_INTERVALO = 31
+
+
+# Cache das imagens de gradiente: a URL muda a cada versão, então o conteúdo nunca muda
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+
+
+def gerar_gradientes():
+    """
+    Retorna as URLs dos três gradientes (média, máximo e mínimo) da versão publicada.
+    Cada item tem 'matriz': o JSON desenhado no canvas pelo gradientHeatmap.js.
+    """
+    versao = versao_atual("gradientes")
+    return tuple(
+        {"matriz": url_for("matriz_gradiente", versao=versao, tipo=tipo)}
+        for tipo in TIPOS_GRADIENTE
+    )
+
+
+def gerar_plotly(metric):
+    """HTML Plotly da métrica, renderizado uma única vez por versão publicada do CSV resumido."""
+    return plotly_html(metric)
+
+
+def fonte_medicoes():
+    """
+    Argumentos de classify_air: consulta indexada no SQLite se o banco foi carregado,
+    senão o índice de somas acumuladas da grade em memória (sem reler o CSV a cada consulta).
+    """
+    if banco_sqlite.disponivel():
+        return {"database_path": MEDICOES_DB_PATH, "ler_janela": banco_sqlite.janela_medicoes}
+    return {"database_path": DATABASE_PATH, "indice": grade_atual().indices}
+
+
+def fonte_meteorologia():
+    """
+    Argumentos de get_meteorologia: consulta indexada no SQLite se o banco foi carregado,
+    senão o armazenamento numérico (.npz), as partições ano/mês e, na falta delas, o CSV legado.
+    """
+    if banco_sqlite.disponivel():
+        return {"database_path": MEDICOES_DB_PATH, "ler_registro": banco_sqlite.registro_meteorologia}
+    if os.path.isfile(METEOROLOGY_NPZ_PATH):
+        return {"database_path": METEOROLOGY_NPZ_PATH, "ler_registro": ler_registro_npz}
+    if consultas_particoes.disponivel((METEOROLOGY_PARTICOES_DIR,)):
+        return {"database_path": METEOROLOGY_PARTICOES_DIR,
+                "ler_registro": consultas_particoes.registro_meteorologia}
+    return {"database_path": METEOROLOGY_PATH}
+
+
+def backend_series():
+    """
+    Módulo que responde às rotas de séries (/api/*): SQLite se o banco foi carregado,
+    senão as partições ano/mês; None se nenhum dos dois existe.
+    """
+    if banco_sqlite.disponivel():
+        return banco_sqlite
+    if consultas_particoes.disponivel():
+        return consultas_particoes
+    return None
+
+
+def ler_intervalo(max_dias=MAX_DIAS_INTERVALO):
+    """
+    Lê 'inicio' e 'fim' da query string (YYYY-MM-DD ou YYYY-MM-DD HH:MM:SS).
+    Uma data sem hora em 'fim' inclui o dia inteiro. 'max_dias=None' não limita o intervalo.
+    Lança ValueError se inválido.
+    """
+    def parse(valor, fim_do_dia):
+        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+            try:
+                dt = datetime.strptime(valor or "", fmt)
+            except ValueError:
+                continue
+            if fmt == "%Y-%m-%d" and fim_do_dia:
+                dt += timedelta(days=1, seconds=-1)
+            return dt
+        raise ValueError("Informe 'inicio' e 'fim' no formato YYYY-MM-DD ou YYYY-MM-DD HH:MM:SS.")
+
+    inicio = parse(request.args.get("inicio"), False)
+    fim    = parse(request.args.get("fim"), True)
+    if fim < inicio:
+        raise ValueError("'fim' deve ser posterior a 'inicio'.")
+    if max_dias is not None and fim - inicio > timedelta(days=max_dias):
+        raise ValueError(f"Intervalo máximo de {max_dias} dias.")
+    return inicio.strftime("%Y-%m-%d %H:%M:%S"), fim.strftime("%Y-%m-%d %H:%M:%S")
+
 
 @app.route("/", methods=["GET", "POST"])
+@cache_respostas.rota(lambda: versao_atual("grade") + versao_dataset(MEDICOES_DB_PATH, MANIFESTO_PATH))
 def index():
     """
     Rota principal que serve o template 'index.html'.
-    - Em GET: exibe valores padrão de data, hora e estação.
-    - Em POST (form de estatísticas): recebe 'metric' para gerar gráfico Plotly.
+    - Exibe valores padrão de data, hora e estação e a classificação correspondente.
+    - O painel de estatísticas não é montado aqui: o navegador o busca em /estatisticas
+      quando o usuário abre a visualização.
     """
     # valores padrão (para primeira carga da página)
     default_date    = '2024-12-31'
@@ -60,37 +208,37 @@ def index():
         default_date,
         default_time,
         default_station,
-        database_path=DATABASE_PATH
+        **fonte_medicoes()
     )
 
-    # inicializa variáveis de estatísticas
-    graph_html = None
-    metric     = None
-
-    # gera sempre as três imagens de gradiente (média, máximo e mínimo)
-    gradient_url     = generate_gradient_image(csv_path=NEW_DATABASE_PATH)
-    gradient_max_url = generate_max_gradient_image(csv_path=NEW_DATABASE_PATH)
-    gradient_min_url = generate_min_gradient_image(csv_path=NEW_DATABASE_PATH)
-
-    # se for POST e estiver vindo um parâmetro 'metric', gera o gráfico correspondente
-    if request.method == "POST" and "metric" in request.form:
-        m = request.form.get("metric", "").lower()
-        if m in ("mp10", "mp2.5"):
-            metric     = m
-            graph_html = generate_plotly_html(metric)
-
     # Renderiza o template 'index.html' com todos os dados necessários para a view principal
     return render_template(
         "index.html",
         result            = result,            # Dicionário com resultado da classificação padrão de qualidade do ar
         selected_date     = default_date,      # Data atualmente selecionada/exibida no formulário
         selected_hour     = default_hour,      # Hora atualmente selecionada/exibida no formulário
-        selected_station  = default_station,   # Estação atualmente selecionada/exibida no formulário
-        graph_html        = graph_html,        # HTML do gráfico Plotly (ou None se não houver gráfico)
-        metric            = metric,            # Métrica selecionada para o gráfico (mp10, mp2.5 ou None)
-        gradient_url      = gradient_url,      # URL da imagem de gradiente média
-        gradient_max_url  = gradient_max_url,  # URL da imagem de gradiente de valor máximo
-        gradient_min_url  = gradient_min_url   # URL da imagem de gradiente de valor mínimo
+        selected_station  = default_station    # Estação atualmente selecionada/exibida no formulário
+    )
+
+@app.route('/estatisticas')
+@cache_respostas.rota(lambda: versao_atual("gradientes") + versao_atual("plotly"))
+def estatisticas():
+    """
+    Painel de estatísticas carregado sob demanda (fragmento HTML, ver static/js/statsPanel.js):
+    gráfico Plotly da métrica (?metric=mp10 ou mp2.5) e os canvases dos gradientes.
+    """
+    metric = request.args.get("metric", "mp10").lower()
+    if metric not in METRICAS_PLOTLY:
+        return jsonify({"error": f"Métrica inválida: {metric}"}), 400
+
+    gradient_url, gradient_max_url, gradient_min_url = gerar_gradientes()
+    return render_template(
+        "estatisticas.html",
+        graph_html        = gerar_plotly(metric),  # HTML do gráfico Plotly da métrica
+        metric            = metric,
+        gradient_url      = gradient_url,          # URL da matriz do gradiente média
+        gradient_max_url  = gradient_max_url,      # URL da matriz do gradiente de valor máximo
+        gradient_min_url  = gradient_min_url       # URL da matriz do gradiente de valor mínimo
     )
 
 @app.route('/classificar', methods=['POST'])
@@ -104,11 +252,6 @@ def classificar():
     input_time = f"{input_hour}:30:00" if input_hour else "23:30:00"
     station    = request.form.get('station')
 
-    # sempre gera as imagens de gradiente atualizadas
-    grad_med = generate_gradient_image(csv_path=NEW_DATABASE_PATH)
-    grad_max = generate_max_gradient_image(csv_path=NEW_DATABASE_PATH)
-    grad_min = generate_min_gradient_image(csv_path=NEW_DATABASE_PATH)
-
     # Validação de campos obrigatórios: data, hora e estação devem estar presentes
     if not input_date or not input_hour or not station:
         # Se algum estiver ausente, renderiza novamente 'index.html' exibindo mensagem de erro
@@ -117,12 +260,7 @@ def classificar():
             result            = {"error": "Preencha data, hora e estação para classificar."},  # Mensagem de validação
             selected_date     = input_date,     # Mantém os valores já preenchidos para não limpar o formulário
             selected_hour     = input_hour,
-            selected_station  = station,
-            graph_html        = None,           # Sem gráfico Plotly quando há erro na validação
-            metric            = None,           # Sem métrica selecionada
-            gradient_url      = grad_med,       # URLs dos gradientes ainda gerados para manter a UI consistente
-            gradient_max_url  = grad_max,
-            gradient_min_url  = grad_min
+            selected_station  = station
         )
 
     # efetua a classificação real
@@ -130,19 +268,14 @@ def classificar():
         input_date,
         input_time,
         station,
-        database_path=DATABASE_PATH
+        **fonte_medicoes()
     )
     return render_template(
         'index.html',
         result            = result,
         selected_date     = input_date,
         selected_hour     = input_hour,
-        selected_station  = station,
-        graph_html        = None,
-        metric            = None,
-        gradient_url      = grad_med,
-        gradient_max_url  = grad_max,
-        gradient_min_url  = grad_min
+        selected_station  = station
     )
 
 @app.route('/classificar/json', methods=['POST'])
@@ -168,7 +301,7 @@ def classificar_json():
         input_date,
         f"{input_hour}:30:00",    # Concatena minuto fixo ":30:00" à hora
         station,
-        database_path=DATABASE_PATH
+        **fonte_medicoes()
     )
 
     # Retorna o resultado da classificação como JSON para o cliente
@@ -193,36 +326,218 @@ def meteorologia():
     result = get_meteorologia(
         input_date,
         input_hour,
-        database_path=METEOROLOGY_PATH
+        **fonte_meteorologia()
     )
 
     # Retorna os dados meteorológicos como JSON para o cliente
     return jsonify(result)
 
+@app.route('/api/snapshot')
+@cache_respostas.rota(lambda: versao_atual("grade"))
+def api_snapshot():
+    """
+    Classificação de todas as estações e meteorologia de um horário numa única resposta:
+    /api/snapshot?date=YYYY-MM-DD&hour=HH (minuto fixo ":30:00", como nas demais rotas).
+    """
+    try:
+        alvo = datetime.strptime(f"{request.args.get('date')} {request.args.get('hour')}:30:00",
+                                 "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return jsonify({"error": "Formato de data ou hora inválido."}), 400
+    return jsonify(grade_atual().snapshot(alvo))
+
+@app.route('/api/rosa-ventos')
+@cache_respostas.rota(lambda: versao_dataset(METEOROLOGY_NPZ_PATH))
+def api_rosa_ventos():
+    """
+    Rosa dos ventos: /api/rosa-ventos?inicio=...&fim=...&mes=1&setores=16&velocidades=0.5,1.5,3,5,8
+    Sem 'inicio'/'fim', usa todo o período; 'mes' (1–12) filtra um mês de todos os anos.
+    """
+    try:
+        inicio = fim = None
+        if request.args.get("inicio") or request.args.get("fim"):
+            inicio, fim = ler_intervalo(max_dias=None)
+        mes = request.args.get("mes", type=int)
+        if mes is not None and not 1 <= mes <= 12:
+            raise ValueError("'mes' deve estar entre 1 e 12.")
+        setores = request.args.get("setores", SETORES_PADRAO, type=int)
+        if setores not in (4, 8, 16, 32, 36):
+            raise ValueError("'setores' deve ser 4, 8, 16, 32 ou 36.")
+        velocidades = VELOCIDADES_PADRAO
+        if request.args.get("velocidades"):
+            velocidades = tuple(float(v) for v in request.args["velocidades"].split(","))
+            if not 1 <= len(velocidades) <= 10 or list(velocidades) != sorted(set(velocidades)):
+                raise ValueError("'velocidades' deve ter de 1 a 10 limites crescentes.")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(rosa_dos_ventos(inicio, fim, mes, setores, velocidades))
+
+def responder_serie(consulta, *args):
+    """
+    JSON de uma consulta de série (/api/medicoes, /api/iqar, /api/meteorologia).
+    Falha do backend (banco travado ou incompleto, partição em regravação) vira 503.
+    """
+    try:
+        return jsonify(consulta(*args))
+    except (ValueError, OSError) as e:
+        return jsonify({"error": str(e)}), 503
+
+@app.route('/api/medicoes')
+def api_medicoes():
+    """
+    Série horária bruta de uma estação: /api/medicoes?estacao=EAMA11&inicio=...&fim=...
+    Disponível com o backend SQLite carregado ou com as partições geradas.
+    """
+    backend = backend_series()
+    if backend is None:
+        return jsonify({"error": "Backend SQLite não carregado e partições ausentes."}), 503
+    estacao = request.args.get("estacao", "").upper()
+    if estacao not in ESTACOES:
+        return jsonify({"error": "Estação inválida!"}), 400
+    try:
+        inicio, fim = ler_intervalo()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return responder_serie(backend.consultar_medicoes, estacao, inicio, fim)
+
+@app.route('/api/iqar')
+def api_iqar():
+    """
+    Série de IQAr de uma estação e poluente: /api/iqar?estacao=EAMA11&poluente=MP10&inicio=...&fim=...
+    Disponível com o backend SQLite carregado ou com as partições geradas.
+    """
+    backend = backend_series()
+    if backend is None:
+        return jsonify({"error": "Backend SQLite não carregado e partições ausentes."}), 503
+    estacao  = request.args.get("estacao", "").upper()
+    poluente = request.args.get("poluente", "MP10").upper()
+    if estacao not in ESTACOES:
+        return jsonify({"error": "Estação inválida!"}), 400
+    if poluente not in POLUENTES_COLUNAS:
+        return jsonify({"error": "Poluente inválido!"}), 400
+    try:
+        inicio, fim = ler_intervalo()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return responder_serie(backend.consultar_iqar, estacao, poluente, inicio, fim)
+
+@app.route('/api/meteorologia')
+def api_meteorologia():
+    """
+    Série meteorológica: /api/meteorologia?inicio=...&fim=...
+    Disponível com o backend SQLite carregado ou com as partições geradas.
+    """
+    backend = backend_series()
+    if backend is None:
+        return jsonify({"error": "Backend SQLite não carregado e partições ausentes."}), 503
+    try:
+        inicio, fim = ler_intervalo()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return responder_serie(backend.consultar_meteorologia, inicio, fim)
+
+# Tipos de conteúdo da exportação (fora da lista do Flask-Compress: o streaming não é bufferizado)
+MIMETYPES_EXPORTACAO = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+def ler_lista(nome, validos):
+    """Lista separada por vírgulas da query string (vazia = todos). Lança ValueError se inválida."""
+    valores = [v.strip().upper() for v in request.args.get(nome, "").split(",") if v.strip()]
+    invalidos = [v for v in valores if v not in validos]
+    if invalidos:
+        raise ValueError(f"'{nome}' inválido(s): {', '.join(invalidos)}.")
+    return valores or None
+
+@app.route('/api/export')
+def api_export():
+    """
+    Exportação em massa: /api/export?inicio=...&fim=...&estacoes=EAMA11,EAMA21&poluentes=MP10&formato=csv|jsonl
+    Sem 'inicio'/'fim', exporta todo o período; sem 'estacoes'/'poluentes', todos.
+    Uma linha por (timestamp, estação, poluente), em streaming; gzip se o cliente aceitar.
+    """
+    try:
+        inicio = fim = None
+        if request.args.get("inicio") or request.args.get("fim"):
+            inicio, fim = ler_intervalo(max_dias=None)
+        estacoes = ler_lista("estacoes", ESTACOES)
+        poluentes = ler_lista("poluentes", POLUENTES_COLUNAS)
+        formato = request.args.get("formato", "csv").lower()
+        if formato not in FORMATOS_EXPORTACAO:
+            raise ValueError(f"'formato' deve ser {' ou '.join(FORMATOS_EXPORTACAO)}.")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    gzip = bool(request.accept_encodings["gzip"])
+    resposta = Response(
+        exportar(grade_atual(), inicio, fim, estacoes, poluentes, formato, gzip=gzip),
+        mimetype=MIMETYPES_EXPORTACAO[formato],
+    )
+    resposta.headers["Content-Disposition"] = f'attachment; filename="exportacao.{formato}"'
+    resposta.headers["Vary"] = "Accept-Encoding"
+    if gzip:
+        # Com Content-Encoding definido, o Flask-Compress não toca na resposta
+        resposta.headers["Content-Encoding"] = "gzip"
+    return resposta
+
 @app.route('/sobre-iqar')
+@cache_respostas.rota(lambda: versao_dataset(MANIFESTO_PATH))
 def sobre_iqar():
     """
     Rota que renderiza a explicação do IQAr no mesmo template 'index.html'.
     Passa a flag 'explicacao=True' para o template saber que deve exibir o conteúdo de ajuda.
     """
-    # Gera a imagem de gradiente para visualização de média
-    grad_med = generate_gradient_image(csv_path=NEW_DATABASE_PATH)
-    # Gera a imagem de gradiente para visualização de valor máximo
-    grad_max = generate_max_gradient_image(csv_path=NEW_DATABASE_PATH)
-    # Gera a imagem de gradiente para visualização de valor mínimo
-    grad_min = generate_min_gradient_image(csv_path=NEW_DATABASE_PATH)
-
     # Renderiza o template 'index.html', indicando que deve exibir a seção de explicação do IQAr
     return render_template(
         'index.html',
-        explicacao        = True,       # sinaliza para o template mostrar o conteúdo de ajuda
-        graph_html        = None,       # sem gráfico Plotly nesta rota
-        metric            = None,       # sem métrica selecionada
-        gradient_url      = grad_med,   # URL da imagem de gradiente média
-        gradient_max_url  = grad_max,   # URL da imagem de gradiente máximo
-        gradient_min_url  = grad_min    # URL da imagem de gradiente mínimo
+        explicacao        = True        # sinaliza para o template mostrar o conteúdo de ajuda
     )
 
+@app.route(f'{STATIC_BUILD_URL}/<path:filename>')
+def estatico_build(filename):
+    """Estático com hash no nome, na variante pré-comprimida aceita pelo cliente (cache imutável)."""
+    return resposta_estatico(filename)
+
+@app.route('/api/gradientes/<versao>/<tipo>')
+@cache_respostas.rota(lambda: versao_atual("gradientes"))
+def matriz_gradiente(versao, tipo):
+    """
+    Matrizes mês × ano de um tipo de gradiente ("media", "max" ou "min") e as cores do
+    colormap, em JSON, para o desenho no cliente (static/js/gradientHeatmap.js).
+    Versão antiga redireciona para a publicada; a resposta tem cache imutável.
+    """
+    if tipo not in TIPOS_GRADIENTE:
+        abort(404)
+
+    atual = versao_atual("gradientes")
+    if versao != atual:
+        return redirect(url_for("matriz_gradiente", versao=atual, tipo=tipo))
+
+    resposta = jsonify({"versao": versao, **gradiente_matrizes(tipo, versao)})
+    resposta.headers["Cache-Control"] = CACHE_IMUTAVEL
+    return resposta
+
+@app.route('/gradientes/<versao>/<tipo>-<int:largura>.<formato>')
+def imagem_gradiente(versao, tipo, largura, formato):
+    """
+    Serve uma variante de imagem de gradiente (tipo × largura × formato) da versão da URL.
+    - Versão antiga: redireciona para a mesma variante da versão publicada.
+    - Variante não configurada: 404.
+    - Resposta com cache imutável, já que cada versão tem sua própria URL.
+    """
+    if tipo not in TIPOS_GRADIENTE or formato not in GRADIENTE_FORMATOS or largura not in GRADIENTE_LARGURAS:
+        abort(404)
+
+    atual = versao_atual("gradientes")
+    if versao != atual:
+        return redirect(url_for("imagem_gradiente", versao=atual, tipo=tipo,
+                                largura=largura, formato=formato))
+
+    conteudo = gradiente_imagem(tipo, formato, largura, versao)
+    if conteudo is None:
+        abort(404)
+    resposta = app.response_class(conteudo, mimetype=f"image/{formato}")
+    resposta.headers["Cache-Control"] = CACHE_IMUTAVEL
+    return resposta
+
 @app.route('/report_error', methods=['POST'])
 def report_error():
     """
@@ -237,49 +552,57 @@ def report_error():
     if not error_text:
         return jsonify({'error': 'O texto do erro é obrigatório.'}), 400
 
-    # Lista todas as pastas existentes em UPLOADS_FOLDER que comecem com 'error_'
-    # encontra a próxima pasta 'error_N'
-    existing = [
-        d for d in os.listdir(UPLOADS_FOLDER)
-        if os.path.isdir(os.path.join(UPLOADS_FOLDER, d)) and d.startswith("error_")
-    ]
-    # Determina o maior número já usado para não sobrescrever
-    max_num = 0
-    for d in existing:
-        try:
-            # Extrai o número após 'error_' e atualiza max_num se for maior
-            num = int(d.split("_")[1])
-            if num > max_num:
-                max_num = num
-        except ValueError:
-            # Ignora pastas com nome inesperado
-            continue
-
-    # cria diretório para este relatório
-    new_num = max_num + 1
-    new_dir = os.path.join(UPLOADS_FOLDER, f"error_{new_num}")
-    os.makedirs(new_dir, exist_ok=True)
-
-    # salva o texto
-    error_txt = os.path.join(new_dir, "error.txt")
-    with open(error_txt, "w", encoding="utf-8") as f:
-        f.write(error_text)
-
-    # salva o arquivo de imagem, se houver
-    image_path = None
-    if error_file:
-        fn = secure_filename(error_file.filename)
-        image_path = os.path.join(new_dir, fn)
-        error_file.save(image_path)
+    # Registra o relatório: o id vem de um contador atômico no SQLite (sem listar uploads/)
+    relatorio = criar_relatorio(UPLOADS_FOLDER, error_text, error_file)
 
     # retorna JSON com informações sobre o upload
     return jsonify({
         'message':         'Erro reportado com sucesso!',
-        'error_dir':       os.path.basename(new_dir),
-        'error_text_file': os.path.basename(error_txt),
-        'image_path':      image_path and os.path.basename(image_path)
+        'error_dir':       relatorio['pasta'],
+        'error_text_file': 'error.txt',
+        'image_path':      relatorio['arquivo']
     }), 200
 
+@app.errorhandler(RequestEntityTooLarge)
+def arquivo_grande_demais(e):
+    """Resposta JSON para envios acima de MAX_UPLOAD_BYTES."""
+    limite_mb = MAX_UPLOAD_BYTES / (1024 * 1024)
+    return jsonify({'error': f'O arquivo excede o limite de {limite_mb:.0f} MB.'}), 413
+
+@app.errorhandler(VersaoIndisponivel)
+def versao_indisponivel(e):
+    """
+    Versão publicada fora do cache enquanto o cubo em disco já é outro (reconstrução em
+    andamento ou publicação adiada): 503 sem cache, para nada ficar guardado na URL imutável.
+    """
+    resposta = jsonify({'error': 'Artefato em reconstrução; tente novamente em instantes.'})
+    resposta.status_code = 503
+    resposta.headers['Retry-After'] = '30'
+    resposta.headers['Cache-Control'] = 'no-store'
+    return resposta
+
+@app.route('/report_error/lista', methods=['GET'])
+def listar_erros():
+    """
+    Lista paginada dos relatórios de erro (mais recentes primeiro).
+    Exige o cabeçalho 'Authorization: Bearer <ADMIN_TOKEN>'; sem ADMIN_TOKEN configurado, fica desativada.
+    Parâmetros: 'limite' (1–100, padrão 20) e 'antes_de' (cursor 'proximo' da página anterior).
+    """
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    # compara bytes: com str, compare_digest levanta TypeError se houver caractere não ASCII
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({'error': 'Não autorizado.'}), 401
+
+    try:
+        limite   = min(max(int(request.args.get('limite', 20)), 1), 100)
+        antes_de = request.args.get('antes_de')
+        antes_de = int(antes_de) if antes_de else None
+    except ValueError:
+        return jsonify({'error': "'limite' e 'antes_de' devem ser inteiros."}), 400
+
+    itens, proximo = listar_relatorios(UPLOADS_FOLDER, antes_de=antes_de, limite=limite)
+    return jsonify({'relatorios': itens, 'proximo': proximo})
+
 
 if __name__ == '__main__':
     # executa a aplicação em modo debug
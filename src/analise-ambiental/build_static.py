@@ -0,0 +1,154 @@
+"""
+============================================
+Arquivo: build_static.py
+--------------------------------------------
+Etapa de build dos arquivos estáticos (static/css, static/js e static/images):
+- Cada arquivo é copiado para STATIC_BUILD_DIR com o hash do conteúdo no nome
+  (ex.: css/views.css → css/views.3f2a9c1b04de.css). Como o nome muda sempre que o
+  conteúdo muda, o app pode servi-los com cache imutável de longo prazo.
+- Referências url("/static/...") dentro dos CSS são reescritas para os nomes com hash
+  (por isso os CSS são processados por último, depois das imagens).
+- Formatos de texto (CSS, JS, SVG) ganham variantes pré-comprimidas .br (Brotli, se o
+  pacote estiver instalado) e .gz (gzip nível 9), gravadas só quando menores.
+- manifest.json (nome lógico → nome com hash) é gravado por último, de forma atômica;
+  o app (utils/estaticos.py) só passa a usar o build novo quando ele muda.
+- Arquivos de builds anteriores são mantidos (o conteúdo de cada nome nunca muda),
+  para que páginas já abertas continuem encontrando os seus; --limpar remove os que
+  não estão no manifesto atual.
+
+Uso:
+    python build_static.py
+    python build_static.py --limpar
+============================================
+"""
+
+import os
+import re
+import gzip
+import json
+import hashlib
+import argparse
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # sem o pacote Brotli: apenas as variantes .gz
+    brotli = None
+
+from config import BASE_DIR, STATIC_BUILD_DIR, STATIC_BUILD_URL
+
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+# Subpastas de static/ incluídas no build (static/dados fica de fora: downloads com nome fixo)
+PASTAS = ("images", "js", "css")
+
+# Extensões que recebem variantes pré-comprimidas (imagens já são comprimidas)
+COMPRESSIVEIS = {".css", ".js", ".svg", ".json", ".txt"}
+
+MANIFESTO = "manifest.json"
+
+# url("/static/..."), url('/static/...') ou url(/static/...) em CSS
+_URL_CSS = re.compile(r"""url\((['"]?)/static/([^'")?#]+)([^'")]*)\1\)""")
+
+
+def _arquivos(pasta):
+    """Caminhos relativos a static/ (separador "/") dos arquivos de uma subpasta, ordenados."""
+    encontrados = []
+    for raiz, _, nomes in os.walk(os.path.join(STATIC_DIR, pasta)):
+        for nome in nomes:
+            caminho = os.path.relpath(os.path.join(raiz, nome), STATIC_DIR)
+            encontrados.append(caminho.replace(os.sep, "/"))
+    return sorted(encontrados)
+
+
+def nome_com_hash(logico, conteudo):
+    """'css/views.css' → 'css/views.<12 hex do sha256>.css'."""
+    base, ext = os.path.splitext(logico)
+    return f"{base}.{hashlib.sha256(conteudo).hexdigest()[:12]}{ext}"
+
+
+def reescrever_css(texto, manifesto):
+    """Troca as referências /static/<arquivo> do CSS pelos nomes com hash já gerados."""
+    def trocar(m):
+        aspas, alvo, sufixo = m.group(1), m.group(2), m.group(3)
+        if alvo not in manifesto:
+            return m.group(0)
+        return f"url({aspas}{STATIC_BUILD_URL}/{manifesto[alvo]}{sufixo}{aspas})"
+    return _URL_CSS.sub(trocar, texto)
+
+
+def _gravar(caminho, conteudo):
+    """Grava de forma atômica (temporário na mesma pasta + os.replace)."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(conteudo)
+    os.replace(tmp, caminho)
+
+
+def variantes_comprimidas(conteudo):
+    """Variantes {".br": bytes, ".gz": bytes} menores que o original."""
+    variantes = {".gz": gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes[".br"] = brotli.compress(conteudo, quality=11)
+    return {ext: dados for ext, dados in variantes.items() if len(dados) < len(conteudo)}
+
+
+def construir(destino=STATIC_BUILD_DIR):
+    """
+    Gera o build em 'destino' e retorna o manifesto (nome lógico → nome com hash).
+    Arquivos já existentes com o mesmo nome com hash não são regravados.
+    """
+    manifesto = {}
+    for pasta in PASTAS:
+        for logico in _arquivos(pasta):
+            with open(os.path.join(STATIC_DIR, logico), "rb") as f:
+                conteudo = f.read()
+            if logico.endswith(".css"):
+                conteudo = reescrever_css(conteudo.decode("utf-8"), manifesto).encode("utf-8")
+
+            fisico = nome_com_hash(logico, conteudo)
+            manifesto[logico] = fisico
+            caminho = os.path.join(destino, fisico)
+            if os.path.exists(caminho):
+                continue
+            if os.path.splitext(logico)[1].lower() in COMPRESSIVEIS:
+                for ext, dados in variantes_comprimidas(conteudo).items():
+                    _gravar(caminho + ext, dados)
+            _gravar(caminho, conteudo)  # por último: sua existência indica variantes prontas
+
+    _gravar(os.path.join(destino, MANIFESTO),
+            json.dumps(manifesto, indent=2, sort_keys=True).encode("utf-8"))
+    return manifesto
+
+
+def limpar(manifesto, destino=STATIC_BUILD_DIR):
+    """Remove do build os arquivos (e variantes) que não estão no manifesto. Retorna quantos."""
+    manter = {MANIFESTO}
+    for fisico in manifesto.values():
+        manter.update({fisico, fisico + ".br", fisico + ".gz"})
+    removidos = 0
+    for raiz, _, nomes in os.walk(destino):
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            if os.path.relpath(caminho, destino).replace(os.sep, "/") not in manter:
+                os.remove(caminho)
+                removidos += 1
+    return removidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os estáticos com hash e as variantes .br/.gz.")
+    parser.add_argument("--limpar", action="store_true",
+                        help="remove arquivos de builds anteriores que não estão no manifesto atual")
+    args = parser.parse_args()
+
+    manifesto = construir()
+    print(f"{len(manifesto)} arquivos em {STATIC_BUILD_DIR}"
+          + ("" if brotli is not None else " (sem Brotli: apenas .gz)"))
+    if args.limpar:
+        print(f"{limpar(manifesto)} arquivos antigos removidos")
+
+
+if __name__ == "__main__":
+    main()
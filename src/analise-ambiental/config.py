@@ -6,8 +6,33 @@ Configura caminhos e variáveis de ambiente para a aplicação:
 - BASE_DIR, SRC_DIR: determinação de diretórios base do projeto.
 - DATABASE_PATH: CSV original de medições de qualidade do ar.
 - NEW_DATABASE_PATH: CSV resumido para geração de gradientes.
+- DATABASE_RESUMIDO_PATH: CSV resumido (IQAr de MP10 e MP2.5 por estação).
 - METEOROLOGY_PATH: CSV de dados meteorológicos.
+- METEOROLOGY_NPZ_PATH: mesma meteorologia em formato numérico (.npz, float32 + timestamps).
+- CUBO_ESTATISTICAS_PATH: cubo pré-agregado (estação × poluente × ano × mês × hora) das médias.
+- DATABASE_PARTICOES_DIR, NEW_DATABASE_PARTICOES_DIR, METEOROLOGY_PARTICOES_DIR: os CSVs
+  acima particionados por ano/mês (consultas por intervalo sem o backend SQLite).
+- ESTACOES_PATH: registro de estações (JSON) que define o layout de colunas do database.
+- FAIXAS_IQAR_PATH: faixas de concentração/índice e janela de média de cada poluente (JSON).
+- CACHE_DIR: pasta dos artefatos renderizados compartilhados entre workers.
+- RESPOSTAS_CACHE_MAX_BYTES: limite (por processo) do cache de respostas comprimidas.
+- MEMORIA_COMPARTILHADA, MEMORIA_COMPARTILHADA_PREFIXO: arrays numéricos (grade horária,
+  cubo, meteorologia) em segmentos de memória compartilhada entre workers, e o prefixo
+  dos nomes dos segmentos.
+- STATIC_BUILD_DIR, STATIC_BUILD_URL: estáticos com hash e variantes .br/.gz (build_static.py)
+  e o prefixo de URL em que o app os serve.
+- TRATAMENTO_DIR, DADOS_COLETADOS_DIR: scripts do pipeline e dados brutos (serviço de reconstrução).
+- MANIFESTO_DADOS_PATH: manifesto de conteúdo (hash, tamanho, layout) dos brutos e linhagem
+  dos derivados, que decide as etapas a pular e a versão dos caches (utils/manifesto.py).
+- MEDICOES_DB_PATH: backend SQLite opcional das medições (usado se o arquivo existir).
 - SQLALCHEMY_DATABASE_URI: string de conexão (SQLite por default).
+- ERROR_REPORTS_DB_PATH: arquivo SQLite dos relatórios de erro (derivado da URI).
+- ADMIN_TOKEN: token da listagem de relatórios de erro (e do perfil por cabeçalho).
+- PERFIL_REQUISICOES, PERFIL_DIR, PERFIL_MAX_ARQUIVOS, PERFIL_LIMIAR_MS: perfil opcional
+  de requisições com cProfile (utils/perfil.py), pasta rotativa dos perfis e limiar em ms.
+- MAX_UPLOAD_BYTES, UPLOAD_MAX_LADO, UPLOAD_WEBP_QUALIDADE: limites e recompressão dos anexos.
+- GRADIENTE_FORMATOS, GRADIENTE_LARGURAS, GRADIENTE_DPI, GRADIENTE_WEBP_QUALIDADE: variantes
+  (formato × largura em px) das imagens de gradiente servidas por URL.
 ============================================
 """
 
@@ -23,7 +48,89 @@ SRC_DIR = os.path.abspath(os.path.join(BASE_DIR, '..'))
 DATABASE_PATH         = os.path.join(SRC_DIR, "tratamento-dos-dados", "database.csv")
 NEW_DATABASE_PATH     = os.path.join(SRC_DIR, "tratamento-dos-dados", "new_database.csv")
 METEOROLOGY_PATH      = os.path.join(SRC_DIR, "tratamento-dos-dados", "database_met.csv")
+METEOROLOGY_NPZ_PATH  = os.path.join(SRC_DIR, "tratamento-dos-dados", "database_met.npz")
+CUBO_ESTATISTICAS_PATH = os.path.join(SRC_DIR, "tratamento-dos-dados", "cubo_estatisticas.npz")
+DATABASE_RESUMIDO_PATH = os.path.join(SRC_DIR, "tratamento-dos-dados", "database_resumido.csv")
+
+# Partições por ano/mês dos CSVs acima, geradas pelo pipeline (ver particoes.py)
+PARTICOES_DIR              = os.path.join(SRC_DIR, "tratamento-dos-dados", "particoes")
+DATABASE_PARTICOES_DIR     = os.path.join(PARTICOES_DIR, "database")
+NEW_DATABASE_PARTICOES_DIR = os.path.join(PARTICOES_DIR, "new_database")
+METEOROLOGY_PARTICOES_DIR  = os.path.join(PARTICOES_DIR, "database_met")
+
 INFO_DATABASE_MESES_PATH = os.path.join(SRC_DIR, "tratamento-dos-dados", "info-database-meses.txt")
 
+# Registro de estações: lista de estações e deslocamentos de colunas (pode ser trocado via variável de ambiente)
+ESTACOES_PATH = os.environ.get(
+    "ESTACOES_PATH",
+    os.path.join(SRC_DIR, "tratamento-dos-dados", "estacoes.json")
+)
+
+# Faixas do IQAr por poluente (pode ser trocado via variável de ambiente)
+FAIXAS_IQAR_PATH = os.environ.get(
+    "FAIXAS_IQAR_PATH",
+    os.path.join(SRC_DIR, "tratamento-dos-dados", "faixas_iqar.json")
+)
+
+# Cache em disco das renderizações caras (gradientes, HTML Plotly), compartilhado entre workers
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(BASE_DIR, "cache"))
+
+# Respostas já renderizadas e comprimidas, por processo (utils/cache_respostas.py)
+RESPOSTAS_CACHE_MAX_BYTES = int(os.environ.get("RESPOSTAS_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+# Arrays dos datasets em memória compartilhada entre os workers (utils/memoria_compartilhada.py);
+# "0" faz cada processo manter a própria cópia. O prefixo separa instalações no mesmo host.
+MEMORIA_COMPARTILHADA = os.environ.get("MEMORIA_COMPARTILHADA", "1") != "0"
+MEMORIA_COMPARTILHADA_PREFIXO = os.environ.get("MEMORIA_COMPARTILHADA_PREFIXO", "aamb")
+
+# Estáticos com hash no nome e variantes pré-comprimidas (gerados por build_static.py)
+STATIC_BUILD_DIR = os.environ.get("STATIC_BUILD_DIR", os.path.join(BASE_DIR, "static-build"))
+STATIC_BUILD_URL = "/static-build"
+
+# Backend SQLite opcional (medições, IQAr e meteorologia); criado com "python -m utils.banco_sqlite"
+MEDICOES_DB_PATH = os.environ.get(
+    "MEDICOES_DB_PATH",
+    os.path.join(SRC_DIR, "tratamento-dos-dados", "medicoes.db")
+)
+
+# Pipeline de tratamento e dados brutos observados pelo serviço de reconstrução
+TRATAMENTO_DIR      = os.path.join(SRC_DIR, "tratamento-dos-dados")
+DADOS_COLETADOS_DIR = os.environ.get("DADOS_COLETADOS_DIR", os.path.join(SRC_DIR, "dados-coletados"))
+
+# Manifesto de conteúdo dos brutos e derivados (gravado só pelo pipeline, utils/pipeline.py)
+MANIFESTO_DADOS_PATH = os.environ.get(
+    "MANIFESTO_DADOS_PATH",
+    os.path.join(SRC_DIR, "tratamento-dos-dados", "manifesto.json")
+)
+
 # Mantém o SQLite para erros
 SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///error_reports.db')
+
+# Arquivo do banco de relatórios de erro: caminho da URI sqlite (relativo a BASE_DIR);
+# para URIs de outros bancos, usa error_reports.db local
+if SQLALCHEMY_DATABASE_URI.startswith("sqlite:///"):
+    ERROR_REPORTS_DB_PATH = os.path.join(BASE_DIR, SQLALCHEMY_DATABASE_URI[len("sqlite:///"):])
+else:
+    ERROR_REPORTS_DB_PATH = os.path.join(BASE_DIR, "error_reports.db")
+
+# Anexos dos relatórios: tamanho máximo da requisição e recompressão em WebP
+MAX_UPLOAD_BYTES      = int(os.environ.get("MAX_UPLOAD_BYTES", 5 * 1024 * 1024))
+UPLOAD_MAX_LADO       = int(os.environ.get("UPLOAD_MAX_LADO", 1920))
+UPLOAD_WEBP_QUALIDADE = int(os.environ.get("UPLOAD_WEBP_QUALIDADE", 80))
+
+# Imagens de gradiente servidas por URL (renderizadas sob demanda): formatos, larguras,
+# resolução da renderização base e qualidade do WebP
+GRADIENTE_FORMATOS       = tuple(os.environ.get("GRADIENTE_FORMATOS", "webp,png").split(","))
+GRADIENTE_LARGURAS       = tuple(int(l) for l in os.environ.get("GRADIENTE_LARGURAS", "600,1200,1800").split(","))
+GRADIENTE_DPI            = int(os.environ.get("GRADIENTE_DPI", 110))
+GRADIENTE_WEBP_QUALIDADE = int(os.environ.get("GRADIENTE_WEBP_QUALIDADE", 80))
+
+# Token exigido para listar relatórios de erro (sem token configurado, a listagem fica desativada)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Perfil de requisições (utils/perfil.py): PERFIL_REQUISICOES=1 perfila todas; sem ele, só as
+# que trazem o cabeçalho X-Perfil com o ADMIN_TOKEN. Perfis gravados só acima do limiar (ms)
+PERFIL_REQUISICOES  = os.environ.get("PERFIL_REQUISICOES", "0") == "1"
+PERFIL_DIR          = os.environ.get("PERFIL_DIR", os.path.join(BASE_DIR, "perfis"))
+PERFIL_MAX_ARQUIVOS = int(os.environ.get("PERFIL_MAX_ARQUIVOS", 50))
+PERFIL_LIMIAR_MS    = float(os.environ.get("PERFIL_LIMIAR_MS", 0))
@@ -0,0 +1,118 @@
+"""
+============================================
+Arquivo: reconstrucao.py
+--------------------------------------------
+Serviço de reconstrução em segundo plano dos artefatos derivados:
+- A cada ciclo (polling), executa o pipeline de tratamento como um DAG (utils/pipeline.py):
+  os brutos de dados-coletados/ são varridos uma única vez pelo manifesto de conteúdo
+  (utils/manifesto.py) e só as etapas desatualizadas rodam — aquelas cuja saída não existe,
+  foi alterada fora do pipeline ou tem alguma entrada com conteúdo diferente do registrado
+  na última execução. Salvar um arquivo sem mudá-lo não dispara nada.
+    qar*.csv              ← planilhas qar.xls/.xlsx (valida_qar_automatico.py)
+    database.csv          ← dados-coletados/<ano>/<mes>/qar*.csv
+    new_database.csv      ← database.csv, estacoes.json, faixas_iqar.json
+    database_resumido.csv ← new_database.csv
+    cubo_estatisticas.npz ← new_database.csv (incremental: só acumula as linhas novas)
+    met.csv               ← planilhas met.xls/.xlsx (valida_met_automatico.py)
+    database_met.csv/.npz ← dados-coletados/<ano>/<mes>/met.csv
+    medicoes.db           ← database.csv, new_database.csv, database_met.npz
+                            (somente se o backend SQLite já tiver sido carregado uma vez)
+- Os ramos de qualidade do ar e de meteorologia rodam em paralelo; quando algo foi
+  executado, o relatório do pipeline (tempo, linhas e pico de memória por etapa) vai para o log.
+- Só uma falha nas etapas que alimentam os artefatos publicados (o cubo de estatísticas e
+  suas dependências) adia a publicação; as demais (ex.: uma planilha met inválida) só vão
+  para o log.
+- Os scripts do pipeline gravam a saída de forma atômica (temporário + os.replace).
+- Depois de reconstruir, renderiza as matrizes dos gradientes e o HTML Plotly da nova versão no
+  cache compartilhado e monta a grade horária na memória compartilhada (utils/grade.py), e
+  só então publica a versão (publicado.json). Os workers do app
+  passam a usá-la na próxima requisição, lendo o resultado já pronto do cache. A versão
+  anterior continua em disco até a publicação e só então é apagada do cache.
+
+Uso:
+    python reconstrucao.py                # loop contínuo (intervalo padrão: 60 s)
+    python reconstrucao.py --intervalo 30
+    python reconstrucao.py --uma-vez      # uma única verificação (ex.: cron)
+============================================
+"""
+
+import time
+import argparse
+from datetime import datetime
+
+from utils import artefatos, pipeline
+
+
+def log(msg):
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {msg}", flush=True)
+
+
+# Etapas que alimentam os artefatos publicados (arquivos de origem de artefatos.GRUPOS).
+# A grade horária não entra: é montada do database.csv/database_met.npz em disco, sempre
+# coerentes entre si, então uma falha só no ramo de meteorologia não adia a publicação.
+ETAPAS_PUBLICACAO = pipeline.etapas_de({p for grupo, paths in artefatos.GRUPOS.items()
+                                        if grupo != "grade" for p in paths})
+
+
+def reconstruir():
+    """
+    Executa as etapas desatualizadas. Retorna False se alguma etapa de ETAPAS_PUBLICACAO
+    falhar (ou for cancelada); nesse caso a versão publicada continua a anterior. Falhas
+    nas demais etapas só cancelam as que dependem delas.
+    """
+    sucesso, relatorio = pipeline.executar(log=log)
+    if any(r["situacao"] in ("executada", "falhou") for r in relatorio):
+        for linha in pipeline.formatar_relatorio(relatorio).splitlines():
+            log(linha)
+    if sucesso:
+        return True
+    bloqueantes = [r["etapa"] for r in relatorio
+                   if r["etapa"] in ETAPAS_PUBLICACAO and r["situacao"] in ("falhou", "cancelada")]
+    if bloqueantes:
+        log(f"Publicação adiada (falha em {', '.join(bloqueantes)})")
+        return False
+    log("Falha fora das etapas dos artefatos publicados; publicação mantida")
+    return True
+
+
+def publicar_se_mudou():
+    """Aquece o cache com a versão em disco e publica-a se for diferente da publicada."""
+    versoes = artefatos.versoes_em_disco()
+    if versoes == artefatos.versoes_publicadas():
+        return False
+    inicio = time.perf_counter()
+    artefatos.aquecer(versoes)
+    conteudo = artefatos.publicar(versoes)
+    artefatos.limpar_cache()
+    log(f"Versão {conteudo['versao']} publicada (renderização em {time.perf_counter() - inicio:.1f}s)")
+    return True
+
+
+def ciclo():
+    if reconstruir():
+        publicar_se_mudou()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstrói e publica os artefatos derivados quando os dados mudam.")
+    parser.add_argument("--intervalo", type=float, default=60.0,
+                        help="segundos entre verificações (padrão: 60)")
+    parser.add_argument("--uma-vez", action="store_true",
+                        help="faz uma única verificação e sai")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            ciclo()
+        except Exception as e:
+            # Um erro num ciclo não derruba o serviço; a versão publicada permanece válida
+            log(f"Erro no ciclo de reconstrução: {e}")
+            if args.uma_vez:
+                raise
+        if args.uma_vez:
+            break
+        time.sleep(args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
@@ -81,10 +81,19 @@ document.addEventListener("DOMContentLoaded", () => {
           updateMeteorologiaFromModal(); // Atualiza os dados meteorológicos
         }
       }
-      // Se estivermos no modo Qualidade do Ar, executa o comportamento padrão (submit ou similar)
+      // Se estivermos no modo Qualidade do Ar, atualiza os painéis pelo snapshot do horário
+      // (sem recarregar a página); se ele falhar, envia o formulário como antes
       else if (document.documentElement.classList.contains("quality-mode")) {
-        if (typeof window.submitWithOverlay === "function") {
-          window.submitWithOverlay(); // Executa o envio do formulário com a sobreposição
+        const enviarFormulario = () => {
+          if (typeof window.submitWithOverlay === "function") {
+            window.submitWithOverlay(); // Executa o envio do formulário com a sobreposição
+          }
+        };
+        if (typeof window.atualizarQualidadeAr === "function") {
+          window.atualizarQualidadeAr(inputDate.value, inputHour.value, stationSelect.value)
+            .catch(enviarFormulario);
+        } else {
+          enviarFormulario();
         }
       }
       // Se não houver nenhum modo especial, nada é feito (ou um comportamento padrão pode ser definido)
@@ -105,14 +114,12 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   
     // Mapeia os botões MP2.5 e MP10 para disparar a mesma ação de iqar-trigger
-    ["iqar-info-trigger-mp25", "iqar-info-trigger-mp10"].forEach((btnId) => {
-      const btn = document.getElementById(btnId);
+    // (delegado no document: os botões são recriados quando o snapshot.js reescreve os painéis)
+    document.addEventListener("click", (e) => {
+      const btn = e.target.closest("#iqar-info-trigger-mp25, #iqar-info-trigger-mp10");
       if (!btn || !iqarTrigger) return;
-  
-      btn.addEventListener("click", (e) => {
-        e.preventDefault();
-        iqarTrigger.click(); // Dispara a ação associada ao botão
-      });
+      e.preventDefault();
+      iqarTrigger.click(); // Dispara a ação associada ao botão
     });
   });
   
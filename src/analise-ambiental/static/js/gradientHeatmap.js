@@ -0,0 +1,214 @@
+/**
+ * ===========================================
+ * Arquivo: gradientHeatmap.js
+ * -------------------------------------------
+ * Desenha no navegador os heatmaps de gradiente (mês × ano) das estatísticas:
+ *  - Cada <canvas class="estatisticas-gradient-img"> traz em data-matriz-url a rota
+ *    /api/gradientes/<versão>/<tipo>, que devolve as matrizes e as cores do colormap.
+ *  - O JSON só é buscado quando o canvas fica visível (IntersectionObserver);
+ *    canvases inseridos depois (painel sob demanda) entram via window.observarGradientes.
+ *  - Três painéis lado a lado (MP2.5, MP10 e PTS), cada um com sua barra de cores,
+ *    no mesmo tema escuro das imagens geradas pelo servidor.
+ *  - O desenho é refeito ao redimensionar a janela, na resolução do dispositivo.
+ * ===========================================
+ */
+
+(function () {
+  const LARGURA_MAX = 1125;   // mesma largura máxima das imagens (380 px de altura)
+  const PROPORCAO   = 2.96;   // largura / altura da figura original (18 × 6 pol. com margens)
+  const BRANCO      = "#ffffff";
+
+  /**
+   * @description Converte "#rrggbb" em [r, g, b].
+   * @param {string} hex - Cor em hexadecimal.
+   * @returns {number[]} Componentes RGB.
+   */
+  function hexParaRgb(hex) {
+    const n = parseInt(hex.slice(1), 16);
+    return [(n >> 16) & 255, (n >> 8) & 255, n & 255];
+  }
+
+  /**
+   * @description Colormap linear com paradas igualmente espaçadas (como LinearSegmentedColormap).
+   * @param {string[]} cores - Paradas do colormap.
+   * @returns {function(number): string} Função t ∈ [0, 1] → cor CSS.
+   */
+  function criarColormap(cores) {
+    const rgb = cores.map(hexParaRgb);
+    return t => {
+      const x = Math.min(Math.max(t, 0), 1) * (rgb.length - 1);
+      const i = Math.min(Math.floor(x), rgb.length - 2);
+      const f = x - i;
+      const c = rgb[i].map((v, k) => Math.round(v + (rgb[i + 1][k] - v) * f));
+      return `rgb(${c[0]}, ${c[1]}, ${c[2]})`;
+    };
+  }
+
+  /**
+   * @description Desenha um painel (heatmap + eixos + barra de cores) na área informada.
+   * @param {CanvasRenderingContext2D} ctx - Contexto do canvas (em pixels CSS).
+   * @param {Object} painel - Painel do JSON (titulo, meses, anos, valores, vmin, vmax).
+   * @param {Object} area - Retângulo {x, y, w, h} reservado ao painel.
+   * @param {string[]} cores - Paradas do colormap.
+   * @param {number} k - Escala das fontes e margens.
+   */
+  function desenharPainel(ctx, painel, area, cores, k) {
+    const cmap = criarColormap(cores);
+    const fonte = px => `${Math.max(9, Math.round(px * k))}px sans-serif`;
+    const margem = { esq: 48 * k, dir: 62 * k, topo: 30 * k, base: 58 * k };
+    const x0 = area.x + margem.esq;
+    const y0 = area.y + margem.topo;
+    const w = area.w - margem.esq - margem.dir;
+    const h = area.h - margem.topo - margem.base;
+    const { meses, anos, valores, vmin, vmax } = painel;
+
+    ctx.fillStyle = BRANCO;
+    ctx.textAlign = "center";
+    ctx.textBaseline = "alphabetic";
+    ctx.font = fonte(16);
+    ctx.fillText(painel.titulo, x0 + w / 2, area.y + 20 * k);
+
+    // Células: mês 1 embaixo (origem "lower"), anos da esquerda para a direita
+    const cw = w / Math.max(anos.length, 1);
+    const ch = h / Math.max(meses.length, 1);
+    const escala = vmax > vmin ? vmax - vmin : 1;
+    valores.forEach((linha, i) => {
+      linha.forEach((v, j) => {
+        if (v === null) return;
+        ctx.fillStyle = cmap(vmax > vmin ? (v - vmin) / escala : 0.5);
+        ctx.fillRect(x0 + j * cw, y0 + h - (i + 1) * ch, Math.ceil(cw), Math.ceil(ch));
+      });
+    });
+
+    // Ticks de mês (eixo Y) e rótulo
+    ctx.font = fonte(12);
+    ctx.textAlign = "right";
+    ctx.textBaseline = "middle";
+    meses.forEach((m, i) => ctx.fillText(String(m), x0 - 6 * k, y0 + h - (i + 0.5) * ch));
+    ctx.save();
+    ctx.translate(area.x + 12 * k, y0 + h / 2);
+    ctx.rotate(-Math.PI / 2);
+    ctx.textAlign = "center";
+    ctx.font = fonte(14);
+    ctx.fillText("Mês", 0, 0);
+    ctx.restore();
+
+    // Ticks de ano (eixo X, rotacionados 45°) e rótulo
+    ctx.font = fonte(12);
+    anos.forEach((a, j) => {
+      ctx.save();
+      ctx.translate(x0 + (j + 0.5) * cw, y0 + h + 8 * k);
+      ctx.rotate(-Math.PI / 4);
+      ctx.textAlign = "right";
+      ctx.textBaseline = "middle";
+      ctx.fillText(String(a), 0, 0);
+      ctx.restore();
+    });
+    ctx.textAlign = "center";
+    ctx.textBaseline = "alphabetic";
+    ctx.font = fonte(14);
+    ctx.fillText("Ano", x0 + w / 2, area.y + area.h - 4 * k);
+
+    // Barra de cores com cinco marcas entre vmin e vmax
+    if (vmin === null) return;
+    const bx = x0 + w + 12 * k;
+    const bw = 12 * k;
+    const grad = ctx.createLinearGradient(0, y0 + h, 0, y0);
+    cores.forEach((c, i) => grad.addColorStop(i / (cores.length - 1), c));
+    ctx.fillStyle = grad;
+    ctx.fillRect(bx, y0, bw, h);
+    ctx.strokeStyle = BRANCO;
+    ctx.lineWidth = 1;
+    ctx.strokeRect(bx, y0, bw, h);
+    ctx.fillStyle = BRANCO;
+    ctx.font = fonte(12);
+    ctx.textAlign = "left";
+    ctx.textBaseline = "middle";
+    for (let i = 0; i <= 4; i++) {
+      const v = vmin + (vmax - vmin) * i / 4;
+      ctx.fillText(v.toFixed(1), bx + bw + 4 * k, y0 + h - h * i / 4);
+    }
+  }
+
+  /**
+   * @description Desenha os três painéis no canvas, na largura disponível do contêiner.
+   * @param {HTMLCanvasElement} canvas - Canvas do gradiente.
+   * @param {Object} dados - JSON de /api/gradientes.
+   */
+  function desenhar(canvas, dados) {
+    // Primeiro ancestral com largura (wrappers com display: contents não têm caixa própria)
+    let pai = canvas.parentElement;
+    while (pai && !pai.clientWidth) pai = pai.parentElement;
+    const largura = Math.min(pai ? pai.clientWidth : LARGURA_MAX, LARGURA_MAX);
+    const altura = Math.round(largura / PROPORCAO);
+    const dpr = window.devicePixelRatio || 1;
+    canvas.width = Math.round(largura * dpr);
+    canvas.height = Math.round(altura * dpr);
+    canvas.style.width = `${largura}px`;
+    canvas.style.height = `${altura}px`;
+
+    const ctx = canvas.getContext("2d");
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+    ctx.fillStyle = dados.fundo;
+    ctx.fillRect(0, 0, largura, altura);
+
+    const k = largura / LARGURA_MAX;
+    const pw = largura / dados.paineis.length;
+    dados.paineis.forEach((painel, i) =>
+      desenharPainel(ctx, painel, { x: i * pw, y: 0, w: pw, h: altura }, dados.cores, k));
+  }
+
+  /**
+   * @description Busca (uma vez) o JSON do canvas e o desenha.
+   * @param {HTMLCanvasElement} canvas - Canvas com data-matriz-url.
+   */
+  function carregar(canvas) {
+    if (canvas._gradiente) return;
+    canvas._gradiente = fetch(canvas.dataset.matrizUrl)
+      .then(r => {
+        if (!r.ok) throw new Error(r.status);
+        return r.json();
+      })
+      .then(dados => {
+        canvas._dados = dados;
+        desenhar(canvas, dados);
+      })
+      .catch(() => {
+        canvas._gradiente = null;  // permite nova tentativa na próxima exibição
+      });
+  }
+
+  // Busca e desenha cada gradiente só quando ele aparece na tela
+  const observer = new IntersectionObserver(entradas => {
+    entradas.forEach(e => {
+      if (!e.isIntersecting) return;
+      if (e.target._dados) desenhar(e.target, e.target._dados);
+      else carregar(e.target);
+    });
+  });
+
+  /**
+   * @description Passa a observar os canvases de gradiente dentro de 'raiz'
+   * (chamada também quando o painel de estatísticas é inserido na página).
+   * @param {ParentNode} raiz - Elemento (ou document) onde procurar os canvases.
+   */
+  window.observarGradientes = function (raiz) {
+    raiz.querySelectorAll("canvas.estatisticas-gradient-img[data-matriz-url]")
+      .forEach(c => observer.observe(c));
+  };
+
+  document.addEventListener("DOMContentLoaded", () => {
+    window.observarGradientes(document);
+
+    // Redesenha os gradientes já carregados ao redimensionar a janela
+    let timer = null;
+    window.addEventListener("resize", () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => {
+        document.querySelectorAll("canvas.estatisticas-gradient-img").forEach(c => {
+          if (c._dados && c.offsetParent !== null) desenhar(c, c._dados);
+        });
+      }, 150);
+    });
+  });
+})();
@@ -10,14 +10,33 @@
  * meteorológicas exibidas, com base em uma seleção de data e hora.
  * 
  * O código inclui:
- * - Obtenção das imagens associadas aos valores de precipitação e umidade
+ * - Obtenção das imagens associadas aos valores de precipitação e umidade (URLs com hash
+ *   de estatico(), lidas do atributo data-imagens de #meteorologia-info)
  * - Criação de opções de horas em um seletor
  * - Atualização do painel de vento
- * - Requisição AJAX para obter dados meteorológicos
+ * - Dados meteorológicos do snapshot do horário (snapshot.js, GET /api/snapshot)
  * - Funções de visualização e interação com a interface
  * ============================================
  */
 
+/** Mapa nome → URL das imagens do modal (lido uma vez de #meteorologia-info). */
+let imagensMet = null;
+
+/**
+ * @description Retorna a URL (com hash, servida com cache imutável) de uma imagem do modal.
+ * Sem o mapa no template, usa o caminho sem hash em /static/images.
+ *
+ * @param {string} nome - Nome da imagem sem extensão (ex.: "nuvem-0").
+ * @returns {string} URL da imagem.
+ */
+function imagemMet(nome) {
+  if (imagensMet === null) {
+    const info = document.getElementById("meteorologia-info");
+    imagensMet = info && info.dataset.imagens ? JSON.parse(info.dataset.imagens) : {};
+  }
+  return imagensMet[nome] || `/static/images/${nome}.webp`;
+}
+
 /**
  * @description Função para obter a imagem correspondente ao valor de precipitação.
  * A imagem muda com base nos valores de precipitação, como "nuvem-0" para baixa precipitação,
@@ -28,11 +47,11 @@
  */
 function getPrecipImage(value) {
   const v = parseFloat(value) || 0;
-  if (v >= 0 && v <= 5)    return "/static/images/nuvem-0.webp";
-  if (v >= 6 && v <= 15)   return "/static/images/nuvem-20.webp";
-  if (v >= 16 && v <= 49)  return "/static/images/nuvem-60.webp";
-  if (v >= 50 && v <= 100) return "/static/images/nuvem-80.webp";
-  return "/static/images/nuvem-80.webp";
+  if (v >= 0 && v <= 5)    return imagemMet("nuvem-0");
+  if (v >= 6 && v <= 15)   return imagemMet("nuvem-20");
+  if (v >= 16 && v <= 49)  return imagemMet("nuvem-60");
+  if (v >= 50 && v <= 100) return imagemMet("nuvem-80");
+  return imagemMet("nuvem-80");
 }
 
 /**
@@ -45,11 +64,11 @@ function getPrecipImage(value) {
  */
 function getUmidadeImage(value) {
   const v = parseFloat(value) || 0;
-  if (v >= 50 && v <= 100) return "/static/images/planta-boa.webp";
-  if (v >= 36 && v <= 49)  return "/static/images/planta-moderado.webp";
-  if (v >= 30 && v <= 35)  return "/static/images/planta-ruim.webp";
-  if (v < 30)              return "/static/images/planta-pessima.webp";
-  return "/static/images/planta-boa.webp";
+  if (v >= 50 && v <= 100) return imagemMet("planta-boa");
+  if (v >= 36 && v <= 49)  return imagemMet("planta-moderado");
+  if (v >= 30 && v <= 35)  return imagemMet("planta-ruim");
+  if (v < 30)              return imagemMet("planta-pessima");
+  return imagemMet("planta-boa");
 }
 
 /**
@@ -159,29 +178,23 @@ function updateMeteorologiaFromModal() {
 }
 
 /**
- * @description Faz uma requisição AJAX para obter os dados meteorológicos do servidor.
- * Utiliza o método POST para enviar os parâmetros de data e hora ao backend, 
- * e exibe os resultados ou mensagens de erro na interface do usuário.
+ * @description Obtém os dados meteorológicos do horário a partir do snapshot
+ * (GET /api/snapshot, ver snapshot.js), a mesma resposta que traz a classificação das
+ * estações: alternar entre os modos no mesmo horário não faz nova requisição.
+ * Exibe os resultados ou mensagens de erro na interface do usuário.
  *
  * @param {string} dateVal - A data selecionada pelo usuário no formato yyyy-mm-dd.
  * @param {string} hourVal - A hora selecionada pelo usuário no formato HH.
  */
 function fetchMeteorologia(dateVal, hourVal) {
-  var xhr = new XMLHttpRequest();
-  xhr.open("POST", "/meteorologia", true);
-  xhr.setRequestHeader("Content-Type", "application/x-www-form-urlencoded");
+  // Obtém o elemento da página onde as informações meteorológicas serão exibidas
+  var infoDiv = document.getElementById("meteorologia-info");
 
-  xhr.onreadystatechange = function () {
-    // Verifica se a requisição foi completada
-    if (xhr.readyState === 4) {
-      // Obtém o elemento da página onde as informações meteorológicas serão exibidas
-      var infoDiv = document.getElementById("meteorologia-info");
-  
-      // Verifica se a requisição foi bem-sucedida (status 200)
-      if (xhr.status === 200) {
+  window.obterSnapshot(dateVal, hourVal)
+    .then(function (snapshot) {
         try {
-          // Converte a resposta da requisição (xhr.responseText) para um objeto JSON
-          var response = JSON.parse(xhr.responseText);
+          // Registro meteorológico do snapshot (mesmo formato da rota /meteorologia)
+          var response = snapshot.meteorologia;
           console.log("Resposta da meteorologia:", response);
   
           // Verifica se existe um erro na resposta (caso o servidor tenha retornado um erro)
@@ -216,7 +229,7 @@ function fetchMeteorologia(dateVal, hourVal) {
             const tPerc = Math.min(Math.max((temperaturaValor - tMin) / (tMax - tMin) * 100, 0), 100);
   
             // Determina a classe de precipitação (se não houver precipitação, é classificado como "norain")
-            const chuvaClass = (precipImageFile === "/static/images/nuvem-0.webp") ? "norain" : "rain-medium";
+            const chuvaClass = (precipImageFile === imagemMet("nuvem-0")) ? "norain" : "rain-medium";
 
             infoDiv.innerHTML = 
         `<div class="meteorologia-data-grid">
@@ -358,17 +371,13 @@ function fetchMeteorologia(dateVal, hourVal) {
           infoDiv.innerHTML = `<p class="met-error-message">Erro ao processar a resposta.</p>`;
           console.error("Erro de parsing:", e); // Log do erro para depuração
         }
-        } else {
-        // Se o status da requisição não for 200 (indica erro na requisição), exibe uma mensagem de erro
+    })
+    .catch(function () {
+        // Falha na requisição (erro de rede ou status diferente de 200): exibe uma mensagem de erro
         document.querySelector(".map-container").style.backgroundColor = "#272727";
         document.getElementById("inline-meteorologia-view").style.height = "880px";
         infoDiv.innerHTML = `<p class="met-error-message">Não foram encontrados registros meteorológicos para esse período.</p>`;
-      }
-    }
-  };
-  var params = "input_date=" + encodeURIComponent(dateVal) +
-               "&input_hour=" + encodeURIComponent(hourVal);
-  xhr.send(params);
+    });
 }
 
 /**
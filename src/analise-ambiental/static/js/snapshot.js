@@ -0,0 +1,109 @@
+/**
+ * ===========================================
+ * Arquivo: snapshot.js
+ * -------------------------------------------
+ * Classificação de todas as estações e meteorologia de um horário em uma única
+ * requisição (GET /api/snapshot?date=&hour=):
+ *  - window.obterSnapshot(data, hora): promessa do snapshot, guardada por horário;
+ *    trocar de estação ou alternar entre qualidade do ar e meteorologia no mesmo
+ *    horário não faz nova requisição.
+ *  - window.atualizarQualidadeAr(data, hora, estacao): reescreve os painéis de MP2.5,
+ *    MP10 e PTS (mesmo HTML do index.html) e atualiza a esfera, sem recarregar a página.
+ * ===========================================
+ */
+
+(function () {
+  const MAX_HORARIOS = 48;   // snapshots guardados (os mais antigos saem primeiro)
+  const cache = new Map();   // "data hora" -> Promise do snapshot
+
+  /**
+   * @description Snapshot do horário, buscado no máximo uma vez por (data, hora).
+   * @param {string} data - Data no formato yyyy-mm-dd.
+   * @param {string} hora - Hora no formato HH.
+   * @returns {Promise<Object>} {timestamp, estacoes, meteorologia}.
+   */
+  window.obterSnapshot = function (data, hora) {
+    const chave = `${data} ${hora}`;
+    if (!cache.has(chave)) {
+      const url = `/api/snapshot?date=${encodeURIComponent(data)}&hour=${encodeURIComponent(hora)}`;
+      const promessa = fetch(url).then(r => {
+        if (!r.ok) throw new Error(r.status);
+        return r.json();
+      });
+      promessa.catch(() => cache.delete(chave));  // falhas não ficam guardadas
+      cache.set(chave, promessa);
+      if (cache.size > MAX_HORARIOS) cache.delete(cache.keys().next().value);
+    }
+    return cache.get(chave);
+  };
+
+  /** @description Número com duas casas e vírgula decimal (como o filtro do template). */
+  function numero(valor) {
+    return Number(valor).toFixed(2).replace(".", ",");
+  }
+
+  // Poluentes com IQAr: id dos painéis, id do botão "i" e rótulo com subscrito
+  const POLUENTES_IQAR = [
+    { poluente: "MP2.5", painel: "mp2_5", botao: "mp25", rotulo: "MP<sub>2,5</sub>" },
+    { poluente: "MP10",  painel: "mp10",  botao: "mp10", rotulo: "MP<sub>10</sub>" },
+  ];
+
+  /**
+   * @description Reescreve o resumo e os detalhes de cada poluente a partir do
+   * resultado de uma estação (mesmo formato de classify_air).
+   * @param {Object} resultado - Resultado da estação no snapshot.
+   */
+  function preencherPaineis(resultado) {
+    const valido = p => resultado && !resultado.error && resultado[p] && !resultado[p].error
+      ? resultado[p] : null;
+
+    POLUENTES_IQAR.forEach(({ poluente, painel, botao, rotulo }) => {
+      const r = valido(poluente);
+      const resumo = document.querySelector(`#basic-info-${painel} .resumo-poluente`);
+      const detalhes = document.getElementById(`details-${painel}`);
+      if (resumo) {
+        resumo.innerHTML = r
+          ? `<p>Média das últimas 24h: ${numero(r["Média Horária"])} µg/m³</p>
+             <p>
+               IQAr: ${numero(r["IQAr"])}
+               <span id="iqar-info-trigger-${botao}" class="info-button">i</span>
+             </p>
+             <p>Classificação: ${r["Classificação"]}</p>`
+          : `<p>IQAr: Não há registros suficientes.</p>`;
+      }
+      if (detalhes) {
+        detalhes.innerHTML = r
+          ? `<h4>Detalhes ${rotulo}</h4>
+             <p>Índice Inicial: ${numero(r["Índice Inicial"])} µg/m³</p>
+             <p>Índice Final: ${numero(r["Índice Final"])} µg/m³</p>
+             <p>Concentração Inicial: ${numero(r["Concentração Inicial"])} µg/m³</p>
+             <p>Concentração Final: ${numero(r["Concentração Final"])} µg/m³</p>`
+          : `<p>Detalhes de ${rotulo} não disponíveis.</p>`;
+      }
+    });
+
+    const pts = valido("PTS");
+    const resumoPts = document.querySelector("#basic-info-pts .resumo-poluente");
+    if (resumoPts) {
+      resumoPts.innerHTML = pts
+        ? `<p>Média das últimas 24h: ${numero(pts["Média Horária"])} µg/m³</p>`
+        : `<p>Média das últimas 24h: Não há registros suficientes.</p>`;
+    }
+  }
+
+  /**
+   * @description Atualiza a visualização de qualidade do ar para o horário e a estação.
+   * @param {string} data - Data no formato yyyy-mm-dd.
+   * @param {string} hora - Hora no formato HH.
+   * @param {string} estacao - Código da estação (ex.: EAMA11).
+   * @returns {Promise} Rejeitada se o snapshot não pôde ser obtido.
+   */
+  window.atualizarQualidadeAr = function (data, hora, estacao) {
+    return window.obterSnapshot(data, hora).then(snapshot => {
+      preencherPaineis(snapshot.estacoes[estacao]);
+      if (typeof window.atualizarPaineisParticulas === "function") {
+        window.atualizarPaineisParticulas();
+      }
+    });
+  };
+})();
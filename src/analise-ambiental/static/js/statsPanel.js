@@ -0,0 +1,94 @@
+/**
+ * ===========================================
+ * Arquivo: statsPanel.js
+ * -------------------------------------------
+ * Carregamento sob demanda do painel de estatísticas:
+ *  - A página principal não traz o gráfico nem os gradientes; eles vêm do fragmento
+ *    HTML de /estatisticas (data-painel-url em #inline-estatisticas-view).
+ *  - window.carregarEstatisticas(metrica) busca o fragmento quando a visualização é
+ *    aberta ou a métrica muda, sem recarregar a página.
+ *  - Os <script> do HTML Plotly são reexecutados em ordem (innerHTML não os executa);
+ *    o Plotly.js da CDN só é carregado na primeira vez.
+ *  - Ao terminar, dispara "estatisticas:carregadas" no document.
+ * ===========================================
+ */
+
+(function () {
+  let metricaAtual = null;   // métrica já carregada (ou em carregamento)
+
+  /**
+   * @description Reexecuta, em sequência, os <script> inseridos em 'raiz'.
+   * Scripts externos esperam o carregamento antes do próximo.
+   * @param {Element} raiz - Elemento com os scripts a executar.
+   * @returns {Promise} Resolvida quando todos os scripts rodaram.
+   */
+  function executarScripts(raiz) {
+    return Array.from(raiz.querySelectorAll("script")).reduce((anterior, antigo) =>
+      anterior.then(() => new Promise(resolve => {
+        // Plotly.js já presente: não baixa a biblioteca de novo
+        if (antigo.src && window.Plotly && /plotly/i.test(antigo.src)) {
+          antigo.remove();
+          return resolve();
+        }
+        const novo = document.createElement("script");
+        Array.from(antigo.attributes).forEach(a => novo.setAttribute(a.name, a.value));
+        novo.text = antigo.text;
+        if (novo.src) novo.onload = novo.onerror = resolve;
+        antigo.replaceWith(novo);
+        if (!novo.src) resolve();
+      })), Promise.resolve());
+  }
+
+  /**
+   * @description Busca o painel da métrica e o insere na visualização de estatísticas.
+   * @param {string} metrica - "mp10" ou "mp2.5".
+   * @returns {Promise|undefined} Promessa do carregamento (undefined se já carregado).
+   */
+  window.carregarEstatisticas = function (metrica) {
+    const view = document.getElementById("inline-estatisticas-view");
+    if (!view || metrica === metricaAtual) return;
+    metricaAtual = metrica;
+
+    const plot = document.getElementById("estatisticas-plot");
+    const imagens = document.getElementById("estatisticas-gradient-imagens");
+    const url = `${view.dataset.painelUrl}?metric=${encodeURIComponent(metrica)}`;
+
+    return fetch(url)
+      .then(r => {
+        if (!r.ok) throw new Error(r.status);
+        return r.text();
+      })
+      .then(html => {
+        if (metrica !== metricaAtual) return;  // outra métrica foi pedida no meio do caminho
+        const modelo = document.createElement("template");
+        modelo.innerHTML = html;
+
+        plot.replaceChildren(...modelo.content.querySelector('[data-parte="plot"]').childNodes);
+
+        // Gradientes não dependem da métrica: inseridos só na primeira carga
+        if (imagens && !imagens.childElementCount) {
+          imagens.replaceChildren(...modelo.content.querySelector('[data-parte="gradient"]').childNodes);
+          if (typeof window.observarGradientes === "function") window.observarGradientes(imagens);
+        }
+        return executarScripts(plot);
+      })
+      .then(() => document.dispatchEvent(new Event("estatisticas:carregadas")))
+      .catch(() => {
+        metricaAtual = null;  // permite nova tentativa
+        plot.innerHTML = '<p class="estatisticas-placeholder">(Falha ao carregar estatísticas.)</p>';
+      });
+  };
+
+  document.addEventListener("DOMContentLoaded", () => {
+    const form = document.getElementById("stats-selector");
+    const select = document.getElementById("metric");
+    if (!form || !select) return;
+
+    // Troca de métrica: busca só o painel, sem enviar o formulário
+    select.addEventListener("change", () => window.carregarEstatisticas(select.value));
+    form.addEventListener("submit", e => {
+      e.preventDefault();
+      window.carregarEstatisticas(select.value);
+    });
+  });
+})();
@@ -10,6 +10,7 @@
  * - `showMp25`: Exibe informações relacionadas às partículas MP2.5.
  * - `showMp10`: Exibe informações relacionadas às partículas MP10.
  * - `showPts`: Exibe informações sobre as partículas PTS.
+ * - `window.atualizarPaineisParticulas`: reaplica tudo após o snapshot.js reescrever os painéis.
  * 
  * O código inclui:
  * - Alternância entre a visibilidade de diferentes seções de informações.
@@ -228,6 +229,21 @@ document.addEventListener("DOMContentLoaded", function() {
   if (btnMp10) btnMp10.addEventListener("click", showMp10);
   if (btnPts)  btnPts.addEventListener("click", showPts);
 
+  /**
+   * Recalcula partículas, cores e significado depois que os painéis são reescritos
+   * (snapshot.js), mantendo selecionado o mesmo tipo de partícula.
+   *
+   * @returns {void}
+   */
+  window.atualizarPaineisParticulas = function () {
+    const selecionado = btnMp25.classList.contains("selected") ? showMp25
+                      : btnMp10.classList.contains("selected") ? showMp10 : showPts;
+    showMp25();
+    showMp10();
+    showPts();
+    selecionado();
+  };
+
   // Inicializa as cores e exibe PTS por padrão
   (function initClassificationColors() {
     showMp25();
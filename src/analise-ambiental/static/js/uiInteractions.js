@@ -46,10 +46,23 @@ document.addEventListener("DOMContentLoaded", () => {
       <button id="btn-gradient-min" class="toggle-btn">Mínimo</button>
     `;
   
-    // Imagens correspondentes para cada tipo de visualização do gráfico
-    const imgMedia = document.querySelector(".estatisticas-gradient-img.media");
-    const imgMax = document.querySelector(".estatisticas-gradient-img.max");
-    const imgMin = document.querySelector(".estatisticas-gradient-img.min");
+    // Gradientes de cada tipo (inseridos depois, com o painel carregado sob demanda)
+    let tipoGradiente = "media";
+  
+    /**
+     * @description Mostra apenas o gradiente do tipo informado.
+     * @param {string} tipo - "media", "max" ou "min".
+     */
+    function mostrarGradiente(tipo) {
+      tipoGradiente = tipo;
+      ["media", "max", "min"].forEach(t => {
+        const img = document.querySelector(`.estatisticas-gradient-img.${t}`);
+        if (img) img.style.display = t === tipo ? "block" : "none";
+      });
+    }
+  
+    // Reaplica a seleção quando os gradientes chegam do servidor
+    document.addEventListener("estatisticas:carregadas", () => mostrarGradiente(tipoGradiente));
   
     // Botões de interação para as visualizações
     const btnMedia = document.getElementById("btn-gradient-media");
@@ -108,9 +121,7 @@ document.addEventListener("DOMContentLoaded", () => {
       btnMedia.classList.add("active");
       btnMax.classList.remove("active");
       btnMin.classList.remove("active");
-      imgMedia.style.display = "block";
-      imgMax.style.display = "none";
-      imgMin.style.display = "none";
+      mostrarGradiente("media");
     });
   
     /**
@@ -122,9 +133,7 @@ document.addEventListener("DOMContentLoaded", () => {
       btnMax.classList.add("active");
       btnMedia.classList.remove("active");
       btnMin.classList.remove("active");
-      imgMax.style.display = "block";
-      imgMedia.style.display = "none";
-      imgMin.style.display = "none";
+      mostrarGradiente("max");
     });
   
     /**
@@ -136,9 +145,7 @@ document.addEventListener("DOMContentLoaded", () => {
       btnMin.classList.add("active");
       btnMedia.classList.remove("active");
       btnMax.classList.remove("active");
-      imgMin.style.display = "block";
-      imgMedia.style.display = "none";
-      imgMax.style.display = "none";
+      mostrarGradiente("min");
     });
   });
   
@@ -236,6 +243,12 @@ document.addEventListener("DOMContentLoaded", () => {
       if (sphereView) sphereView.classList.add("hidden");
       if (meteoView) meteoView.classList.add("hidden");
       if (statsView) statsView.classList.remove("hidden");
+  
+      // Painel de estatísticas só é buscado quando a visualização é aberta
+      const metricSelect = $("metric");
+      if (typeof window.carregarEstatisticas === "function") {
+        window.carregarEstatisticas(metricSelect ? metricSelect.value : "mp10");
+      }
     }
   
     /**
@@ -263,7 +276,7 @@ document.addEventListener("DOMContentLoaded", () => {
       e.preventDefault();
       openEstatisticasView();
   
-      // Força o selector para MP10 e dispara o change -> submit
+      // Força o selector para MP10 e dispara o change -> carrega o painel da métrica
       const metricSelect = document.getElementById("metric");
       if (metricSelect) {
         metricSelect.value = "mp10";
@@ -0,0 +1,201 @@
+"""
+============================================
+Arquivo: artefatos.py
+--------------------------------------------
+Artefatos derivados servidos pelo app e a versão publicada de cada um:
+- GRUPOS: cada grupo de artefatos e os arquivos de origem que o versionam (gradientes e
+  Plotly vêm do cubo de estatísticas pré-agregadas, cubo_estatisticas.npz; a grade horária,
+  do database.csv e do database_met.npz).
+- versoes_em_disco: versões calculadas a partir dos arquivos atuais (os.stat).
+- versoes_publicadas: versões gravadas em publicado.json pelo serviço de reconstrução;
+  o arquivo só é relido quando muda, então a checagem por requisição é um os.stat.
+- versao_atual: versão publicada do grupo ou, sem publicação, a versão em disco.
+- publicar: grava publicado.json de forma atômica (arquivo temporário + os.replace).
+- gradiente_imagens / plotly_html: renderizações via single-flight para uma versão.
+  As variantes (formato × largura) de um tipo de gradiente saem de uma única figura.
+- gradiente_imagem: bytes de uma variante, servida por URL versionada pelo app.
+- gradiente_matrizes: matrizes mês × ano de um tipo de gradiente (JSON para o canvas).
+- Só se renderiza uma versão a partir dos arquivos em disco que ainda têm essa versão:
+  entre a reescrita do cubo e a publicação (ou com a publicação adiada), uma versão
+  publicada fora do cache levanta VersaoIndisponivel em vez de guardar o conteúdo novo
+  sob a URL antiga (servida com cache imutável).
+- grade_atual: grade horária (utils/grade.py) da versão publicada.
+- aquecer: renderiza antecipadamente as matrizes, o HTML Plotly e o segmento de memória
+  compartilhada da grade horária de um conjunto de versões.
+- limpar_cache: apaga do cache em disco e da memória compartilhada as versões que não são
+  mais as publicadas.
+============================================
+"""
+
+import os
+import json
+import tempfile
+import threading
+from datetime import datetime
+
+from config import (
+    CACHE_DIR, CUBO_ESTATISTICAS_PATH, DATABASE_PATH, METEOROLOGY_NPZ_PATH,
+    GRADIENTE_FORMATOS, GRADIENTE_LARGURAS, GRADIENTE_DPI, GRADIENTE_WEBP_QUALIDADE
+)
+from utils.single_flight import SingleFlight, versao_dataset
+from utils.grade import obter_grade
+from utils import memoria_compartilhada
+from utils.visualization_plotly import generate_plotly_html
+from utils.visualization_gradient import render_gradient_images, gradient_matrices
+
+# Grupos de artefatos e os arquivos de origem que definem sua versão
+GRUPOS = {
+    "gradientes": (CUBO_ESTATISTICAS_PATH,),
+    "plotly":     (CUBO_ESTATISTICAS_PATH,),
+    "grade":      (DATABASE_PATH, METEOROLOGY_NPZ_PATH),
+}
+
+# Tipos de gradiente servidos como imagem (média, máximo e mínimo)
+TIPOS_GRADIENTE = ("media", "max", "min")
+
+# Métricas disponíveis no gráfico Plotly
+METRICAS_PLOTLY = ("mp10", "mp2.5")
+
+# Ponteiro da versão publicada (lido por todos os workers)
+PUBLICADO_PATH = os.path.join(CACHE_DIR, "publicado.json")
+
+# Instância única de single-flight por processo; a versão publicada nunca é apagada do
+# disco ao aquecer a próxima (workers sem cópia em memória ainda a leem de lá)
+single_flight = SingleFlight(CACHE_DIR, protegidas=lambda: versoes_publicadas().values())
+
+_lock = threading.Lock()
+_publicado = {"mtime": None, "dados": {}}
+
+
+def versoes_em_disco():
+    """Versão de cada grupo calculada a partir dos arquivos atualmente em disco."""
+    return {grupo: versao_dataset(*paths) for grupo, paths in GRUPOS.items()}
+
+
+def versoes_publicadas():
+    """
+    Versões do último publicado.json (dicionário vazio se nada foi publicado).
+    O JSON só é relido quando o mtime do arquivo muda.
+    """
+    try:
+        mtime = os.stat(PUBLICADO_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    with _lock:
+        if mtime != _publicado["mtime"]:
+            try:
+                with open(PUBLICADO_PATH, "r", encoding="utf-8") as f:
+                    _publicado["dados"] = json.load(f).get("versoes", {})
+                _publicado["mtime"] = mtime
+            except (OSError, ValueError):
+                return _publicado["dados"]
+        return _publicado["dados"]
+
+
+class VersaoIndisponivel(Exception):
+    """A versão pedida de um grupo não está no cache e os arquivos em disco já são outros."""
+
+
+def _na_versao(grupo, versao, func):
+    """
+    Envolve func() para renderizar só se os arquivos de origem do grupo estão na versão
+    pedida, antes e depois da renderização (o cubo pode ser trocado no meio dela).
+    """
+    def renderizar():
+        if versao_dataset(*GRUPOS[grupo]) != versao:
+            raise VersaoIndisponivel(f"{grupo} {versao}")
+        valor = func()
+        if versao_dataset(*GRUPOS[grupo]) != versao:
+            raise VersaoIndisponivel(f"{grupo} {versao}")
+        return valor
+    return renderizar
+
+
+def versao_atual(grupo):
+    """Versão publicada do grupo; sem serviço de reconstrução, usa a versão dos arquivos em disco."""
+    versao = versoes_publicadas().get(grupo)
+    return versao if versao else versao_dataset(*GRUPOS[grupo])
+
+
+def publicar(versoes):
+    """Publica um novo conjunto de versões trocando publicado.json de uma só vez."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conteudo = {
+        "versao":     "-".join(versoes[g] for g in sorted(versoes)),
+        "publicado_em": datetime.now().isoformat(timespec="seconds"),
+        "versoes":    versoes,
+    }
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f, indent=2)
+    os.replace(tmp, PUBLICADO_PATH)
+    return conteudo
+
+
+def gradiente_imagens(tipo, versao=None):
+    """Todas as variantes (formato, largura) → bytes de um tipo de gradiente da versão informada."""
+    versao = versao or versao_atual("gradientes")
+    return single_flight.executar(
+        f"gradiente_imagens_{tipo}", versao,
+        _na_versao("gradientes", versao, lambda: render_gradient_images(
+            tipo, CUBO_ESTATISTICAS_PATH,
+            formatos=GRADIENTE_FORMATOS, larguras=GRADIENTE_LARGURAS,
+            dpi=GRADIENTE_DPI, qualidade=GRADIENTE_WEBP_QUALIDADE
+        )),
+    )
+
+
+def gradiente_imagem(tipo, formato, largura, versao=None):
+    """Bytes de uma variante de gradiente, ou None se tipo/formato/largura não forem servidos."""
+    if tipo not in TIPOS_GRADIENTE:
+        return None
+    return gradiente_imagens(tipo, versao).get((formato, largura))
+
+
+def gradiente_matrizes(tipo, versao=None):
+    """Matrizes (e cores) de um tipo de gradiente da versão informada, para desenho no cliente."""
+    versao = versao or versao_atual("gradientes")
+    return single_flight.executar(
+        f"gradiente_matrizes_{tipo}", versao,
+        _na_versao("gradientes", versao, lambda: gradient_matrices(tipo, CUBO_ESTATISTICAS_PATH)),
+    )
+
+
+def plotly_html(metric, versao=None):
+    """HTML Plotly da métrica para a versão informada."""
+    versao = versao or versao_atual("plotly")
+    return single_flight.executar(f"plotly_{metric}", versao,
+                                  _na_versao("plotly", versao, lambda: generate_plotly_html(metric)))
+
+
+def _grade_publicada():
+    """Versões da grade que não podem sair da memória compartilhada (a publicada)."""
+    publicada = versoes_publicadas().get("grade")
+    return {publicada} if publicada else set()
+
+
+def grade_atual():
+    """Grade horária da versão publicada; sem serviço de reconstrução, a dos arquivos em disco."""
+    return obter_grade(versao=versao_atual("grade"), manter=_grade_publicada())
+
+
+def aquecer(versoes):
+    """
+    Renderiza os artefatos usados pela página nas versões informadas (usado antes de publicar).
+    As imagens de gradiente por URL não entram: ficam para a primeira requisição de cada uma.
+    A grade horária só é montada se houver memória compartilhada para entregá-la aos workers.
+    """
+    for tipo in TIPOS_GRADIENTE:
+        gradiente_matrizes(tipo, versoes["gradientes"])
+    for metric in METRICAS_PLOTLY:
+        plotly_html(metric, versoes["plotly"])
+    if memoria_compartilhada.disponivel():
+        obter_grade(versao=versoes["grade"], manter=_grade_publicada())
+
+
+def limpar_cache():
+    """Apaga do cache em disco os resultados de versões diferentes das publicadas (após publicar)."""
+    publicadas = set(versoes_publicadas().values())
+    if publicadas:
+        single_flight.remover_versoes(publicadas)
+        memoria_compartilhada.remover_versoes("grade", _grade_publicada())
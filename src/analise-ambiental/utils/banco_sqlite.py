@@ -0,0 +1,278 @@
+"""
+============================================
+Arquivo: banco_sqlite.py
+--------------------------------------------
+Backend opcional em SQLite para as medições (alternativa à leitura dos CSVs a cada consulta):
+- Tabelas (chave primária = índice clusterizado, WITHOUT ROWID):
+  * medicoes(estacao, ts, <poluente>..., <poluente>_24h...): valores horários brutos do
+    database.csv; as colunas "_24h" são as usadas nas linhas de 12:00:00.
+  * iqar(estacao, poluente, ts, row_type, media, iqar, classificacao): tabela derivada
+    do new_database.csv.
+  * meteorologia(ts, vento_velocidade, ..., pressao): dados do database_met.npz.
+- Modo WAL: leitores continuam consultando enquanto uma carga está em andamento.
+- carregar_csvs: (re)carrega as três tabelas a partir dos CSVs, cada uma em uma transação.
+- disponivel: o backend só é usado se o arquivo existir (ou seja, após a primeira carga).
+- janela_medicoes / registro_meteorologia: leitores plugáveis em classify_air e get_meteorologia.
+- consultar_*: consultas por intervalo usadas pelas rotas /api/*.
+
+Carga inicial (a partir da pasta analise-ambiental):
+    python -m utils.banco_sqlite
+============================================
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+
+from config import DATABASE_PATH, NEW_DATABASE_PATH, METEOROLOGY_NPZ_PATH, MEDICOES_DB_PATH
+from utils.classifica import ESTACOES, POLUENTES_COLUNAS, INDICES_COLUNAS, PARAMS
+from utils.met import carregar_met_numerico
+
+# Colunas da tabela de meteorologia, na ordem do database_met.csv
+COLUNAS_MET = [
+    "vento_velocidade", "vento_direcao", "precipitacao",
+    "temperatura", "umidade", "pressao"
+]
+
+# Colunas de valores da tabela de medições: normais e de 24 h (linha 12:00:00)
+COLUNAS_MEDICOES = {
+    "normal":   list(POLUENTES_COLUNAS),
+    "12:00:00": [f"{p}_24h" for p in POLUENTES_COLUNAS],
+}
+
+_local = threading.local()
+
+
+def _q(nome):
+    """Identificador SQL entre aspas (nomes como "MP2.5" têm ponto)."""
+    return '"' + nome.replace('"', '""') + '"'
+
+
+def disponivel(db_path=MEDICOES_DB_PATH):
+    """True se o banco SQLite já foi carregado e pode ser consultado."""
+    return os.path.isfile(db_path)
+
+
+def _conexao(db_path):
+    """Conexão somente leitura, uma por thread e por arquivo."""
+    conexoes = getattr(_local, "conexoes", None)
+    if conexoes is None:
+        conexoes = _local.conexoes = {}
+    con = conexoes.get(db_path)
+    if con is None:
+        con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conexoes[db_path] = con
+    return con
+
+
+# ------------------------------------------------------------------
+# Carga a partir dos CSVs
+# ------------------------------------------------------------------
+def _criar_schema(con):
+    con.execute("PRAGMA journal_mode=WAL")
+    valores = ", ".join(f"{_q(c)} REAL" for cols in COLUNAS_MEDICOES.values() for c in cols)
+    con.executescript(f"""
+        CREATE TABLE IF NOT EXISTS medicoes (
+            estacao TEXT NOT NULL,
+            ts      TEXT NOT NULL,
+            {valores},
+            PRIMARY KEY (estacao, ts)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS iqar (
+            estacao       TEXT NOT NULL,
+            poluente      TEXT NOT NULL,
+            ts            TEXT NOT NULL,
+            row_type      TEXT,
+            media         REAL,
+            iqar          REAL,
+            classificacao TEXT,
+            PRIMARY KEY (estacao, poluente, ts)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS meteorologia (
+            ts TEXT PRIMARY KEY,
+            {", ".join(f"{c} REAL" for c in COLUNAS_MET)}
+        ) WITHOUT ROWID;
+    """)
+
+
+def para_sql(array):
+    """Converte um array numérico em listas Python com None no lugar de NaN."""
+    objeto = array.astype(object)
+    objeto[pd.isna(array)] = None
+    return objeto
+
+
+def _linhas_medicoes(database_path):
+    df = pd.read_csv(database_path, header=None, encoding="utf-8-sig", low_memory=False)
+    ts = pd.to_datetime(df[0], format="%Y-%m-%d %H:%M:%S").dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+    value_cols = np.unique(np.concatenate([c.ravel() for c in INDICES_COLUNAS.values()]))
+    df[value_cols] = df[value_cols].apply(pd.to_numeric, errors="coerce")
+
+    for i, estacao in enumerate(ESTACOES):
+        cols = np.concatenate([INDICES_COLUNAS[rt][i] for rt in COLUNAS_MEDICOES])
+        valores = para_sql(df[cols].to_numpy(dtype=float))
+        for t, linha in zip(ts, valores):
+            yield (estacao, t, *linha)
+
+
+def _linhas_iqar(new_database_path):
+    df = pd.read_csv(new_database_path, encoding="utf-8-sig", low_memory=False)
+    for estacao in ESTACOES:
+        for poluente in POLUENTES_COLUNAS:
+            prefixo = f"{estacao}_{poluente}_"
+            media = pd.to_numeric(df[prefixo + "media"], errors="coerce").to_numpy()
+            if poluente in PARAMS:
+                iqar = pd.to_numeric(df[prefixo + "IQAr"], errors="coerce").to_numpy()
+                classe = df[prefixo + "class"].to_numpy()
+            else:
+                iqar = np.full(len(df), np.nan)
+                classe = np.where(np.isnan(media), "dados insuficientes", None)
+            yield from zip(
+                [estacao] * len(df), [poluente] * len(df),
+                df["timestamp"], df["row_type"],
+                para_sql(media), para_sql(iqar), classe
+            )
+
+
+def _linhas_meteorologia(met_npz_path):
+    # Lê o armazenamento numérico: a vírgula decimal já foi convertida na ingestão
+    ts, valores = carregar_met_numerico(met_npz_path)
+    ts = np.datetime_as_string(ts, unit="s")
+    valores = para_sql(np.round(valores.astype(float), 2))
+    for t, linha in zip(ts, valores):
+        yield (t.replace("T", " "), *linha)
+
+
+def _substituir_tabela(con, tabela, colunas, linhas):
+    """
+    Troca todo o conteúdo de uma tabela em uma única transação (leitores veem o antes ou o depois).
+    Timestamps repetidos nos CSVs mantêm o primeiro registro, como a leitura do CSV faz.
+    """
+    marcadores = ", ".join("?" * len(colunas))
+    with con:
+        con.execute(f"DELETE FROM {tabela}")
+        con.executemany(
+            f"INSERT OR IGNORE INTO {tabela} ({', '.join(map(_q, colunas))}) VALUES ({marcadores})",
+            linhas
+        )
+
+
+def carregar_csvs(db_path=MEDICOES_DB_PATH,
+                  database_path=DATABASE_PATH,
+                  new_database_path=NEW_DATABASE_PATH,
+                  met_path=METEOROLOGY_NPZ_PATH):
+    """
+    (Re)carrega as tabelas a partir dos CSVs.
+    Na primeira carga o banco é montado em um arquivo temporário e movido de uma vez,
+    então disponivel() nunca enxerga um banco pela metade.
+    """
+    primeira_carga = not os.path.exists(db_path)
+    destino = db_path
+    if primeira_carga:
+        fd, destino = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(db_path)), suffix=".db.tmp")
+        os.close(fd)
+
+    con = sqlite3.connect(destino)
+    try:
+        _criar_schema(con)
+        colunas_medicoes = ["estacao", "ts"] + [c for cols in COLUNAS_MEDICOES.values() for c in cols]
+        _substituir_tabela(con, "medicoes", colunas_medicoes, _linhas_medicoes(database_path))
+        _substituir_tabela(con, "iqar",
+                           ["estacao", "poluente", "ts", "row_type", "media", "iqar", "classificacao"],
+                           _linhas_iqar(new_database_path))
+        _substituir_tabela(con, "meteorologia", ["ts"] + COLUNAS_MET, _linhas_meteorologia(met_path))
+        if primeira_carga:
+            # O arquivo movido precisa estar completo, sem páginas pendentes no WAL
+            con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        con.close()
+
+    if primeira_carga:
+        os.replace(destino, db_path)
+
+
+# ------------------------------------------------------------------
+# Consultas
+# ------------------------------------------------------------------
+def janela_medicoes(db_path, station, inicio, fim, ms_str, row_type):
+    """
+    Valores (linhas × poluentes) da estação entre inicio e fim (inclusive) com os mesmos
+    minutos:segundos do horário alvo — mesma seleção que classify_air faz no CSV,
+    mas resolvida pelo índice (estacao, ts).
+    """
+    cols = ", ".join(_q(c) for c in COLUNAS_MEDICOES[row_type])
+    try:
+        linhas = _conexao(db_path).execute(
+            f"SELECT {cols} FROM medicoes "
+            "WHERE estacao = ? AND ts BETWEEN ? AND ? AND substr(ts, 15) = ? ORDER BY ts",
+            (station, inicio.strftime("%Y-%m-%d %H:%M:%S"), fim.strftime("%Y-%m-%d %H:%M:%S"), ms_str)
+        ).fetchall()
+    except sqlite3.Error as e:
+        raise ValueError(f"Erro ao consultar o banco SQLite: {e}")
+    return np.array(linhas, dtype=float).reshape(len(linhas), len(POLUENTES_COLUNAS))
+
+
+def registro_meteorologia(db_path, target_datetime):
+    """
+    Registro meteorológico exato [datetime, *valores] ou None.
+    Valores ausentes voltam como "n", o mesmo marcador do CSV que o front-end verifica.
+    """
+    try:
+        linha = _conexao(db_path).execute(
+            f"SELECT ts, {', '.join(COLUNAS_MET)} FROM meteorologia WHERE ts = ?",
+            (target_datetime.strftime("%Y-%m-%d %H:%M:%S"),)
+        ).fetchone()
+    except sqlite3.Error as e:
+        raise ValueError(f"Erro ao consultar o banco SQLite: {e}")
+    if linha is None:
+        return None
+    return [pd.Timestamp(linha[0]).to_pydatetime(), *("n" if v is None else v for v in linha[1:])]
+
+
+def _consultar(db_path, sql, params):
+    """Linhas da consulta como dicionários. Lança ValueError se o banco falhar (travado, incompleto)."""
+    try:
+        cur = _conexao(db_path).execute(sql, params)
+        nomes = [d[0] for d in cur.description]
+        return [dict(zip(nomes, linha)) for linha in cur.fetchall()]
+    except sqlite3.Error as e:
+        raise ValueError(f"Erro ao consultar o banco SQLite: {e}")
+
+
+def consultar_medicoes(estacao, inicio, fim, db_path=MEDICOES_DB_PATH):
+    """Medições horárias brutas da estação no intervalo [inicio, fim]."""
+    cols = ", ".join(_q(c) for cols in COLUNAS_MEDICOES.values() for c in cols)
+    return _consultar(
+        db_path,
+        f"SELECT ts AS timestamp, {cols} FROM medicoes WHERE estacao = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+        (estacao, inicio, fim)
+    )
+
+
+def consultar_iqar(estacao, poluente, inicio, fim, db_path=MEDICOES_DB_PATH):
+    """Série de IQAr (média de 24 h, índice e classificação) da estação/poluente no intervalo."""
+    return _consultar(
+        db_path,
+        "SELECT ts AS timestamp, row_type, media, iqar, classificacao FROM iqar "
+        "WHERE estacao = ? AND poluente = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+        (estacao, poluente, inicio, fim)
+    )
+
+
+def consultar_meteorologia(inicio, fim, db_path=MEDICOES_DB_PATH):
+    """Registros meteorológicos no intervalo [inicio, fim]."""
+    return _consultar(
+        db_path,
+        f"SELECT ts AS timestamp, {', '.join(COLUNAS_MET)} FROM meteorologia WHERE ts BETWEEN ? AND ? ORDER BY ts",
+        (inicio, fim)
+    )
+
+
+if __name__ == "__main__":
+    carregar_csvs()
+    print(f"Banco SQLite carregado em: {MEDICOES_DB_PATH}")
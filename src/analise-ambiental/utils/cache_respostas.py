@@ -0,0 +1,132 @@
+"""
+============================================
+Arquivo: cache_respostas.py
+--------------------------------------------
+Cache, por processo, de respostas já renderizadas e comprimidas:
+- Chave: (endpoint, caminho, parâmetros da query, versão dos dados, codificação).
+  A versão vem de uma função por rota (ex.: versao_dataset dos arquivos de origem),
+  então respostas de dados antigos nunca são reaproveitadas.
+- Num acerto, a rota não é executada: nem template, nem consulta, nem compressão.
+- Sem acerto, a resposta é gerada normalmente e comprimida aqui mesmo, com o compress()
+  e a configuração do Flask-Compress da aplicação (mesmos algoritmos e níveis); como
+  ela sai com Content-Encoding, o after_request do Flask-Compress não a recomprime.
+- A codificação segue o Accept-Encoding (qualidades, preferência do servidor nos empates).
+- Limite em bytes com descarte LRU; só respostas 200 de GET são guardadas.
+============================================
+"""
+
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response, current_app
+
+# Cabeçalhos recalculados a cada resposta (não fazem parte do que é guardado)
+_CABECALHOS_IGNORADOS = {"content-length", "content-encoding", "vary"}
+
+
+class CacheRespostas:
+    """
+    Respostas codificadas em memória, com limite total em bytes (descarte LRU).
+
+    Parâmetros:
+    - compress: instância Flask-Compress da aplicação (algoritmos, tipos e níveis).
+    - max_bytes: soma máxima dos corpos guardados.
+    """
+
+    def __init__(self, compress, max_bytes):
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+            return item
+
+    def _guardar(self, chave, item):
+        tamanho = len(item[0])
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self._bytes -= len(antigo[0])
+            self._itens[chave] = item
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                _, descartado = self._itens.popitem(last=False)
+                self._bytes -= len(descartado[0])
+
+    def _codificacao(self):
+        """Algoritmo do Flask-Compress com maior qualidade no Accept-Encoding (None = sem compressão)."""
+        aceitos = request.accept_encodings
+        melhor, qualidade = None, 0
+        for algoritmo in self.compress.enabled_algorithms:
+            q = aceitos[algoritmo]
+            if q > qualidade:
+                melhor, qualidade = algoritmo, q
+        if melhor is not None and aceitos["identity"] > qualidade:
+            return None
+        return melhor
+
+    def _codificar(self, resposta, codificacao):
+        """Corpo final da resposta: comprimido quando o tipo e o tamanho justificam."""
+        corpo = resposta.get_data()
+        app = current_app._get_current_object()
+        if (
+            codificacao is None
+            or resposta.mimetype not in self.compress.compress_mimetypes_set
+            or len(corpo) < app.config["COMPRESS_MIN_SIZE"]
+        ):
+            return corpo, None
+        return self.compress.compress(app, resposta, codificacao), codificacao
+
+    @staticmethod
+    def _montar(item):
+        corpo, status, cabecalhos, codificacao = item
+        resposta = current_app.response_class(corpo, status=status, headers=cabecalhos)
+        if codificacao:
+            resposta.headers["Content-Encoding"] = codificacao
+        resposta.headers["Vary"] = "Accept-Encoding"
+        return resposta
+
+    def rota(self, versao):
+        """
+        Decorador de rota: 'versao' é uma função sem argumentos que devolve a versão
+        dos dados da rota (string); muda a versão, muda a chave.
+        """
+        def decorador(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != "GET":
+                    return view(*args, **kwargs)
+
+                codificacao = self._codificacao()
+                chave = (
+                    request.endpoint,
+                    request.path,
+                    tuple(sorted(request.args.items(multi=True))),
+                    versao(),
+                    codificacao,
+                )
+                item = self._obter(chave)
+                if item is not None:
+                    return self._montar(item)
+
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200 or resposta.is_streamed or resposta.direct_passthrough:
+                    return resposta
+
+                corpo, usada = self._codificar(resposta, codificacao)
+                cabecalhos = [(k, v) for k, v in resposta.headers.items()
+                              if k.lower() not in _CABECALHOS_IGNORADOS]
+                item = (corpo, resposta.status_code, cabecalhos, usada)
+                self._guardar(chave, item)
+                return self._montar(item)
+            return wrapper
+        return decorador
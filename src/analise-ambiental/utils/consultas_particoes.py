@@ -0,0 +1,111 @@
+"""
+============================================
+Arquivo: consultas_particoes.py
+--------------------------------------------
+Consultas por intervalo sobre as partições ano/mês dos CSVs (utils/particoes.py), usadas
+quando o backend SQLite não foi carregado:
+- Cada consulta abre apenas as partições dos meses que cruzam [inicio, fim], então tempo
+  e memória dependem do intervalo pedido, não do tamanho do acervo.
+- consultar_medicoes / consultar_iqar / consultar_meteorologia: mesmas linhas e campos
+  das consultas de utils/banco_sqlite.py (None nos valores ausentes), para que as rotas
+  /api/* respondam igual com qualquer um dos dois backends.
+- registro_meteorologia: leitor plugável em get_meteorologia (registro exato de um horário,
+  lendo só a partição do mês).
+============================================
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import DATABASE_PARTICOES_DIR, NEW_DATABASE_PARTICOES_DIR, METEOROLOGY_PARTICOES_DIR
+from utils.classifica import ESTACOES, INDICES_COLUNAS, PARAMS
+from utils.particoes import listar_particoes, ler_particoes
+from utils.banco_sqlite import COLUNAS_MET, COLUNAS_MEDICOES, para_sql
+
+_FORMATO_TS = "%Y-%m-%d %H:%M:%S"
+
+
+def disponivel(pastas=(DATABASE_PARTICOES_DIR, NEW_DATABASE_PARTICOES_DIR, METEOROLOGY_PARTICOES_DIR)):
+    """True se o pipeline já gerou as partições de todos os CSVs."""
+    return all(listar_particoes(pasta) for pasta in pastas)
+
+
+def _recortar(df, coluna_ts, inicio, fim):
+    """Linhas com timestamp em [inicio, fim], ordenadas e sem repetições (vale o primeiro registro)."""
+    if df.empty:
+        return df
+    ts = df[coluna_ts].astype(str)
+    df = df[(ts >= inicio) & (ts <= fim)]
+    return df.drop_duplicates(subset=coluna_ts).sort_values(by=coluna_ts, kind="stable")
+
+
+def _registros(ts, colunas, valores):
+    return [dict(zip(["timestamp", *colunas], (t, *linha))) for t, linha in zip(ts, valores)]
+
+
+def consultar_medicoes(estacao, inicio, fim, pasta=DATABASE_PARTICOES_DIR):
+    """Medições horárias brutas da estação no intervalo [inicio, fim]."""
+    df = _recortar(ler_particoes(pasta, inicio, fim, low_memory=False), 0, inicio, fim)
+    if df.empty:
+        return []
+    i = ESTACOES.index(estacao)
+    cols = np.concatenate([INDICES_COLUNAS[rt][i] for rt in COLUNAS_MEDICOES])
+    valores = df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    return _registros(df[0], [c for cols in COLUNAS_MEDICOES.values() for c in cols], para_sql(valores))
+
+
+def consultar_iqar(estacao, poluente, inicio, fim, pasta=NEW_DATABASE_PARTICOES_DIR):
+    """Série de IQAr (média de 24 h, índice e classificação) da estação/poluente no intervalo."""
+    prefixo = f"{estacao}_{poluente}_"
+    usar = ["timestamp", "row_type", prefixo + "media"]
+    if poluente in PARAMS:
+        usar += [prefixo + "IQAr", prefixo + "class"]
+    df = _recortar(ler_particoes(pasta, inicio, fim, header=0, usecols=usar), "timestamp", inicio, fim)
+    if df.empty:
+        return []
+
+    media = pd.to_numeric(df[prefixo + "media"], errors="coerce").to_numpy()
+    if poluente in PARAMS:
+        iqar = pd.to_numeric(df[prefixo + "IQAr"], errors="coerce").to_numpy()
+        classe = df[prefixo + "class"].to_numpy()
+    else:
+        iqar = np.full(len(df), np.nan)
+        classe = np.where(np.isnan(media), "dados insuficientes", None)
+    return _registros(
+        df["timestamp"], ["row_type", "media", "iqar", "classificacao"],
+        zip(df["row_type"], para_sql(media), para_sql(iqar), classe)
+    )
+
+
+def _ler_meteorologia(pasta, inicio, fim):
+    """Registros meteorológicos em [inicio, fim] como (timestamps, valores float)."""
+    df = ler_particoes(pasta, inicio, fim, dtype=str)
+    df = _recortar(df, 0, inicio, fim)
+    if df.empty:
+        return [], np.empty((0, len(COLUNAS_MET)))
+    # Vírgula decimal nos CSVs de origem; "n" e vazios viram NaN
+    valores = df[list(range(1, len(COLUNAS_MET) + 1))].apply(
+        lambda c: pd.to_numeric(c.str.replace(",", ".", regex=False), errors="coerce")
+    ).to_numpy(dtype=float)
+    return df[0].tolist(), np.round(valores, 2)
+
+
+def consultar_meteorologia(inicio, fim, pasta=METEOROLOGY_PARTICOES_DIR):
+    """Registros meteorológicos no intervalo [inicio, fim]."""
+    ts, valores = _ler_meteorologia(pasta, inicio, fim)
+    return _registros(ts, COLUNAS_MET, para_sql(valores))
+
+
+def registro_meteorologia(pasta, target_datetime):
+    """
+    Registro meteorológico exato [datetime, *valores] ou None.
+    Valores ausentes voltam como "n", o mesmo marcador do CSV que o front-end verifica.
+    """
+    alvo = target_datetime.strftime(_FORMATO_TS)
+    try:
+        ts, valores = _ler_meteorologia(pasta, alvo, alvo)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Erro ao ler as partições de meteorologia: {e}")
+    if not ts:
+        return None
+    return [target_datetime, *("n" if np.isnan(v) else float(v) for v in valores[0])]
@@ -0,0 +1,142 @@
+"""
+============================================
+Arquivo: cubo.py
+--------------------------------------------
+Consultas ao cubo de estatísticas pré-agregadas (cubo_estatisticas.npz, gerado por
+tratamento-dos-dados/cubo_estatisticas.py):
+- Eixos: serie (estações + "media_estacoes", "max_estacoes", "min_estacoes"),
+  poluente, ano, mes (1–12) e hora (0–23).
+- Cada célula guarda soma, contagem, mínimo, máximo e soma dos quadrados.
+- CuboEstatisticas.agregar: roll-up para qualquer subconjunto de eixos, com filtros
+  por rótulo em cada eixo; o custo é proporcional ao número de células, sem
+  reler os dados horários.
+- CuboEstatisticas.tabela: o mesmo resultado em formato longo (DataFrame).
+- obter_cubo: instância por processo, recarregada quando o .npz muda; os arrays ficam
+  em memória compartilhada entre os workers (utils/memoria_compartilhada.py).
+============================================
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+
+from config import CUBO_ESTATISTICAS_PATH
+from utils.single_flight import versao_dataset
+from utils.memoria_compartilhada import arrays_compartilhados
+
+# Ordem dos eixos nos arrays do cubo
+EIXOS = ("serie", "poluente", "ano", "mes", "hora")
+
+ESTATISTICAS = ("contagem", "soma", "media", "minimo", "maximo", "desvio")
+
+
+class CuboEstatisticas:
+    """Arrays (série × poluente × ano × mês × hora) e os rótulos de cada eixo."""
+
+    def __init__(self, dados):
+        self.rotulos = {
+            "serie":    [str(s) for s in dados["series"]],
+            "poluente": [str(p) for p in dados["poluentes"]],
+            "ano":      [int(a) for a in dados["anos"]],
+            "mes":      list(range(1, dados["soma"].shape[3] + 1)),
+            "hora":     list(range(dados["soma"].shape[4])),
+        }
+        self.soma = dados["soma"]
+        self.contagem = dados["contagem"]
+        self.minimo = dados["minimo"]
+        self.maximo = dados["maximo"]
+        self.soma_quadrados = dados["soma_quadrados"]
+
+    @staticmethod
+    def ler_arrays(path=CUBO_ESTATISTICAS_PATH):
+        with np.load(path) as npz:
+            return {k: npz[k] for k in npz.files}
+
+    @classmethod
+    def carregar(cls, path=CUBO_ESTATISTICAS_PATH):
+        return cls(cls.ler_arrays(path))
+
+    def _indices(self, eixo, selecao):
+        """Posições dos rótulos selecionados em um eixo (None = todos)."""
+        if selecao is None:
+            return None
+        if np.isscalar(selecao):
+            selecao = [selecao]
+        posicao = {r: i for i, r in enumerate(self.rotulos[eixo])}
+        try:
+            return np.array([posicao[r] for r in selecao], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"Valor inválido para o eixo '{eixo}': {e.args[0]}")
+
+    def agregar(self, manter=(), **filtros):
+        """
+        Agrega o cubo mantendo os eixos de 'manter' (na ordem de EIXOS) e somando os demais.
+        'filtros' restringe cada eixo a uma lista de rótulos, ex.: poluente=["MP10"], mes=[6, 7, 8].
+        Retorna um dicionário com os rótulos dos eixos mantidos e os arrays das estatísticas
+        (media/minimo/maximo/desvio são NaN nas células sem dados).
+        """
+        desconhecidos = (set(manter) | set(filtros)) - set(EIXOS)
+        if desconhecidos:
+            raise ValueError(f"Eixos desconhecidos: {sorted(desconhecidos)}")
+
+        arrays = [self.soma, self.contagem, self.minimo, self.maximo, self.soma_quadrados]
+        rotulos = {}
+        for eixo_pos, eixo in enumerate(EIXOS):
+            idx = self._indices(eixo, filtros.get(eixo))
+            if idx is not None:
+                arrays = [np.take(a, idx, axis=eixo_pos) for a in arrays]
+            rotulos[eixo] = self.rotulos[eixo] if idx is None else [self.rotulos[eixo][i] for i in idx]
+
+        somados = tuple(i for i, eixo in enumerate(EIXOS) if eixo not in manter)
+        soma, contagem, minimo, maximo, soma_quadrados = arrays
+        soma = soma.sum(axis=somados)
+        contagem = contagem.sum(axis=somados)
+        minimo = minimo.min(axis=somados, initial=np.inf)
+        maximo = maximo.max(axis=somados, initial=-np.inf)
+        soma_quadrados = soma_quadrados.sum(axis=somados)
+
+        vazio = contagem == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media = soma / contagem
+            variancia = np.maximum(soma_quadrados / contagem - media * media, 0.0)
+        minimo = np.where(vazio, np.nan, minimo)
+        maximo = np.where(vazio, np.nan, maximo)
+
+        return {
+            "eixos":    [eixo for eixo in EIXOS if eixo in manter],
+            "rotulos":  {eixo: rotulos[eixo] for eixo in EIXOS if eixo in manter},
+            "contagem": contagem,
+            "soma":     soma,
+            "media":    media,
+            "minimo":   minimo,
+            "maximo":   maximo,
+            "desvio":   np.sqrt(variancia),
+        }
+
+    def tabela(self, manter=(), **filtros):
+        """Resultado de agregar em formato longo: uma linha por célula, colunas = eixos + estatísticas."""
+        resultado = self.agregar(manter, **filtros)
+        eixos = resultado["eixos"]
+        if eixos:
+            indice = pd.MultiIndex.from_product([resultado["rotulos"][e] for e in eixos], names=eixos)
+            df = pd.DataFrame({e: np.ravel(resultado[e]) for e in ESTATISTICAS}, index=indice)
+            return df.reset_index()
+        return pd.DataFrame({e: [resultado[e].item()] for e in ESTATISTICAS})
+
+
+_lock = threading.Lock()
+_cubo = {"versao": None, "cubo": None}
+
+
+def obter_cubo(path=CUBO_ESTATISTICAS_PATH):
+    """Cubo do processo; recarregado (uma thread por vez) quando o .npz muda."""
+    versao = versao_dataset(path)
+    if _cubo["versao"] == versao:
+        return _cubo["cubo"]
+    with _lock:
+        if _cubo["versao"] != versao:
+            _cubo["cubo"] = CuboEstatisticas(
+                arrays_compartilhados("cubo", versao, lambda: CuboEstatisticas.ler_arrays(path))
+            )
+            _cubo["versao"] = versao
+    return _cubo["cubo"]
@@ -0,0 +1,84 @@
+"""
+============================================
+Arquivo: estaticos.py
+--------------------------------------------
+Estáticos com hash no nome (gerados por build_static.py):
+- manifesto: nome lógico → nome com hash, lido do manifest.json do build; o arquivo
+  só é relido quando muda, então a checagem por requisição é um os.stat.
+- url_estatico: URL de um arquivo de static/ para os templates (função "estatico");
+  usa o nome com hash quando há build e cai para /static/ caso contrário.
+- resposta_estatico: serve um arquivo do build com a variante pré-comprimida (.br ou
+  .gz) aceita pelo cliente, sem compressão por requisição, e com cache imutável.
+============================================
+"""
+
+import os
+import json
+import mimetypes
+import threading
+
+from flask import url_for, request, send_file, abort
+from werkzeug.security import safe_join
+
+from config import STATIC_BUILD_DIR
+
+MANIFESTO_PATH = os.path.join(STATIC_BUILD_DIR, "manifest.json")
+
+# Codificações pré-comprimidas, em ordem de preferência, e o sufixo de cada uma
+CODIFICACOES = (("br", ".br"), ("gzip", ".gz"))
+
+# O nome muda com o conteúdo, então cada URL pode ficar em cache indefinidamente
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+
+_lock = threading.Lock()
+_manifesto = {"mtime": None, "dados": {}}
+
+
+def manifesto():
+    """Manifesto do build atual (dicionário vazio se build_static.py ainda não rodou)."""
+    try:
+        mtime = os.stat(MANIFESTO_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    with _lock:
+        if mtime != _manifesto["mtime"]:
+            try:
+                with open(MANIFESTO_PATH, "r", encoding="utf-8") as f:
+                    _manifesto["dados"] = json.load(f)
+                _manifesto["mtime"] = mtime
+            except (OSError, ValueError):
+                return _manifesto["dados"]
+        return _manifesto["dados"]
+
+
+def url_estatico(filename):
+    """URL do arquivo 'filename' de static/: versão com hash se houver build, senão /static/."""
+    fisico = manifesto().get(filename)
+    if fisico is None:
+        return url_for("static", filename=filename)
+    return url_for("estatico_build", filename=fisico)
+
+
+def resposta_estatico(filename):
+    """
+    Resposta para um arquivo do build: a primeira variante (.br, .gz) aceita pelo cliente
+    que existir em disco, ou o arquivo original. Content-Type é o do arquivo original.
+    """
+    caminho = safe_join(STATIC_BUILD_DIR, filename)
+    if caminho is None or not os.path.isfile(caminho):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    codificacao = None
+    for nome, sufixo in CODIFICACOES:
+        if request.accept_encodings[nome] and os.path.isfile(caminho + sufixo):
+            caminho, codificacao = caminho + sufixo, nome
+            break
+
+    resposta = send_file(caminho, mimetype=mimetype, conditional=True, etag=True)
+    if codificacao:
+        # Com Content-Encoding definido, o Flask-Compress não recomprime a resposta
+        resposta.headers["Content-Encoding"] = codificacao
+    resposta.headers["Vary"] = "Accept-Encoding"
+    resposta.headers["Cache-Control"] = CACHE_IMUTAVEL
+    return resposta
@@ -0,0 +1,154 @@
+"""
+============================================
+Arquivo: exportacao.py
+--------------------------------------------
+Exportação em massa de medições e IQAr derivado, em streaming:
+- linhas_exportacao: gerador de linhas (timestamp, estação, poluente, row_type, valor
+  horário, média móvel da janela do poluente, IQAr e classificação) em ordem de
+  timestamp, a partir da grade horária do processo (utils/grade.py).
+  * A grade é percorrida em blocos de timestamps; médias móveis, IQAr e faixas são
+    calculados por bloco (IndicePrefixos.movel no trecho + searchsorted das faixas),
+    então a memória usada não depende do tamanho do intervalo.
+  * Mesmas regras do new_database.csv: a linha "12:00:00" usa as colunas de 24 h e
+    médias com menos válidos que o mínimo da janela saem como "dados insuficientes".
+- exportar: bytes prontos para envio (CSV com cabeçalho ou JSON Lines), bloco a bloco,
+  opcionalmente comprimidos em gzip durante o envio (cada bloco é descarregado com
+  Z_SYNC_FLUSH, então o cliente recebe os primeiros bytes imediatamente).
+============================================
+"""
+
+import io
+import csv
+import json
+import zlib
+import numpy as np
+
+from utils.classifica import (
+    ESTACOES, POLUENTES_COLUNAS, ORDEM_POLUENTES, PARAMS, MINIMOS_POLUENTES,
+    calcular_iqar_array, classificar_iqar_array, medias_por_poluente
+)
+
+FORMATOS = ("csv", "jsonl")
+
+CAMPOS = ("timestamp", "estacao", "poluente", "row_type", "valor", "media", "iqar", "classificacao")
+
+# Timestamps por bloco (cada bloco vira um pedaço da resposta)
+TIMESTAMPS_POR_BLOCO = 1000
+
+_MEIO_DIA = 12 * 3600
+
+
+def _valor(v):
+    """float → float Python, NaN → None."""
+    return None if np.isnan(v) else float(v)
+
+
+def _bloco(grade, a, b, estacoes, poluentes):
+    """Linhas dos timestamps de medição nas posições [a, b) dos índices da grade."""
+    indices = grade.indices
+    ts = indices["normal"].ts[a:b]
+    e_12h = ts.astype(np.int64) % 86400 == _MEIO_DIA
+    texto = np.datetime_as_string(ts, unit="s")
+    pos_grade = np.searchsorted(grade.ts, ts)
+
+    # Médias de cada poluente na sua janela, escolhendo o tipo de linha de cada timestamp
+    medias = validos = None
+    for row_type, sel in (("normal", ~e_12h), ("12:00:00", e_12h)):
+        if not sel.any():
+            continue
+        indice = indices[row_type]
+        _, m, v = medias_por_poluente(lambda horas: indice.movel(horas, a, b))
+        if medias is None:
+            medias, validos = np.empty_like(m), np.empty_like(v)
+        medias[sel], validos[sel] = m[sel], v[sel]
+
+    brutos = np.where(
+        e_12h[:, None, None],
+        grade.medicoes["12:00:00"][pos_grade],
+        grade.medicoes["normal"][pos_grade],
+    )
+
+    # IQAr e classificação por coluna (estação × poluente), vetorizados no bloco
+    derivados = {}
+    for i in estacoes:
+        for j in poluentes:
+            ok = validos[:, i, j] >= MINIMOS_POLUENTES[j]
+            media = np.where(ok, medias[:, i, j], np.nan)
+            iqar = np.full(len(ts), np.nan)
+            classe = np.full(len(ts), "dados insuficientes", dtype=object)
+            pollutant = POLUENTES_COLUNAS[j]
+            if pollutant not in PARAMS:
+                # Poluentes sem tabela de faixas (PTS): apenas valor e média
+                classe[ok] = None
+            elif ok.any():
+                iqar[ok] = calcular_iqar_array(media[ok], pollutant)[0]
+                classe[ok] = classificar_iqar_array(iqar[ok])
+            derivados[i, j] = (media, iqar, classe)
+
+    for k in range(len(ts)):
+        row_type = "12:00:00" if e_12h[k] else "normal"
+        for i in estacoes:
+            for j in poluentes:
+                media, iqar, classe = derivados[i, j]
+                yield (
+                    texto[k].replace("T", " "),
+                    ESTACOES[i],
+                    POLUENTES_COLUNAS[j],
+                    row_type,
+                    _valor(brutos[k, i, j]),
+                    _valor(media[k]),
+                    _valor(iqar[k]),
+                    classe[k],
+                )
+
+
+def blocos_exportacao(grade, inicio, fim, estacoes=None, poluentes=None):
+    """
+    Gera, bloco a bloco, listas de linhas (tuplas na ordem de CAMPOS) entre 'inicio' e 'fim'
+    (datetime64 ou strings "YYYY-MM-DD HH:MM:SS", inclusive; None = sem limite).
+    'estacoes'/'poluentes' são listas de nomes (None = todos).
+    """
+    estacoes = [ESTACOES.index(e) for e in estacoes] if estacoes else list(range(len(ESTACOES)))
+    poluentes = [POLUENTES_COLUNAS.index(p) for p in poluentes] if poluentes else list(ORDEM_POLUENTES)
+
+    ts = grade.indices["normal"].ts
+    lo = 0 if inicio is None else int(np.searchsorted(ts, np.datetime64(inicio, "s"), side="left"))
+    hi = len(ts) if fim is None else int(np.searchsorted(ts, np.datetime64(fim, "s"), side="right"))
+    for a in range(lo, hi, TIMESTAMPS_POR_BLOCO):
+        yield list(_bloco(grade, a, min(a + TIMESTAMPS_POR_BLOCO, hi), estacoes, poluentes))
+
+
+def linhas_exportacao(grade, inicio, fim, estacoes=None, poluentes=None):
+    """As mesmas linhas de blocos_exportacao, uma a uma."""
+    for bloco in blocos_exportacao(grade, inicio, fim, estacoes, poluentes):
+        yield from bloco
+
+
+def _serializar(bloco, formato):
+    """Texto de um bloco de linhas no formato pedido."""
+    if formato == "jsonl":
+        return "".join(json.dumps(dict(zip(CAMPOS, linha)), ensure_ascii=False) + "\n" for linha in bloco)
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(bloco)
+    return buf.getvalue()
+
+
+def exportar(grade, inicio, fim, estacoes=None, poluentes=None, formato="csv", gzip=False):
+    """
+    Gerador de bytes da exportação: cabeçalho (CSV) e depois um pedaço por bloco.
+    Com gzip=True, o fluxo é um único membro gzip, descarregado a cada pedaço.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None  # wbits 31 = formato gzip
+
+    def saida(texto):
+        dados = texto.encode("utf-8")
+        if compressor is None:
+            return dados
+        return compressor.compress(dados) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    yield saida(",".join(CAMPOS) + "\n" if formato == "csv" else "")
+    for bloco in blocos_exportacao(grade, inicio, fim, estacoes, poluentes):
+        if bloco:
+            yield saida(_serializar(bloco, formato))
+    if compressor is not None:
+        yield compressor.flush(zlib.Z_FINISH)
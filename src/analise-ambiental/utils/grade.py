@@ -0,0 +1,173 @@
+"""
+============================================
+Arquivo: grade.py
+--------------------------------------------
+Grade horária compartilhada entre qualidade do ar e meteorologia:
+- GradeHoraria: um único índice de tempo ordenado (união dos timestamps do database.csv
+  e do database_met.npz) com os arrays alinhados a ele:
+  * medicoes[row_type]: float (T × estações × poluentes), NaN nos ausentes;
+  * tem_medicao: bool (T,), se o timestamp existe no database.csv;
+  * met: float32 (T × 6) e tem_met: bool (T,), se há registro meteorológico.
+- indices: IndicePrefixos por row_type (somas/contagens acumuladas das medições); a média
+  de todas as estações (na janela de cada poluente) sai de duas subtrações.
+- snapshot: classificação de todas as estações + meteorologia de um horário, numa só passada.
+- obter_grade: instância por processo, recarregada quando algum arquivo de origem muda;
+  os arrays (incluindo os índices) ficam em memória compartilhada entre os workers
+  (utils/memoria_compartilhada.py): um processo lê o CSV, os demais só anexam. Com o
+  serviço de reconstrução, o app pede a versão publicada (artefatos.grade_atual), cujo
+  segmento o serviço criou antes de publicar: nenhuma requisição relê o CSV.
+============================================
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+
+from config import DATABASE_PATH, METEOROLOGY_NPZ_PATH
+from utils.classifica import (
+    ESTACOES, INDICES_COLUNAS, IndicePrefixos, medias_por_poluente, resultado_medias
+)
+from utils.met import carregar_met_numerico, formatar_registro, valores_para_api
+from utils.single_flight import versao_dataset
+from utils.memoria_compartilhada import arrays_compartilhados, anexar
+
+class GradeHoraria:
+    """Índice horário único com medições e meteorologia pré-alinhadas."""
+
+    def __init__(self, ts, medicoes, tem_medicao, met, tem_met):
+        self.ts = ts                      # datetime64[s] ordenado, sem repetições
+        self.medicoes = medicoes          # row_type -> (T × S × P)
+        self.tem_medicao = tem_medicao    # (T,)
+        self.met = met                    # (T × 6)
+        self.tem_met = tem_met            # (T,)
+        # Somas acumuladas só sobre os timestamps com medição (contam como linhas da janela)
+        self.indices = {
+            row_type: IndicePrefixos(ts[tem_medicao], valores[tem_medicao])
+            for row_type, valores in medicoes.items()
+        }
+
+    @classmethod
+    def carregar(cls, database_path=DATABASE_PATH, met_npz_path=METEOROLOGY_NPZ_PATH):
+        df = pd.read_csv(database_path, header=None, encoding="utf-8-sig", low_memory=False)
+        ts_qar = pd.to_datetime(df[0], format="%Y-%m-%d %H:%M:%S").to_numpy("datetime64[s]")
+        value_cols = np.unique(np.concatenate([c.ravel() for c in INDICES_COLUNAS.values()]))
+        df[value_cols] = df[value_cols].apply(pd.to_numeric, errors="coerce")
+
+        try:
+            ts_met, valores_met = carregar_met_numerico(met_npz_path)
+        except ValueError:
+            ts_met, valores_met = np.array([], dtype="datetime64[s]"), np.empty((0, 6), np.float32)
+
+        # Índice único; timestamps repetidos no CSV mantêm o primeiro registro
+        ts_qar, primeiro = np.unique(ts_qar, return_index=True)
+        ts = np.union1d(ts_qar, ts_met)
+        pos_qar = np.searchsorted(ts, ts_qar)
+        pos_met = np.searchsorted(ts, ts_met)
+
+        medicoes = {}
+        for row_type, cols in INDICES_COLUNAS.items():
+            bloco = df[cols.ravel()].to_numpy(dtype=float)[primeiro].reshape(len(ts_qar), *cols.shape)
+            alinhado = np.full((len(ts), *cols.shape), np.nan)
+            alinhado[pos_qar] = bloco
+            medicoes[row_type] = alinhado
+
+        tem_medicao = np.zeros(len(ts), dtype=bool)
+        tem_medicao[pos_qar] = True
+        met = np.full((len(ts), valores_met.shape[1]), np.nan, dtype=np.float32)
+        met[pos_met] = valores_met
+        tem_met = np.zeros(len(ts), dtype=bool)
+        tem_met[pos_met] = True
+        return cls(ts, medicoes, tem_medicao, met, tem_met)
+
+    def arrays(self):
+        """Todos os arrays da grade (e dos índices) num dicionário plano; ver de_arrays."""
+        arrays = {
+            "ts": self.ts, "tem_medicao": self.tem_medicao, "met": self.met,
+            "tem_met": self.tem_met,
+        }
+        for row_type, valores in self.medicoes.items():
+            arrays[f"medicoes/{row_type}"] = valores
+        for row_type, indice in self.indices.items():
+            arrays.update({f"indices/{row_type}/{k}": v for k, v in indice.arrays().items()})
+        return arrays
+
+    @classmethod
+    def de_arrays(cls, arrays):
+        """Grade montada sobre arrays já calculados (ex.: segmentos de memória compartilhada)."""
+        grade = cls.__new__(cls)
+        grade.ts = arrays["ts"]
+        grade.tem_medicao = arrays["tem_medicao"]
+        grade.met = arrays["met"]
+        grade.tem_met = arrays["tem_met"]
+        grade.medicoes, indices = {}, {}
+        for chave, valores in arrays.items():
+            grupo, _, resto = chave.partition("/")
+            if grupo == "medicoes":
+                grade.medicoes[resto] = valores
+            elif grupo == "indices":
+                row_type, _, campo = resto.partition("/")
+                indices.setdefault(row_type, {})[campo] = valores
+        grade.indices = {row_type: IndicePrefixos.de_arrays(a) for row_type, a in indices.items()}
+        return grade
+
+    def indice(self, alvo):
+        """Posição exata de 'alvo' na grade, ou None."""
+        alvo = np.datetime64(alvo, "s")
+        i = int(np.searchsorted(self.ts, alvo))
+        return i if i < len(self.ts) and self.ts[i] == alvo else None
+
+    def snapshot(self, alvo, row_type="normal"):
+        """
+        Classificação de todas as estações e meteorologia do horário 'alvo' (datetime).
+        Cada estação tem o mesmo formato de resposta de classify_air.
+        """
+        # Cada poluente na janela da sua tabela de faixas; arrays (S × P)
+        linhas, medias, validos = medias_por_poluente(lambda horas: self.indices[row_type].janela(alvo, horas))
+        if linhas == 0:
+            estacoes = {st: {"error": "Nenhum registro encontrado no intervalo especificado."} for st in ESTACOES}
+        else:
+            estacoes = {st: resultado_medias(medias[i], validos[i]) for i, st in enumerate(ESTACOES)}
+
+        i = self.indice(alvo)
+        if i is None or not self.tem_met[i]:
+            meteorologia = {"error": "Não foram encontrados registros meteorológicos para esse período."}
+        else:
+            meteorologia = formatar_registro([alvo, *valores_para_api(self.met[i])])
+
+        return {
+            "timestamp":    alvo.strftime("%Y-%m-%d %H:%M:%S"),
+            "estacoes":     estacoes,
+            "meteorologia": meteorologia,
+        }
+
+
+_lock = threading.Lock()
+_grade = {"versao": None, "grade": None}
+
+
+def obter_grade(database_path=DATABASE_PATH, met_npz_path=METEOROLOGY_NPZ_PATH, versao=None, manter=()):
+    """
+    Grade do processo na 'versao' pedida (padrão: a dos arquivos em disco); recarregada
+    (uma thread por vez) quando a versão muda. Os arrays vêm da memória compartilhada: só
+    um worker por versão lê os arquivos, e os segmentos das versões em 'manter' não são
+    removidos ao criar uma nova.
+    Uma versão diferente da dos arquivos (a publicada, com o pipeline já tendo reescrito o
+    database.csv) só pode vir de um segmento existente; sem ele, usa a versão em disco.
+    """
+    disco = versao_dataset(database_path, met_npz_path)
+    versao = versao or disco
+    if _grade["versao"] == versao:
+        return _grade["grade"]
+    with _lock:
+        if _grade["versao"] != versao:
+            arrays = anexar("grade", versao) if versao != disco else None
+            if arrays is None and _grade["versao"] != disco:
+                versao = disco
+                arrays = arrays_compartilhados(
+                    "grade", versao, lambda: GradeHoraria.carregar(database_path, met_npz_path).arrays(),
+                    manter=manter
+                )
+            if arrays is not None:
+                _grade["grade"] = GradeHoraria.de_arrays(arrays)
+                _grade["versao"] = versao
+    return _grade["grade"]
@@ -0,0 +1,310 @@
+"""
+============================================
+Arquivo: manifesto.py
+--------------------------------------------
+Manifesto de conteúdo dos dados brutos e derivados (manifesto.json):
+- arquivos: hash SHA-256, tamanho e mtime de cada arquivo conhecido. O hash só é
+  recalculado quando tamanho ou mtime mudam, então manter o manifesto em dia custa um
+  os.stat por arquivo.
+  * Os brutos de dados-coletados/ são varridos de uma vez com os.scandir (atualizar_brutos)
+    e recebem também a impressão do layout: hash das linhas de cabeçalho (estações,
+    poluentes, unidades) e do número de colunas dos dados. Vale para os CSV e para a
+    primeira aba das planilhas .xlsx (openpyxl) e .xls (xlrd, se instalado; sem ele, as
+    .xls ficam sem impressão).
+- linhagem: para cada etapa do pipeline, o hash de cada entrada usada e de cada saída
+  produzida na última execução bem-sucedida.
+- etapa_em_dia: uma etapa pode ser pulada quando as saídas são as registradas e as entradas
+  têm o mesmo conteúdo da última execução (tocar um arquivo sem mudá-lo não reconstrói).
+- hash_registrado: versão de um arquivo pelo conteúdo, usada por versao_dataset para
+  chavear os caches; uma reconstrução que gera o mesmo conteúdo não invalida nada.
+- Só o pipeline (utils/pipeline.py, também usado pelo serviço de reconstrução) grava o
+  manifesto, com escrita atômica; os workers apenas o leem.
+
+Atualizar e resumir o manifesto (a partir da pasta analise-ambiental):
+    python -m utils.manifesto
+============================================
+"""
+
+import os
+import csv
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, date
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # sem openpyxl: planilhas .xlsx sem impressão de layout
+    load_workbook = None
+
+try:
+    import xlrd
+except ImportError:  # sem xlrd: planilhas .xls sem impressão de layout
+    xlrd = None
+
+from config import MANIFESTO_DADOS_PATH, DADOS_COLETADOS_DIR, SRC_DIR
+
+# Bloco de leitura ao calcular hashes
+_BLOCO = 1024 * 1024
+
+# Linhas examinadas para achar o cabeçalho de uma planilha CSV (o qar.csv tem 8)
+_MAX_LINHAS_CABECALHO = 16
+
+_lock = threading.Lock()
+_lido = None  # (tamanho, mtime_ns, manifesto) do último manifesto lido neste processo
+
+
+def _chave(caminho):
+    """Caminho relativo a src/, usado como chave no manifesto."""
+    return os.path.relpath(os.path.abspath(caminho), SRC_DIR).replace(os.sep, "/")
+
+
+def vazio():
+    return {"arquivos": {}, "linhagem": {}}
+
+
+def carregar(caminho=MANIFESTO_DADOS_PATH):
+    """Manifesto em disco, ou um vazio se ainda não existe (ou está ilegível)."""
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        return vazio()
+    manifesto.setdefault("arquivos", {})
+    manifesto.setdefault("linhagem", {})
+    return manifesto
+
+
+def salvar(manifesto, caminho=MANIFESTO_DADOS_PATH):
+    """Grava o manifesto de forma atômica (leitores veem o anterior ou o novo, inteiro)."""
+    pasta = os.path.dirname(caminho)
+    fd, tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _sha256(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(_BLOCO), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _linhas_xlsx(caminho):
+    """Primeiras linhas (valores) da primeira aba de uma planilha .xlsx."""
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        aba = wb.worksheets[0]
+        return [list(linha) for linha in aba.iter_rows(max_row=_MAX_LINHAS_CABECALHO, values_only=True)]
+    finally:
+        wb.close()
+
+
+def _linhas_xls(caminho):
+    """Primeiras linhas (valores) da primeira aba de uma planilha .xls; datas como datetime."""
+    # avisos do xlrd (ex.: tamanho de setor) iriam para a stdout do pipeline
+    with open(os.devnull, "w") as nulo, xlrd.open_workbook(caminho, on_demand=True, logfile=nulo) as wb:
+        aba = wb.sheet_by_index(0)
+        linhas = []
+        for i in range(min(aba.nrows, _MAX_LINHAS_CABECALHO)):
+            linhas.append([
+                xlrd.xldate_as_datetime(c.value, wb.datemode) if c.ctype == xlrd.XL_CELL_DATE else c.value
+                for c in aba.row(i)
+            ])
+        return linhas
+
+
+# Leitores das primeiras linhas de cada formato de planilha (None: biblioteca ausente)
+_LEITORES_PLANILHA = {
+    ".xlsx": _linhas_xlsx if load_workbook else None,
+    ".xls":  _linhas_xls if xlrd else None,
+}
+
+
+def _impressao_planilha(caminho, ler_linhas):
+    """Como a dos CSV: linhas antes da primeira data (cabeçalho) e colunas da primeira linha de dados."""
+    try:
+        linhas = ler_linhas(caminho)
+    except Exception:  # planilha corrompida ou em formato inesperado: sem impressão
+        return None
+    cabecalho, colunas = [], 0
+    for linha in linhas:
+        primeira = linha[0] if linha else None
+        if isinstance(primeira, (datetime, date)) or (
+            isinstance(primeira, str) and primeira[:4].isdigit() and primeira[4:5] == "-"
+        ):
+            colunas = len(linha)
+            break
+        cabecalho.append(",".join("" if c is None else str(c) for c in linha))
+    h = hashlib.sha1("\n".join(cabecalho + [str(colunas)]).encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def impressao_layout(caminho):
+    """
+    Impressão do layout de uma planilha: as linhas antes do primeiro timestamp
+    (cabeçalho) e o número de colunas da primeira linha de dados. Para .xlsx/.xls, da
+    primeira aba. None para outros formatos (ou sem a biblioteca de leitura).
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in _LEITORES_PLANILHA:
+        ler_linhas = _LEITORES_PLANILHA[extensao]
+        return _impressao_planilha(caminho, ler_linhas) if ler_linhas else None
+    if extensao != ".csv":
+        return None
+    cabecalho, colunas = [], 0
+    try:
+        with open(caminho, encoding="utf-8-sig", errors="replace") as f:
+            for _, linha in zip(range(_MAX_LINHAS_CABECALHO), f):
+                linha = linha.rstrip("\r\n")
+                if linha[:4].isdigit() and linha[4:5] == "-":
+                    colunas = len(next(csv.reader([linha])))  # vírgulas decimais vêm entre aspas
+                    break
+                cabecalho.append(linha)
+    except OSError:
+        return None
+    h = hashlib.sha1("\n".join(cabecalho + [str(colunas)]).encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def _atualizar_entrada(manifesto, caminho, st, layout=False):
+    """Entrada do arquivo no manifesto, recalculando o hash só se tamanho/mtime mudaram."""
+    chave = _chave(caminho)
+    entrada = manifesto["arquivos"].get(chave)
+    if entrada is None or entrada["tamanho"] != st.st_size or entrada["mtime_ns"] != st.st_mtime_ns:
+        entrada = {"sha256": _sha256(caminho), "tamanho": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if layout:
+            entrada["layout"] = impressao_layout(caminho)
+        manifesto["arquivos"][chave] = entrada
+    elif layout and entrada.get("layout") is None and _LEITORES_PLANILHA.get(
+            os.path.splitext(caminho)[1].lower()):
+        # Planilha registrada antes de haver impressão para o seu formato
+        entrada["layout"] = impressao_layout(caminho)
+    return entrada
+
+
+def hash_arquivo(manifesto, caminho):
+    """Hash do conteúdo do arquivo (atualizando o manifesto em memória), ou None se não existe."""
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        manifesto["arquivos"].pop(_chave(caminho), None)
+        return None
+    return _atualizar_entrada(manifesto, caminho, st)["sha256"]
+
+
+def atualizar_brutos(manifesto, pasta=DADOS_COLETADOS_DIR):
+    """
+    Varre dados-coletados/<ano>/<mes>/ uma vez (os.scandir, com o stat já trazido pela
+    listagem) e atualiza hash, tamanho e layout de cada bruto; brutos apagados saem do
+    manifesto. Retorna as chaves dos brutos novos ou alterados.
+    """
+    prefixo = _chave(pasta) + "/"
+    vistos, mudaram = set(), []
+
+    def varrer(diretorio):
+        for item in os.scandir(diretorio):
+            if item.is_dir():
+                varrer(item.path)
+            elif item.is_file():
+                chave = _chave(item.path)
+                anterior = manifesto["arquivos"].get(chave)
+                entrada = _atualizar_entrada(manifesto, item.path, item.stat(), layout=True)
+                vistos.add(chave)
+                if anterior is None or anterior["sha256"] != entrada["sha256"]:
+                    mudaram.append(chave)
+
+    if os.path.isdir(pasta):
+        varrer(pasta)
+    for chave in [c for c in manifesto["arquivos"] if c.startswith(prefixo) and c not in vistos]:
+        del manifesto["arquivos"][chave]
+    return sorted(mudaram)
+
+
+def brutos(manifesto, nomes, pasta=DADOS_COLETADOS_DIR):
+    """Caminhos dos brutos registrados cujo nome (minúsculo) está em 'nomes', em ordem."""
+    prefixo = _chave(pasta) + "/"
+    return [
+        os.path.join(SRC_DIR, *chave.split("/"))
+        for chave in sorted(manifesto["arquivos"])
+        if chave.startswith(prefixo) and chave.rsplit("/", 1)[-1].lower() in nomes
+    ]
+
+
+def _hashes(manifesto, caminhos):
+    return {_chave(p): hash_arquivo(manifesto, p) for p in caminhos}
+
+
+def etapa_em_dia(manifesto, etapa, entradas, saidas):
+    """
+    True se as saídas são as que a etapa gerou e as entradas têm o mesmo conteúdo daquela
+    execução; False se algo mudou; None se a etapa não tem linhagem registrada.
+    """
+    registro = manifesto["linhagem"].get(etapa)
+    if registro is None:
+        return None
+    if _hashes(manifesto, saidas) != registro["saidas"]:
+        return False
+    return _hashes(manifesto, entradas) == registro["entradas"]
+
+
+def registrar_etapa(manifesto, etapa, entradas, saidas):
+    """Registra a linhagem da etapa: hash de cada entrada e de cada saída."""
+    manifesto["linhagem"][etapa] = {
+        "entradas": _hashes(manifesto, entradas),
+        "saidas": _hashes(manifesto, saidas),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _manifesto_lido(caminho):
+    """Manifesto em disco, relido só quando o arquivo muda (leitura barata por requisição)."""
+    global _lido
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    with _lock:
+        if _lido is None or _lido[:2] != (st.st_size, st.st_mtime_ns):
+            _lido = (st.st_size, st.st_mtime_ns, carregar(caminho))
+        return _lido[2]
+
+
+def hash_registrado(caminho, st, manifesto_path=MANIFESTO_DADOS_PATH):
+    """
+    Hash de conteúdo registrado para o arquivo, se o registro ainda corresponde a 'st'
+    (resultado de os.stat); None caso contrário. Não lê o arquivo de dados.
+    """
+    manifesto = _manifesto_lido(manifesto_path)
+    if manifesto is None:
+        return None
+    entrada = manifesto["arquivos"].get(_chave(caminho))
+    if entrada is None or entrada["tamanho"] != st.st_size or entrada["mtime_ns"] != st.st_mtime_ns:
+        return None
+    return entrada["sha256"]
+
+
+if __name__ == "__main__":
+    manifesto = carregar()
+    mudaram = atualizar_brutos(manifesto)
+    salvar(manifesto)
+    prefixo = _chave(DADOS_COLETADOS_DIR) + "/"
+    layouts = {}
+    for chave, entrada in manifesto["arquivos"].items():
+        if chave.startswith(prefixo) and entrada.get("layout"):
+            nome = chave.rsplit("/", 1)[-1].lower()
+            layouts.setdefault((nome, entrada["layout"]), []).append(chave)
+    print(f"Manifesto atualizado em: {MANIFESTO_DADOS_PATH} ({len(mudaram)} brutos novos ou alterados)")
+    for (nome, layout), chaves in sorted(layouts.items()):
+        print(f"  {nome} layout {layout}: {len(chaves)} arquivos")
+    for etapa, registro in sorted(manifesto["linhagem"].items()):
+        print(f"  {etapa}: {len(registro['entradas'])} entradas → {len(registro['saidas'])} saídas "
+              f"({registro['gerado_em']})")
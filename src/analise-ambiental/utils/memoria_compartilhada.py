@@ -0,0 +1,243 @@
+"""
+============================================
+Arquivo: memoria_compartilhada.py
+--------------------------------------------
+Arrays numéricos dos datasets em memória compartilhada entre os workers do gunicorn
+(multiprocessing.shared_memory), para que a memória não cresça com o número de workers:
+- arrays_compartilhados(artefato, versão, construir): o primeiro processo que pede uma
+  versão executa construir() (ex.: leitura do CSV), copia os arrays para um segmento
+  nomeado "<prefixo>_<artefato>_<versão>" e passa a usar a cópia do segmento; os demais
+  apenas anexam o segmento, somente leitura (lock de arquivo entre processos).
+- Layout do segmento: tamanho do índice (8 bytes), índice JSON (nome, dtype, forma e
+  deslocamento de cada array) e os dados alinhados em 64 bytes. O tamanho do índice é
+  gravado por último, então um segmento ainda em escrita nunca é lido pela metade.
+- Troca de versão: o nome do segmento inclui a versão dos arquivos de origem. Quem publica
+  a versão nova remove os nomes das anteriores, exceto as pedidas em 'manter' (ex.: a versão
+  ainda publicada enquanto o serviço de reconstrução aquece a próxima); processos que ainda
+  usam a antiga mantêm o mapeamento até os arrays deixarem de ser referenciados (aí o
+  segmento é fechado).
+- anexar: arrays de uma versão já publicada por outro processo, sem construí-la.
+- remover_versoes: remove os nomes dos segmentos das versões que não devem ser mantidas.
+- Os segmentos não são registrados no resource_tracker (pertencem ao conjunto de workers,
+  não a um processo), então sobrevivem à reciclagem de um worker.
+- Sem memória compartilhada (MEMORIA_COMPARTILHADA=0, sistema sem /dev/shm ou sem espaço
+  livre nele), construir() é usado diretamente, uma cópia por processo como antes.
+============================================
+"""
+
+import os
+import sys
+import json
+import threading
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+from config import CACHE_DIR, MEMORIA_COMPARTILHADA, MEMORIA_COMPARTILHADA_PREFIXO
+from utils.single_flight import trava_arquivo
+
+# Onde o Linux expõe os segmentos POSIX (usado para checar espaço livre e achar versões antigas)
+PASTA_SHM = "/dev/shm"
+
+_ALINHAMENTO = 64
+_CABECALHO = 8  # bytes com o tamanho do índice JSON (0 = segmento ainda sendo escrito)
+
+_lock = threading.Lock()
+_segmentos = {}  # artefato -> (versão, SharedMemory, arrays)
+_antigos = []    # segmentos substituídos; fechados quando nenhum array os referencia mais
+
+
+def disponivel():
+    """Se os datasets devem (e podem) ficar em memória compartilhada neste sistema."""
+    return MEMORIA_COMPARTILHADA and os.path.isdir(PASTA_SHM)
+
+
+def nome_segmento(artefato, versao):
+    return f"{MEMORIA_COMPARTILHADA_PREFIXO}_{artefato}_{versao}"
+
+
+def _alinhar(n):
+    return -(-n // _ALINHAMENTO) * _ALINHAMENTO
+
+
+class _Segmento(shared_memory.SharedMemory):
+    """SharedMemory que, ao ser coletado com arrays ainda vivos (ex.: no fim do processo),
+    deixa o mapeamento para eles em vez de emitir BufferError."""
+
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, BufferError):
+            pass
+
+
+def _abrir(nome, tamanho=0):
+    """Abre (tamanho=0) ou cria um segmento, sem registrá-lo no resource_tracker."""
+    criar = tamanho > 0
+    if sys.version_info >= (3, 13):
+        return _Segmento(nome, create=criar, size=tamanho, track=False)
+    shm = _Segmento(nome, create=criar, size=tamanho)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _ler(shm):
+    """Arrays somente leitura sobre o segmento, ou None se ele ainda está sendo escrito."""
+    n = int.from_bytes(shm.buf[:_CABECALHO], "little")
+    if n == 0:
+        return None
+    indice = json.loads(bytes(shm.buf[_CABECALHO:_CABECALHO + n]))
+    inicio = _alinhar(_CABECALHO + n)
+    arrays = {}
+    for item in indice:
+        # frombuffer mantém uma exportação do buffer: enquanto houver arrays (ou views)
+        # sobre o segmento, shm.close() falha com BufferError em vez de desmapeá-lo
+        forma = tuple(item["forma"])
+        a = np.frombuffer(shm.buf, np.dtype(item["dtype"]), count=int(np.prod(forma)),
+                          offset=inicio + item["offset"]).reshape(forma)
+        a.flags.writeable = False
+        arrays[item["nome"]] = a
+    return arrays
+
+
+def _criar(nome, arrays):
+    """Cria o segmento 'nome' com uma cópia dos arrays; o índice é gravado por último."""
+    indice, tamanho = [], 0
+    for chave, a in arrays.items():
+        if a.dtype.hasobject:
+            raise ValueError(f"Array '{chave}' com dtype object não pode ser compartilhado.")
+        tamanho = _alinhar(tamanho)
+        indice.append({"nome": chave, "dtype": a.dtype.str, "forma": list(a.shape), "offset": tamanho})
+        tamanho += a.nbytes
+    cabecalho = json.dumps(indice).encode("utf-8")
+    inicio = _alinhar(_CABECALHO + len(cabecalho))
+
+    # Escrever além do espaço livre do tmpfs derruba o processo (SIGBUS): checa antes
+    livre = os.statvfs(PASTA_SHM)
+    if livre.f_bavail * livre.f_frsize < inicio + tamanho:
+        raise OSError(f"Espaço insuficiente em {PASTA_SHM} para '{nome}'.")
+
+    shm = _abrir(nome, inicio + tamanho)
+    try:
+        shm.buf[_CABECALHO:_CABECALHO + len(cabecalho)] = cabecalho
+        for item, a in zip(indice, arrays.values()):
+            np.frombuffer(shm.buf, a.dtype, count=a.size, offset=inicio + item["offset"])[...] = a.ravel()
+        shm.buf[:_CABECALHO] = len(cabecalho).to_bytes(_CABECALHO, "little")
+    except BaseException:
+        _desvincular(shm)
+        shm.close()
+        raise
+    return shm
+
+
+def _desvincular(shm):
+    """Remove o nome do segmento (quem já o mapeou continua com acesso)."""
+    if sys.version_info < (3, 13):
+        # Até o 3.12, unlink() também desfaz o registro no resource_tracker, que _abrir já desfez
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def _anexar(nome, descartar_incompleto=False):
+    """(segmento, arrays) de um segmento completo já existente, ou None."""
+    try:
+        shm = _abrir(nome)
+    except FileNotFoundError:
+        return None
+    arrays = _ler(shm)
+    if arrays is None:
+        if descartar_incompleto:
+            # Com o lock em mãos ninguém está escrevendo: sobra de um criador interrompido
+            _desvincular(shm)
+        shm.close()
+        return None
+    return shm, arrays
+
+
+def remover_versoes(artefato, manter):
+    """Remove os nomes dos segmentos do artefato cujas versões não estão em 'manter' (mapeamentos seguem válidos)."""
+    if not disponivel():
+        return
+    prefixo = nome_segmento(artefato, "")
+    for nome in os.listdir(PASTA_SHM):
+        versao = nome[len(prefixo):]
+        if not nome.startswith(prefixo) or "_" in versao or versao in manter:
+            continue
+        try:
+            shm = _abrir(nome)
+            _desvincular(shm)
+            shm.close()
+        except OSError:
+            pass
+
+
+def _fechar_antigos():
+    """Fecha os segmentos substituídos cujos arrays já não são usados (chamar com _lock)."""
+    for shm in list(_antigos):
+        try:
+            shm.close()
+        except BufferError:
+            continue  # ainda há arrays apontando para ele; tenta na próxima troca
+        _antigos.remove(shm)
+
+
+def _usar(artefato, versao, anexado):
+    """Passa a usar o segmento anexado como a versão atual do artefato neste processo."""
+    shm, arrays = anexado
+    with _lock:
+        anterior = _segmentos.get(artefato)
+        _segmentos[artefato] = (versao, shm, arrays)
+        if anterior is not None:
+            _antigos.append(anterior[1])
+        _fechar_antigos()
+    return arrays
+
+
+def anexar(artefato, versao):
+    """Arrays da versão pedida se outro processo já criou o segmento dela; senão None (nada é construído)."""
+    with _lock:
+        guardado = _segmentos.get(artefato)
+        if guardado is not None and guardado[0] == versao:
+            return guardado[2]
+    if not disponivel():
+        return None
+    try:
+        anexado = _anexar(nome_segmento(artefato, versao))
+    except OSError:
+        return None
+    return None if anexado is None else _usar(artefato, versao, anexado)
+
+
+def arrays_compartilhados(artefato, versao, construir, manter=()):
+    """
+    Dicionário nome → array (somente leitura) do artefato na versão pedida.
+    construir() devolve o dicionário de arrays e roda em um único processo por versão;
+    os demais workers só anexam o segmento criado por ele. Ao criar a versão, os segmentos
+    das demais são removidos, exceto os das versões em 'manter'.
+    """
+    with _lock:
+        guardado = _segmentos.get(artefato)
+        if guardado is not None and guardado[0] == versao:
+            return guardado[2]
+    if not disponivel():
+        return construir()
+
+    nome = nome_segmento(artefato, versao)
+    try:
+        anexado = _anexar(nome)
+    except OSError:
+        return construir()
+    if anexado is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with trava_arquivo(os.path.join(CACHE_DIR, f"shm-{artefato}.lock")):
+            # Outro worker pode ter publicado enquanto esperávamos o lock
+            anexado = _anexar(nome, descartar_incompleto=True)
+            if anexado is None:
+                arrays = construir()
+                try:
+                    shm = _criar(nome, arrays)
+                except (OSError, ValueError):
+                    return arrays  # sem espaço ou tipo não compartilhável: cópia local
+                remover_versoes(artefato, {versao, *manter})
+                anexado = shm, _ler(shm)
+
+    return _usar(artefato, versao, anexado)
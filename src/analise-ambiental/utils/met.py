@@ -4,29 +4,34 @@ Arquivo: met.py
 --------------------------------------------
 Fornece função get_meteorologia para leitura de dados meteorológicos:
 - Converte strings de data e hora em datetime (minuto fixo :30:00).
-- Lê CSV de meteorologia (tolerância a encoding e parsing de datas).
-- Filtra registro exato de data/hora e formata saída.
+- ler_registro_csv: lê CSV de meteorologia (tolerância a encoding e parsing de datas)
+  e filtra o registro exato de data/hora.
+- ler_registro_npz: busca binária no armazenamento numérico (database_met.npz), carregado
+  uma vez (em memória compartilhada entre os workers) e recarregado quando o arquivo muda.
+- O leitor é plugável (ex.: consulta indexada no backend SQLite) e a saída é formatada
+  por formatar_registro, que normaliza os valores: número (float, até duas casas) ou "n"
+  nos ausentes, qualquer que seja o leitor (o CSV traz texto com vírgula decimal).
 - Retorna dicionário com vento, precipitação, temperatura, umidade e pressão.
 ============================================
 """
 
+import threading
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from config import METEOROLOGY_PATH
+from utils.single_flight import versao_dataset
+from utils.memoria_compartilhada import arrays_compartilhados
 
-def get_meteorologia(input_date_str,
-                     input_hour_str,
-                     database_path: str = METEOROLOGY_PATH):
+# Armazenamentos .npz carregados: caminho -> (versão, ts, valores)
+_npz_cache = {}
+_npz_lock = threading.Lock()
+
+def ler_registro_csv(database_path, target_datetime):
     """
-    Retorna um dicionário com as informações meteorológicas para a data e hora especificadas.
-    O horário é considerado com ":30:00" (exemplo: se input_hour_str = "00", assume 00:30:00).
+    Lê o CSV de meteorologia e retorna o registro exato [data/hora, valores...] ou None.
+    Lança ValueError com a mensagem de erro em caso de falha de leitura.
     """
-    try:
-        # Converte a data e hora para um objeto datetime
-        target_datetime = datetime.strptime(f"{input_date_str} {input_hour_str}:30:00", "%Y-%m-%d %H:%M:%S")
-    except Exception:
-        return {"error": "Formato de data ou hora inválido."}
-    
     try:
         # Lê o CSV de meteorologia
         df = pd.read_csv(
@@ -38,15 +43,94 @@ def get_meteorologia(input_date_str,
             parse_dates=[0]  # Converte a primeira coluna em datetime
         )
     except Exception as e:
-        return {"error": f"Erro ao ler o arquivo CSV: {e}"}
+        raise ValueError(f"Erro ao ler o arquivo CSV: {e}")
     
     # Filtra o registro com a data/hora exatas
     registro = df[df[0] == target_datetime]
     if registro.empty:
-        return {"error": "Não foram encontrados registros meteorológicos para esse período."}
+        return None
+    return registro.iloc[0]
+
+def carregar_met_numerico(npz_path):
+    """
+    Retorna (ts, valores) do database_met.npz: timestamps datetime64[s] ordenados e
+    valores float32 (n × 6) com NaN nos ausentes. Recarrega só quando o arquivo muda.
+    """
+    versao = versao_dataset(npz_path)
+    guardado = _npz_cache.get(npz_path)
+    if guardado is not None and guardado[0] == versao:
+        return guardado[1], guardado[2]
+
+    def ler():
+        try:
+            with np.load(npz_path) as dados:
+                return {"ts": dados["ts"], "valores": dados["valores"]}
+        except (OSError, KeyError, ValueError) as e:
+            raise ValueError(f"Erro ao ler o armazenamento meteorológico: {e}")
+
+    with _npz_lock:
+        dados = arrays_compartilhados("met", versao, ler)
+        _npz_cache[npz_path] = (versao, dados["ts"], dados["valores"])
+    return dados["ts"], dados["valores"]
+
+def ler_registro_npz(database_path, target_datetime):
+    """
+    Registro exato [data/hora, valores...] do armazenamento numérico ou None.
+    Valores ausentes voltam como "n", o mesmo marcador do CSV que o front-end verifica.
+    """
+    ts, valores = carregar_met_numerico(database_path)
+    alvo = np.datetime64(target_datetime, "s")
+    i = np.searchsorted(ts, alvo)
+    if i == len(ts) or ts[i] != alvo:
+        return None
+    return [target_datetime, *valores_para_api(valores[i])]
+
+def valores_para_api(linha):
+    """
+    Valores float32 de um registro como números Python, com "n" nos ausentes.
+    Arredonda a uma casa a mais que o dado de origem (ex.: 20.4, não 20.399999).
+    """
+    return ["n" if np.isnan(v) else round(float(v), 2) for v in linha]
+
+def get_meteorologia(input_date_str,
+                     input_hour_str,
+                     database_path: str = METEOROLOGY_PATH,
+                     ler_registro=ler_registro_csv):
+    """
+    Retorna um dicionário com as informações meteorológicas para a data e hora especificadas.
+    O horário é considerado com ":30:00" (exemplo: se input_hour_str = "00", assume 00:30:00).
+    'ler_registro' recebe (database_path, target_datetime); o padrão lê o CSV.
+    """
+    try:
+        # Converte a data e hora para um objeto datetime
+        target_datetime = datetime.strptime(f"{input_date_str} {input_hour_str}:30:00", "%Y-%m-%d %H:%M:%S")
+    except Exception:
+        return {"error": "Formato de data ou hora inválido."}
     
-    registro = registro.iloc[0]
+    try:
+        registro = ler_registro(database_path, target_datetime)
+    except ValueError as e:
+        return {"error": str(e)}
+    if registro is None:
+        return {"error": "Não foram encontrados registros meteorológicos para esse período."}
 
+    return formatar_registro(registro)
+
+def _valor_api(valor):
+    """Um valor meteorológico como float (até duas casas) ou "n" se ausente/inválido."""
+    if isinstance(valor, str):
+        valor = valor.strip().replace(",", ".")
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        return "n"
+    return "n" if np.isnan(valor) else round(valor, 2)
+
+def formatar_registro(registro):
+    """
+    Converte um registro [data/hora, valores...] no dicionário devolvido pela API.
+    Os valores saem sempre como float ou "n", independentemente do leitor que os trouxe.
+    """
     # Formata a data/hora (por exemplo, dd/mm/yyyy HH:MM)
     dt_value = registro[0]
     # Se vier como pd.Timestamp, convertemos para datetime nativo
@@ -57,12 +141,12 @@ def get_meteorologia(input_date_str,
     # Retorna os valores meteorológicos (sem unidades ainda)
     return {
         "Data e Hora": data_formatada,
-        "Velocidade Escalar do Vento": registro[1],
-        "Direção Escalar do Vento": registro[2],
-        "Precipitação Pluviométrica": registro[3],
-        "Temperatura": registro[4],
-        "Umidade Relativa": registro[5],
-        "Pressão Atmosférica": registro[6]
+        "Velocidade Escalar do Vento": _valor_api(registro[1]),
+        "Direção Escalar do Vento": _valor_api(registro[2]),
+        "Precipitação Pluviométrica": _valor_api(registro[3]),
+        "Temperatura": _valor_api(registro[4]),
+        "Umidade Relativa": _valor_api(registro[5]),
+        "Pressão Atmosférica": _valor_api(registro[6])
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+"""
+============================================
+Arquivo: perfil.py
+--------------------------------------------
+Perfil opcional de requisições, para investigar uma requisição lenta em produção:
+- Ativação por requisição: PERFIL_REQUISICOES=1 perfila todas; ou, com ADMIN_TOKEN
+  configurado, só as que trazem o cabeçalho 'X-Perfil: <ADMIN_TOKEN>'.
+- A requisição roda sob cProfile. Só uma requisição por processo é perfilada por vez
+  (a partir do Python 3.12 o cProfile usa sys.monitoring, global no interpretador); as
+  concorrentes seguem sem perfil, nunca com erro. Ao terminar, se levou pelo menos
+  PERFIL_LIMIAR_MS, o perfil (.prof, para pstats/snakeviz) é gravado em PERFIL_DIR, que
+  guarda só os PERFIL_MAX_ARQUIVOS mais recentes, e o log recebe as funções com maior
+  tempo acumulado e o tempo das seções medidas.
+- medir("nome"): seção cronometrada dentro do código (leitura de CSV, groupby/pivot,
+  chamadas Matplotlib); os tempos saem no log e no cabeçalho Server-Timing da resposta.
+- Desativado, o custo é praticamente zero: sem PERFIL_REQUISICOES nem ADMIN_TOKEN nenhum
+  hook é instalado, e medir() fora de uma requisição perfilada só consulta um atributo
+  thread-local e devolve um contexto vazio.
+- O corpo de respostas em streaming (ex.: /api/export) é gerado depois do fim do perfil.
+============================================
+"""
+
+import io
+import os
+import re
+import hmac
+import time
+import pstats
+import cProfile
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+
+from flask import request, current_app
+
+from config import ADMIN_TOKEN, PERFIL_REQUISICOES, PERFIL_DIR, PERFIL_MAX_ARQUIVOS, PERFIL_LIMIAR_MS
+
+CABECALHO = "X-Perfil"
+
+# Funções listadas no log (maior tempo acumulado)
+FUNCOES_NO_LOG = 15
+
+_local = threading.local()
+_NULO = nullcontext()
+_lock_rotacao = threading.Lock()
+_lock_perfil = threading.Lock()  # um perfil ativo por processo
+
+
+class _Secao:
+    """Soma a duração do bloco na seção 'nome' da requisição perfilada da thread."""
+
+    __slots__ = ("secoes", "nome", "inicio")
+
+    def __init__(self, secoes, nome):
+        self.secoes = secoes
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *exc):
+        total = self.secoes.setdefault(self.nome, [0.0, 0])
+        total[0] += time.perf_counter() - self.inicio
+        total[1] += 1
+
+
+def medir(nome):
+    """Contexto que cronometra uma seção; vazio fora de uma requisição perfilada."""
+    secoes = getattr(_local, "secoes", None)
+    if secoes is None:
+        return _NULO
+    return _Secao(secoes, nome)
+
+
+def _pedido():
+    """Se a requisição atual deve ser perfilada."""
+    if PERFIL_REQUISICOES:
+        return True
+    token = request.headers.get(CABECALHO)
+    # compara bytes: com str, compare_digest levanta TypeError se houver caractere não ASCII
+    return bool(token) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def _iniciar():
+    if not _pedido() or not _lock_perfil.acquire(blocking=False):
+        return
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:  # outro profiler já ativo no interpretador (ex.: depurador)
+        _lock_perfil.release()
+        return
+    _local.secoes = {}
+    _local.perfil = perfil
+    _local.inicio = time.perf_counter()
+
+
+def _parar():
+    """Para o perfil da thread; devolve (perfil, seções, duração em s) ou None."""
+    perfil = getattr(_local, "perfil", None)
+    if perfil is None:
+        return None
+    perfil.disable()
+    resultado = (perfil, _local.secoes, time.perf_counter() - _local.inicio)
+    _local.perfil = _local.secoes = None
+    _lock_perfil.release()
+    return resultado
+
+
+def _nome_arquivo(duracao):
+    caminho = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_")[:60] or "raiz"
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{duracao * 1000:.0f}ms-{request.method}-{caminho}-{os.getpid()}.prof"
+
+
+def _rotacionar():
+    """
+    Mantém só os PERFIL_MAX_ARQUIVOS perfis mais recentes. Outros workers podem apagar
+    arquivos ao mesmo tempo, então os que sumirem durante a varredura são ignorados.
+    """
+    with _lock_rotacao:
+        perfis = []
+        try:
+            with os.scandir(PERFIL_DIR) as entradas:
+                for e in entradas:
+                    if e.name.endswith(".prof"):
+                        try:
+                            perfis.append((e.stat().st_mtime_ns, e.path))
+                        except OSError:
+                            pass
+        except OSError:
+            return
+        perfis.sort()
+        for _, caminho in perfis[:max(0, len(perfis) - PERFIL_MAX_ARQUIVOS)]:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+
+
+def _resumo(perfil, secoes, duracao, arquivo):
+    """Texto do log: requisição, seções medidas e funções com maior tempo acumulado."""
+    linhas = [f"Perfil de {request.method} {request.full_path.rstrip('?')}: {duracao * 1000:.1f} ms → {arquivo}"]
+    for nome, (total, vezes) in sorted(secoes.items(), key=lambda item: -item[1][0]):
+        linhas.append(f"  seção {nome}: {total * 1000:.1f} ms ({vezes}×)")
+    buf = io.StringIO()
+    pstats.Stats(perfil, stream=buf).sort_stats("cumulative").print_stats(FUNCOES_NO_LOG)
+    linhas.append(buf.getvalue().rstrip())
+    return "\n".join(linhas)
+
+
+def _finalizar(resposta):
+    resultado = _parar()
+    if resultado is None:
+        return resposta
+    perfil, secoes, duracao = resultado
+
+    tempos = [f"total;dur={duracao * 1000:.1f}"]
+    tempos += [f"{nome};dur={total * 1000:.1f}" for nome, (total, _) in secoes.items()]
+    resposta.headers["Server-Timing"] = ", ".join(tempos)
+
+    if duracao * 1000 >= PERFIL_LIMIAR_MS:
+        arquivo = os.path.join(PERFIL_DIR, _nome_arquivo(duracao))
+        try:
+            os.makedirs(PERFIL_DIR, exist_ok=True)
+            perfil.dump_stats(arquivo)
+        except OSError as e:  # o perfil é diagnóstico: nunca derruba a requisição
+            arquivo = f"não gravado ({e})"
+        _rotacionar()
+        current_app.logger.warning(_resumo(perfil, secoes, duracao, arquivo))
+    return resposta
+
+
+def _descartar(exc):
+    """Garante que o perfil não fique ligado se a requisição terminou com exceção."""
+    _parar()
+
+
+def instalar(app):
+    """
+    Registra os hooks de perfil no app, se o perfil puder ser pedido. Chamar antes de
+    Compress(app): os after_request rodam na ordem inversa do registro, então a
+    compressão da resposta também entra no perfil.
+    """
+    if not PERFIL_REQUISICOES and not ADMIN_TOKEN:
+        return
+    app.before_request(_iniciar)
+    app.after_request(_finalizar)
+    app.teardown_request(_descartar)
@@ -0,0 +1,347 @@
+"""
+============================================
+Arquivo: pipeline.py
+--------------------------------------------
+Pipeline de tratamento como um grafo de dependências (DAG) de etapas, cada uma um
+script de tratamento-dos-dados/ executado em subprocesso:
+
+    valida_qar_automatico.py → database.py → new-database.py → database_resumido.py
+                                                            ↘ cubo_estatisticas.py
+    valida_met_automatico.py → database_met.py
+    new-database.py + database_met.py → banco SQLite (só se já carregado uma vez)
+
+- executar: roda cada etapa assim que suas dependências terminam (opcionalmente com no
+  máximo 'paralelo' subprocessos ao mesmo tempo); os ramos independentes (QAr e
+  meteorologia) avançam em paralelo, então uma atualização completa leva o caminho
+  crítico, não a soma das etapas.
+- Etapas em dia são puladas pela linhagem do manifesto (utils/manifesto.py): entradas e
+  saídas com o mesmo conteúdo da última execução. Sem linhagem registrada, vale a regra
+  de mtime do "make"; saídas já em dia têm a linhagem registrada sem serem refeitas.
+- O manifesto é salvo assim que cada etapa termina, para os workers verem logo o hash
+  das novas saídas (sem passar por uma versão intermediária de tamanho/mtime).
+- Os filhos são coletados com os.wait4, que devolve o uso de recursos de cada um:
+  o relatório final traz, por etapa, tempo de parede, linhas processadas e pico de
+  memória (RSS máximo do processo da etapa).
+- Uma etapa que falha cancela apenas as que dependem dela.
+- etapas_de: etapas que produzem certos arquivos, com todas as suas dependências (ex.: as
+  que alimentam os artefatos publicados pelo serviço de reconstrução).
+
+Uso (a partir da pasta analise-ambiental):
+    python -m utils.pipeline                   # etapas desatualizadas, em paralelo
+    python -m utils.pipeline --forcar          # todas as etapas
+    python -m utils.pipeline --etapas database_met --paralelo 1
+============================================
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import numpy as np
+
+from config import (
+    DATABASE_PATH,
+    NEW_DATABASE_PATH,
+    DATABASE_RESUMIDO_PATH,
+    CUBO_ESTATISTICAS_PATH,
+    METEOROLOGY_NPZ_PATH,
+    ESTACOES_PATH,
+    FAIXAS_IQAR_PATH,
+    MEDICOES_DB_PATH,
+    TRATAMENTO_DIR
+)
+from utils import banco_sqlite, manifesto as manifesto_dados
+
+# Pasta da aplicação (onde roda a carga do backend SQLite)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# CSVs que os validadores geram a partir das planilhas (nomes conforme o formato detectado)
+CSVS_QAR = {"qar.csv", "qar_novo.csv", "qar_maior.csv", "qar_corrigido.csv"}
+
+
+class Etapa:
+    """
+    Uma etapa do pipeline:
+    - argumentos/pasta: linha de comando (após o interpretador) e diretório de trabalho;
+    - depende: nomes das etapas que precisam terminar antes;
+    - entradas(manifesto)/saidas(manifesto): caminhos usados na linhagem;
+    - linhas(manifesto): arquivos cujas linhas contam como processadas (padrão: as saídas);
+    - opcional(): se devolver True, a etapa é ignorada (ex.: backend SQLite não carregado).
+    """
+
+    def __init__(self, nome, argumentos, pasta, depende, entradas, saidas, linhas=None, opcional=None):
+        self.nome = nome
+        self.argumentos = argumentos
+        self.pasta = pasta
+        self.depende = depende
+        self.entradas = entradas
+        self.saidas = saidas
+        self.linhas = linhas or saidas
+        self.opcional = opcional
+
+
+def _planilhas(manifesto, nome):
+    """
+    Planilha original de cada mês: <nome>.xls ou, se não houver, <nome>.xlsx
+    (o validador gera o .xlsx a partir do .xls, então ele não é uma entrada nesse caso).
+    """
+    por_pasta = {}
+    for caminho in manifesto_dados.brutos(manifesto, {f"{nome}.xls", f"{nome}.xlsx"}):
+        pasta = os.path.dirname(caminho)
+        if caminho.lower().endswith(".xls") or pasta not in por_pasta:
+            por_pasta[pasta] = caminho
+    return sorted(por_pasta.values())
+
+
+ETAPAS = [
+    Etapa("valida_qar", ["valida_qar_automatico.py"], TRATAMENTO_DIR, [],
+          lambda m: _planilhas(m, "qar"),
+          lambda m: manifesto_dados.brutos(m, CSVS_QAR)),
+    Etapa("database", ["database.py"], TRATAMENTO_DIR, ["valida_qar"],
+          lambda m: manifesto_dados.brutos(m, {"qar.csv", "qar_novo.csv"}),
+          lambda m: [DATABASE_PATH]),
+    Etapa("new_database", ["new-database.py"], TRATAMENTO_DIR, ["database"],
+          lambda m: [DATABASE_PATH, ESTACOES_PATH, FAIXAS_IQAR_PATH],
+          lambda m: [NEW_DATABASE_PATH]),
+    Etapa("database_resumido", ["database_resumido.py"], TRATAMENTO_DIR, ["new_database"],
+          lambda m: [NEW_DATABASE_PATH],
+          lambda m: [DATABASE_RESUMIDO_PATH]),
+    # O cubo é incremental; as linhas contadas são as do new_database.csv agregado
+    Etapa("cubo_estatisticas", ["cubo_estatisticas.py"], TRATAMENTO_DIR, ["new_database"],
+          lambda m: [NEW_DATABASE_PATH],
+          lambda m: [CUBO_ESTATISTICAS_PATH],
+          linhas=lambda m: [NEW_DATABASE_PATH]),
+    Etapa("valida_met", ["valida_met_automatico.py"], TRATAMENTO_DIR, [],
+          lambda m: _planilhas(m, "met"),
+          lambda m: manifesto_dados.brutos(m, {"met.csv"})),
+    # O .npz é gravado depois do CSV legado, então serve de saída da etapa
+    Etapa("database_met", ["database_met.py"], TRATAMENTO_DIR, ["valida_met"],
+          lambda m: manifesto_dados.brutos(m, {"met.csv"}),
+          lambda m: [METEOROLOGY_NPZ_PATH]),
+    # O backend SQLite é opcional: só é mantido depois da primeira carga manual
+    Etapa("banco_sqlite", ["-m", "utils.banco_sqlite"], APP_DIR, ["new_database", "database_met"],
+          lambda m: [DATABASE_PATH, NEW_DATABASE_PATH, METEOROLOGY_NPZ_PATH],
+          lambda m: [MEDICOES_DB_PATH],
+          linhas=lambda m: [DATABASE_PATH, NEW_DATABASE_PATH, METEOROLOGY_NPZ_PATH],
+          opcional=lambda: not banco_sqlite.disponivel()),
+]
+
+
+def etapas_de(caminhos):
+    """Nomes das etapas cujas saídas incluem algum dos caminhos, e de todas as de que elas dependem."""
+    caminhos = {os.path.abspath(p) for p in caminhos}
+    vazio = manifesto_dados.vazio()
+    por_nome = {e.nome: e for e in ETAPAS}
+    pilha = [e.nome for e in ETAPAS if caminhos & {os.path.abspath(p) for p in e.saidas(vazio)}]
+    resultado = set()
+    while pilha:
+        nome = pilha.pop()
+        if nome not in resultado:
+            resultado.add(nome)
+            pilha.extend(por_nome[nome].depende)
+    return resultado
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def desatualizada(entradas, saidas):
+    """True se falta alguma saída ou alguma entrada é mais recente que a saída mais antiga."""
+    mtimes = [_mtime(p) for p in saidas]
+    if not mtimes or None in mtimes:
+        return True
+    return any((_mtime(p) or 0) > min(mtimes) for p in entradas)
+
+
+def em_dia(manifesto, etapa):
+    """
+    Se a etapa pode ser pulada, pela linhagem do manifesto. Sem linhagem, usa a regra de
+    mtime e, se as saídas já estiverem em dia, registra a linhagem atual sem refazê-las.
+    """
+    entradas, saidas = etapa.entradas(manifesto), etapa.saidas(manifesto)
+    resultado = manifesto_dados.etapa_em_dia(manifesto, etapa.nome, entradas, saidas)
+    if resultado is None:
+        resultado = not desatualizada(entradas, saidas)
+        if resultado:
+            manifesto_dados.registrar_etapa(manifesto, etapa.nome, entradas, saidas)
+    return resultado
+
+
+def contar_linhas(caminhos):
+    """Linhas dos CSVs (quebras de linha) e registros dos .npz com 'ts'; None se nenhum é contável."""
+    total = None
+    for caminho in caminhos:
+        try:
+            if caminho.endswith(".csv"):
+                n = 0
+                with open(caminho, "rb") as f:
+                    for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                        n += bloco.count(b"\n")
+            elif caminho.endswith(".npz"):
+                with np.load(caminho) as dados:
+                    if "ts" not in dados.files:
+                        continue
+                    n = len(dados["ts"])
+            else:
+                continue
+        except (OSError, ValueError):
+            continue
+        total = (total or 0) + n
+    return total
+
+
+def _iniciar(etapa, saida):
+    return subprocess.Popen([sys.executable, *etapa.argumentos], cwd=etapa.pasta, stdout=saida)
+
+
+def _esperar(processos):
+    """
+    Espera o próximo filho terminar: (pid, código de saída, pico de memória em bytes).
+    Com os.wait4 o uso de recursos vem junto; sem ele (Windows), faz polling sem memória.
+    """
+    if hasattr(os, "wait4"):
+        while True:
+            pid, status, uso = os.wait4(-1, 0)
+            if pid in processos:
+                # ru_maxrss vem em KiB no Linux e em bytes no macOS
+                pico = uso.ru_maxrss if sys.platform == "darwin" else uso.ru_maxrss * 1024
+                codigo = os.waitstatus_to_exitcode(status)
+                processos[pid].returncode = codigo  # já coletado aqui; o Popen não espera de novo
+                return pid, codigo, pico
+    while True:
+        for pid, proc in processos.items():
+            if proc.poll() is not None:
+                return pid, proc.returncode, None
+        time.sleep(0.1)
+
+
+def executar(nomes=None, forcar=False, paralelo=None, saida=subprocess.DEVNULL, log=print):
+    """
+    Executa o DAG (ou só as etapas em 'nomes', com as dependências já prontas em disco).
+    Retorna (sucesso, relatório), com uma linha do relatório por etapa na ordem de ETAPAS.
+    'saida' recebe o stdout dos scripts (padrão: descartado; os erros vão para o stderr).
+    """
+    paralelo = max(1, paralelo or len(ETAPAS))
+    etapas = {e.nome: e for e in ETAPAS if (nomes is None or e.nome in nomes)}
+    relatorio = {nome: {"etapa": nome, "situacao": "pendente", "tempo": None, "linhas": None, "memoria": None}
+                 for nome in etapas}
+    for nome, etapa in etapas.items():
+        if etapa.opcional is not None and etapa.opcional():
+            relatorio[nome]["situacao"] = "ignorada"
+
+    manifesto = manifesto_dados.carregar()
+    mudaram = manifesto_dados.atualizar_brutos(manifesto)
+    if mudaram:
+        log(f"{len(mudaram)} arquivo(s) bruto(s) novo(s) ou alterado(s)")
+
+    rodando = {}  # pid -> (etapa, Popen, início)
+    concluidas = {n for n, r in relatorio.items() if r["situacao"] == "ignorada"}
+    sucesso = True
+    inicio_total = time.perf_counter()
+    pendentes_antes = None
+    try:
+        while True:
+            # Inicia as etapas prontas (dependências concluídas ou fora da seleção)
+            for nome, etapa in etapas.items():
+                if len(rodando) >= paralelo:
+                    break
+                r = relatorio[nome]
+                if r["situacao"] != "pendente":
+                    continue
+                deps = [d for d in etapa.depende if d in etapas]
+                if any(relatorio[d]["situacao"] in ("falhou", "cancelada") for d in deps):
+                    r["situacao"] = "cancelada"
+                    concluidas.add(nome)
+                    continue
+                if not all(d in concluidas for d in deps):
+                    continue
+                if not forcar and em_dia(manifesto, etapa):
+                    r["situacao"] = "em dia"
+                    concluidas.add(nome)
+                    continue
+                log(f"Executando {nome} ({' '.join(etapa.argumentos)})")
+                proc = _iniciar(etapa, saida)
+                rodando[proc.pid] = (etapa, proc, time.perf_counter())
+                r["situacao"] = "executando"
+
+            if not rodando:
+                pendentes = sum(r["situacao"] == "pendente" for r in relatorio.values())
+                if pendentes == 0 or pendentes == pendentes_antes:
+                    break
+                pendentes_antes = pendentes
+                continue  # etapas canceladas/em dia liberaram outras: nova passada
+
+            pid, codigo, pico = _esperar({p: proc for p, (_, proc, _) in rodando.items()})
+            etapa, _, inicio = rodando.pop(pid)
+            r = relatorio[etapa.nome]
+            r["tempo"] = time.perf_counter() - inicio
+            r["memoria"] = pico
+            concluidas.add(etapa.nome)
+            if codigo != 0:
+                r["situacao"] = "falhou"
+                sucesso = False
+                log(f"Falha em {etapa.nome} (código {codigo})")
+                continue
+            r["situacao"] = "executada"
+            # Os validadores gravam em dados-coletados/: revarre (só hash do que mudou)
+            manifesto_dados.atualizar_brutos(manifesto)
+            manifesto_dados.registrar_etapa(manifesto, etapa.nome, etapa.entradas(manifesto),
+                                            etapa.saidas(manifesto))
+            # Salvo já: os workers versionam as saídas pelo hash registrado (versao_dataset),
+            # então o manifesto não pode esperar o fim do DAG
+            manifesto_dados.salvar(manifesto)
+            r["linhas"] = contar_linhas(etapa.linhas(manifesto))
+            log(f"{etapa.nome} pronta em {r['tempo']:.1f}s")
+    finally:
+        # Interrupção (Ctrl+C, erro): encerra os filhos em andamento e guarda o que já foi feito
+        for _, proc, _ in rodando.values():
+            proc.terminate()
+            proc.wait()
+        manifesto_dados.salvar(manifesto)
+
+    linhas = [relatorio[e.nome] for e in ETAPAS if e.nome in relatorio]
+    linhas.append({"etapa": "total", "situacao": "", "tempo": time.perf_counter() - inicio_total,
+                   "linhas": None, "memoria": None})
+    return sucesso, linhas
+
+
+def formatar_relatorio(relatorio):
+    """Tabela de texto do relatório: situação, tempo de parede, linhas e pico de memória."""
+    def celula(valor, fmt):
+        return "-" if valor is None else format(valor, fmt)
+
+    saida = [f"{'Etapa':<20} {'Situação':<11} {'Tempo (s)':>10} {'Linhas':>10} {'Pico RSS (MB)':>14}"]
+    for r in relatorio:
+        memoria = None if r["memoria"] is None else r["memoria"] / (1024 * 1024)
+        saida.append(f"{r['etapa']:<20} {r['situacao']:<11} {celula(r['tempo'], '.1f'):>10} "
+                     f"{celula(r['linhas'], ','):>10} {celula(memoria, '.0f'):>14}")
+    soma = sum(r["tempo"] or 0 for r in relatorio if r["etapa"] != "total")
+    saida.append(f"Soma dos tempos das etapas: {soma:.1f}s")
+    return "\n".join(saida)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa o pipeline de tratamento como um DAG de etapas.")
+    parser.add_argument("--etapas", nargs="+", choices=[e.nome for e in ETAPAS],
+                        help="executa só estas etapas (padrão: todas)")
+    parser.add_argument("--forcar", action="store_true",
+                        help="executa mesmo as etapas em dia")
+    parser.add_argument("--paralelo", type=int, default=None,
+                        help="máximo de etapas simultâneas (padrão: só o grafo limita)")
+    parser.add_argument("--verbose", action="store_true",
+                        help="mostra a saída dos scripts")
+    args = parser.parse_args()
+
+    sucesso, relatorio = executar(args.etapas, args.forcar, args.paralelo,
+                                  saida=None if args.verbose else subprocess.DEVNULL)
+    print(formatar_relatorio(relatorio))
+    sys.exit(0 if sucesso else 1)
+
+
+if __name__ == "__main__":
+    main()
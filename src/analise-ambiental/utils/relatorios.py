@@ -0,0 +1,177 @@
+"""
+============================================
+Arquivo: relatorios.py
+--------------------------------------------
+Persistência dos relatórios de erro enviados pelo formulário:
+- Tabela SQLite 'relatorios' (id, criado_em, texto, arquivo) no banco de erros
+  (ERROR_REPORTS_DB_PATH); o id AUTOINCREMENT é o contador atômico entre workers.
+- Os arquivos continuam em uploads/error_<id>/ (error.txt + imagem opcional).
+- criar_relatorio: custo constante por envio (um INSERT; sem listar a pasta uploads/).
+- listar_relatorios: paginação por cursor (id), do mais recente para o mais antigo.
+- Na criação do banco, o contador começa após a maior pasta error_N já existente,
+  então a numeração segue a das pastas criadas antes desta tabela.
+- Imagens anexadas: o arquivo bruto é gravado na requisição e a recompressão
+  (redução para UPLOAD_MAX_LADO px + WebP) roda em um pool de threads em segundo plano;
+  ao terminar, o registro passa a apontar para o .webp e o bruto é apagado.
+============================================
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.utils import secure_filename
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from config import ERROR_REPORTS_DB_PATH, UPLOAD_MAX_LADO, UPLOAD_WEBP_QUALIDADE
+
+_lock = threading.Lock()
+_inicializado = set()
+
+# Pool da recompressão de imagens (fora da thread da requisição)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="recompressao")
+
+
+def _conectar(db_path):
+    con = sqlite3.connect(db_path, timeout=30)
+    con.row_factory = sqlite3.Row
+    return con
+
+
+def pasta_relatorio(relatorio_id):
+    """Nome da pasta do relatório dentro de uploads/."""
+    return f"error_{relatorio_id}"
+
+
+def _maior_pasta_existente(uploads_folder):
+    """Maior N entre as pastas error_N (usado apenas uma vez, ao criar a tabela)."""
+    maior = 0
+    for d in os.listdir(uploads_folder):
+        if d.startswith("error_") and os.path.isdir(os.path.join(uploads_folder, d)):
+            try:
+                maior = max(maior, int(d.split("_")[1]))
+            except ValueError:
+                continue
+    return maior
+
+
+def inicializar(uploads_folder, db_path=ERROR_REPORTS_DB_PATH):
+    """Cria a tabela (uma vez por processo) e posiciona o contador após as pastas existentes."""
+    with _lock:
+        if db_path in _inicializado:
+            return
+        con = _conectar(db_path)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            with con:
+                # BEGIN IMMEDIATE: só um worker cria a tabela e semeia o contador
+                con.execute("BEGIN IMMEDIATE")
+                existe = con.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'relatorios'"
+                ).fetchone()
+                if not existe:
+                    con.execute("""
+                        CREATE TABLE relatorios (
+                            id        INTEGER PRIMARY KEY AUTOINCREMENT,
+                            criado_em TEXT NOT NULL,
+                            texto     TEXT NOT NULL,
+                            arquivo   TEXT
+                        )
+                    """)
+                    inicio = _maior_pasta_existente(uploads_folder)
+                    if inicio:
+                        con.execute(
+                            "INSERT INTO sqlite_sequence (name, seq) VALUES ('relatorios', ?)", (inicio,)
+                        )
+        finally:
+            con.close()
+        _inicializado.add(db_path)
+
+
+def criar_relatorio(uploads_folder, texto, arquivo=None, db_path=ERROR_REPORTS_DB_PATH):
+    """
+    Registra um relatório e grava seus arquivos em uploads/error_<id>/.
+    'arquivo' é o FileStorage enviado (opcional). Retorna o registro como dicionário.
+    """
+    inicializar(uploads_folder, db_path)
+    nome_arquivo = secure_filename(arquivo.filename) if arquivo and arquivo.filename else None
+
+    con = _conectar(db_path)
+    try:
+        with con:
+            cur = con.execute(
+                "INSERT INTO relatorios (criado_em, texto, arquivo) VALUES (?, ?, ?)",
+                (datetime.now().isoformat(timespec="seconds"), texto, nome_arquivo)
+            )
+            relatorio_id = cur.lastrowid
+    finally:
+        con.close()
+
+    # O id é único entre workers, então a pasta nunca é compartilhada
+    pasta = pasta_relatorio(relatorio_id)
+    new_dir = os.path.join(uploads_folder, pasta)
+    os.makedirs(new_dir, exist_ok=True)
+    with open(os.path.join(new_dir, "error.txt"), "w", encoding="utf-8") as f:
+        f.write(texto)
+    if nome_arquivo:
+        # Copia em blocos o upload já limitado por MAX_CONTENT_LENGTH; a recompressão fica para o pool
+        caminho = os.path.join(new_dir, nome_arquivo)
+        arquivo.save(caminho)
+        _executor.submit(recomprimir_imagem, relatorio_id, caminho, db_path)
+
+    return {"id": relatorio_id, "pasta": pasta, "arquivo": nome_arquivo}
+
+
+def recomprimir_imagem(relatorio_id, caminho, db_path=ERROR_REPORTS_DB_PATH):
+    """
+    Reduz a imagem para no máximo UPLOAD_MAX_LADO px no maior lado e grava em WebP.
+    Arquivos que não são imagens válidas ficam como foram enviados.
+    """
+    webp = os.path.splitext(caminho)[0] + ".webp"
+    tmp = webp + ".tmp"
+    try:
+        with Image.open(caminho) as img:
+            # JPEG: decodifica já reduzido quando possível
+            img.draft("RGB", (UPLOAD_MAX_LADO, UPLOAD_MAX_LADO))
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((UPLOAD_MAX_LADO, UPLOAD_MAX_LADO))
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if img.mode in ("LA", "P", "PA") else "RGB")
+            img.save(tmp, "WEBP", quality=UPLOAD_WEBP_QUALIDADE, method=4)
+        os.replace(tmp, webp)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return
+
+    con = _conectar(db_path)
+    try:
+        with con:
+            con.execute("UPDATE relatorios SET arquivo = ? WHERE id = ?", (os.path.basename(webp), relatorio_id))
+    finally:
+        con.close()
+    if webp != caminho:
+        os.remove(caminho)
+
+
+def listar_relatorios(uploads_folder, antes_de=None, limite=20, db_path=ERROR_REPORTS_DB_PATH):
+    """
+    Página de relatórios em ordem decrescente de id.
+    'antes_de' é o cursor devolvido pela página anterior (None para a primeira).
+    Retorna (itens, proximo_cursor), com proximo_cursor None na última página.
+    """
+    inicializar(uploads_folder, db_path)
+    con = _conectar(db_path)
+    try:
+        linhas = con.execute(
+            "SELECT id, criado_em, texto, arquivo FROM relatorios "
+            "WHERE id < ? ORDER BY id DESC LIMIT ?",
+            (antes_de if antes_de is not None else 2 ** 63 - 1, limite + 1)
+        ).fetchall()
+    finally:
+        con.close()
+
+    itens = [dict(linha, pasta=pasta_relatorio(linha["id"])) for linha in linhas[:limite]]
+    proximo = itens[-1]["id"] if len(linhas) > limite else None
+    return itens, proximo
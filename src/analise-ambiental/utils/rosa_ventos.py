@@ -0,0 +1,74 @@
+"""
+============================================
+Arquivo: rosa_ventos.py
+--------------------------------------------
+Rosa dos ventos calculada a partir do armazenamento numérico de meteorologia:
+- rosa_dos_ventos: contagens (setores de direção × faixas de velocidade) em um intervalo
+  de datas e, opcionalmente, só para um mês do ano (ex.: todos os janeiros).
+  * O intervalo é recortado por busca binária nos timestamps ordenados.
+  * A contagem é um único np.bincount sobre (setor, faixa), sem laço por linha.
+  * Calmarias (velocidade abaixo da primeira faixa) são contadas à parte.
+- Resultados em cache (LRU) por (versão do .npz, intervalo, mês, setores, faixas).
+- O retorno é JSON compacto (contagens inteiras); o cliente calcula percentuais.
+============================================
+"""
+
+from functools import lru_cache
+import numpy as np
+
+from config import METEOROLOGY_NPZ_PATH
+from utils.met import carregar_met_numerico
+from utils.single_flight import versao_dataset
+
+# Colunas do database_met.npz usadas aqui
+COL_VELOCIDADE = 0
+COL_DIRECAO    = 1
+
+# Binning padrão: 16 setores e faixas de velocidade em m/s (a primeira define a calmaria)
+SETORES_PADRAO     = 16
+VELOCIDADES_PADRAO = (0.5, 1.5, 3.0, 5.0, 8.0)
+
+
+def rosa_dos_ventos(inicio=None, fim=None, mes=None, setores=SETORES_PADRAO,
+                    velocidades=VELOCIDADES_PADRAO, npz_path=METEOROLOGY_NPZ_PATH):
+    """
+    Rosa dos ventos entre 'inicio' e 'fim' (strings "YYYY-MM-DD HH:MM:SS", inclusive;
+    None = sem limite), opcionalmente filtrada por 'mes' (1–12).
+    'velocidades' são os limites inferiores das faixas; a última faixa é aberta.
+    """
+    return _rosa(versao_dataset(npz_path), npz_path, inicio, fim, mes, setores, tuple(velocidades))
+
+
+@lru_cache(maxsize=128)
+def _rosa(versao, npz_path, inicio, fim, mes, setores, velocidades):
+    """Cálculo efetivo; 'versao' faz parte da chave para invalidar o cache quando o .npz muda."""
+    ts, valores = carregar_met_numerico(npz_path)
+
+    lo = 0 if inicio is None else np.searchsorted(ts, np.datetime64(inicio), side="left")
+    hi = len(ts) if fim is None else np.searchsorted(ts, np.datetime64(fim), side="right")
+    ts_sel = ts[lo:hi]
+    vel = valores[lo:hi, COL_VELOCIDADE]
+    dire = valores[lo:hi, COL_DIRECAO]
+
+    validos = ~np.isnan(vel) & ~np.isnan(dire)
+    if mes is not None:
+        meses = ts_sel.astype("datetime64[M]").astype("int64") % 12 + 1
+        validos &= meses == mes
+    vel, dire = vel[validos], dire[validos]
+
+    limites = np.asarray(velocidades, dtype=np.float32)
+    calmo = vel < limites[0]
+
+    # Setores centrados no rumo (o setor 0 vai de -largura/2 a +largura/2 em torno do norte)
+    largura = 360.0 / setores
+    setor = (((dire[~calmo] + largura / 2) % 360) // largura).astype(np.int64)
+    faixa = np.searchsorted(limites, vel[~calmo], side="right") - 1
+    contagens = np.bincount(setor * len(limites) + faixa, minlength=setores * len(limites))
+
+    return {
+        "direcoes":    [round(i * largura, 2) for i in range(setores)],
+        "velocidades": [float(v) for v in velocidades],
+        "contagens":   contagens.reshape(setores, len(limites)).tolist(),
+        "calmarias":   int(calmo.sum()),
+        "total":       int(len(vel)),
+    }
@@ -0,0 +1,190 @@
+"""
+============================================
+Arquivo: single_flight.py
+--------------------------------------------
+Coalescência de computações caras ("single-flight") para renderizações
+como os gradientes Matplotlib e o HTML Plotly:
+- versao_dataset: versão barata dos arquivos de origem: o hash de conteúdo registrado no
+  manifesto de dados (utils/manifesto.py) quando o registro corresponde ao os.stat atual,
+  senão tamanho + mtime. Regerar um arquivo com o mesmo conteúdo mantém a versão.
+- trava_arquivo: lock exclusivo entre processos (fcntl) sobre um arquivo de lock.
+- SingleFlight.executar: executa func() uma única vez por (artefato, versão).
+  * Dentro do processo, chamadas concorrentes esperam a mesma execução em andamento.
+  * Entre workers do gunicorn, um lock de arquivo (fcntl) garante que só um processo
+    calcula; os demais leem o resultado gravado em disco.
+  * O último resultado de cada artefato fica em memória; versões antigas são descartadas.
+  * Ao gravar uma versão, os resultados em disco das versões anteriores do artefato são
+    apagados, exceto as versões protegidas (ex.: a publicada, ainda servida enquanto a
+    próxima é aquecida).
+- remover_versoes: apaga os resultados em disco das versões que não devem ser mantidas.
+============================================
+"""
+
+import os
+import glob
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: apenas a coalescência dentro do processo
+    fcntl = None
+
+from utils.manifesto import hash_registrado
+
+# Marcador para "não encontrado no cache" (None pode ser um resultado válido)
+_AUSENTE = object()
+
+
+def versao_dataset(*paths):
+    """
+    Calcula uma versão curta para o conjunto de arquivos informado.
+    Usa apenas os.stat e o manifesto já lido (os arquivos de dados não são lidos),
+    então o custo é desprezível por requisição.
+    """
+    h = hashlib.sha1()
+    for path in paths:
+        try:
+            st = os.stat(path)
+            conteudo = hash_registrado(path, st)
+            if conteudo is not None:
+                h.update(f"{path}:sha256={conteudo};".encode())
+            else:
+                h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+        except OSError:
+            h.update(f"{path}:ausente;".encode())
+    return h.hexdigest()[:12]
+
+
+@contextmanager
+def trava_arquivo(caminho_lock):
+    """Lock exclusivo entre processos sobre 'caminho_lock' (sem fcntl: não trava)."""
+    if fcntl is None:
+        yield
+        return
+    with open(caminho_lock, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SingleFlight:
+    """
+    Camada de single-flight com cache em memória e em disco.
+
+    Parâmetros:
+    - cache_dir: pasta onde ficam os resultados serializados e os arquivos de lock.
+    - protegidas: função opcional que devolve as versões que nunca são apagadas ao gravar
+      uma versão nova.
+    """
+
+    def __init__(self, cache_dir, protegidas=None):
+        self.cache_dir = cache_dir
+        self._protegidas = protegidas or set
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._em_voo = {}      # (artefato, versão) -> threading.Event da execução em andamento
+        self._memoria = {}     # artefato -> (versão, valor)
+
+    def executar(self, artefato, versao, func):
+        """
+        Retorna o valor de func() para (artefato, versão), calculando no máximo uma vez
+        mesmo com várias threads e vários processos pedindo o mesmo artefato ao mesmo tempo.
+        """
+        chave = (artefato, versao)
+        while True:
+            with self._lock:
+                guardado = self._memoria.get(artefato)
+                if guardado is not None and guardado[0] == versao:
+                    return guardado[1]
+                evento = self._em_voo.get(chave)
+                lider = evento is None
+                if lider:
+                    evento = threading.Event()
+                    self._em_voo[chave] = evento
+
+            if not lider:
+                # Espera a execução em andamento; se ela falhar, tenta novamente como líder
+                evento.wait()
+                continue
+
+            try:
+                valor = self._calcular_entre_processos(artefato, versao, func)
+                with self._lock:
+                    self._memoria[artefato] = (versao, valor)
+                return valor
+            finally:
+                with self._lock:
+                    self._em_voo.pop(chave, None)
+                evento.set()
+
+    # ------------------------------------------------------------------
+    # Coordenação entre processos (arquivo de resultado + lock de arquivo)
+    # ------------------------------------------------------------------
+    def _arquivo(self, artefato, versao):
+        return os.path.join(self.cache_dir, f"{artefato}-{versao}.pkl")
+
+    def _calcular_entre_processos(self, artefato, versao, func):
+        arquivo = self._arquivo(artefato, versao)
+        valor = self._ler(arquivo)
+        if valor is not _AUSENTE:
+            return valor
+
+        with trava_arquivo(arquivo + ".lock"):
+            # Outro worker pode ter terminado enquanto esperávamos o lock
+            valor = self._ler(arquivo)
+            if valor is not _AUSENTE:
+                return valor
+            valor = func()
+            self._gravar(arquivo, valor)
+            self.remover_versoes({versao} | set(self._protegidas()), artefato=artefato,
+                                 limite=os.path.getmtime(arquivo))
+            return valor
+
+    @staticmethod
+    def _ler(arquivo):
+        try:
+            with open(arquivo, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return _AUSENTE
+
+    def _gravar(self, arquivo, valor):
+        # Grava em arquivo temporário e troca de forma atômica para leitores nunca verem meio arquivo
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, arquivo)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def remover_versoes(self, manter, artefato=None, limite=None):
+        """
+        Apaga os resultados em disco cujas versões não estão em 'manter', de um artefato
+        ou (sem 'artefato') de todos. Com 'limite', só os gravados até esse mtime, para não
+        apagar uma versão mais nova gravada por outro worker. Locks só são apagados quando
+        já estão parados há mais de uma hora.
+        """
+        padrao = f"{glob.escape(artefato)}-*.pkl" if artefato else "*.pkl"
+        parados = time.time() - 3600
+        for path in glob.glob(os.path.join(self.cache_dir, padrao)):
+            nome, _, versao = os.path.basename(path)[:-len(".pkl")].rpartition("-")
+            if (artefato and nome != artefato) or versao in manter:
+                continue
+            try:
+                if limite is None or os.path.getmtime(path) <= limite:
+                    os.remove(path)
+                lock = path + ".lock"
+                if os.path.exists(lock) and os.path.getmtime(lock) < parados:
+                    os.remove(lock)
+            except OSError:
+                pass
@@ -4,26 +4,34 @@ Arquivo: visualization_gradient.py
 --------------------------------------------
 Geração de imagens de gradiente (heatmaps) para indicadores de qualidade do ar:
 - Define cores base e colormaps (_CMAP_MEAN, _CMAP_MAX, _CMAP_MIN).
-- _encode_figure_to_datauri: converte figura Matplotlib em data URI Base64.
+- _encode_figure_variants: renderiza a figura uma vez e gera as variantes servidas
+  por URL (WebP e/ou PNG otimizado, em várias larguras para srcset).
 - _style_axes e _style_colorbar: aplicam tema escuro e estilo consistente.
 - _make_heatmap: desenha heatmap mensal×anual de um poluente.
-- generate_gradient_image: heatmaps de médias mensais × anuais para MP2.5, MP10 e PTS.
-- generate_max_gradient_image: mesmos heatmaps, mas de valores máximos.
-- generate_min_gradient_image: mesmos heatmaps, mas de valores mínimos.
-- Cada função retorna URI para uso inline em templates HTML.
+- _figure_mean / _figure_max / _figure_min: heatmaps mensais × anuais de MP2.5, MP10 e
+  PTS (médias, máximos e mínimos).
+- render_gradient_images: variantes (formato, largura) → bytes de um dos três tipos
+  ("media", "max", "min"), usadas pela rota de imagens do app.
+- gradient_matrices: as mesmas matrizes mês × ano (e as cores do colormap) em JSON
+  compacto, para o desenho no navegador (static/js/gradientHeatmap.js) sem Matplotlib.
+- Agregação do cubo, pivots, desenho e savefig/codificação são seções medidas pelo perfil
+  de requisições (utils/perfil.py); a seção da figura inclui a agregação e os pivots dela.
 ============================================
 """
 
 import os
-import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # usa backend 'Agg' para renderizar figuras em background (sem display)
 import matplotlib.pyplot as plt
 import numpy as np
-import base64
 from io import BytesIO
+from PIL import Image
 from matplotlib.colors import LinearSegmentedColormap
 
+from config import CUBO_ESTATISTICAS_PATH
+from utils.cubo import obter_cubo
+from utils.perfil import medir
+
 # -----------------------------------------------------------------------------
 # Constantes de cores para os gradientes de classificação de qualidade do ar
 # -----------------------------------------------------------------------------
@@ -44,25 +52,44 @@ _CMAP_MEAN = LinearSegmentedColormap.from_list("mean", _COLORS)
 _CMAP_MAX  = LinearSegmentedColormap.from_list("max",  _COLORS[1:])   # exclui o primeiro verde escuro
 _CMAP_MIN  = LinearSegmentedColormap.from_list("min",  _COLORS[:-1])  # exclui o vermelho intenso
 
-def _encode_figure_to_datauri(fig):
+def _encode_figure_variants(fig, formatos, larguras, dpi, qualidade):
     """
-    Converte uma figura Matplotlib em uma URI de dados Base64 PNG.
-    - Salva a figura em um buffer em memória.
-    - Fecha a figura para liberar recursos.
-    - Retorna string 'data:image/png;base64,...' pronta para uso em <img src="...">.
+    Renderiza a figura uma única vez (PNG em 'dpi') e gera as variantes pedidas:
+    - cada largura (px) é obtida reduzindo a imagem base (Lanczos), sem redesenhar a figura;
+      larguras maiores que a base são servidas no tamanho da base (sem ampliar);
+    - "webp" usa a 'qualidade' informada; "png" é regravado com otimização.
+    Retorna dicionário (formato, largura) → bytes.
     """
     buf = BytesIO()
-    fig.savefig(
-        buf,
-        format='png',
-        bbox_inches='tight',               # elimina margens em branco
-        facecolor=fig.get_facecolor()      # preserva cor de fundo da figura
-    )
-    plt.close(fig)                         # fecha a figura para não acumular na memória
+    with medir("gradiente.savefig"):
+        fig.savefig(
+            buf,
+            format='png',
+            dpi=dpi,
+            bbox_inches='tight',
+            facecolor=fig.get_facecolor()
+        )
+    plt.close(fig)
     buf.seek(0)
-    # codifica o conteúdo do buffer em Base64
-    data = base64.b64encode(buf.read()).decode('utf-8')
-    return f"data:image/png;base64,{data}"
+    with Image.open(buf) as img:
+        base = img.convert("RGB")  # fundo opaco: o canal alfa só aumentaria os arquivos
+
+    variantes = {}
+    with medir("gradiente.variantes"):
+        for largura in larguras:
+            if largura >= base.width:
+                img = base
+            else:
+                altura = max(1, round(base.height * largura / base.width))
+                img = base.resize((largura, altura), Image.LANCZOS)
+            for formato in formatos:
+                out = BytesIO()
+                if formato == "webp":
+                    img.save(out, "WEBP", quality=qualidade, method=6)
+                else:
+                    img.save(out, "PNG", optimize=True)
+                variantes[(formato, largura)] = out.getvalue()
+    return variantes
 
 def _style_axes(ax):
     """
@@ -94,6 +121,16 @@ def _style_colorbar(cbar):
     cbar.ax.yaxis.set_tick_params(labelcolor=_WHITE, labelsize=12)
     cbar.ax.set_facecolor(_DARK_BG)
 
+def _pivot(df, values_col):
+    """Tabela pivot com meses nas linhas, anos nas colunas e média dos valores."""
+    with medir("gradiente.pivot"):
+        return df.pivot_table(
+            index='month',
+            columns='year',
+            values=values_col,
+            aggfunc='mean'
+        ).sort_index()
+
 def _make_heatmap(df, values_col, title, cmap):
     """
     Desenha um heatmap para os valores médios mensais de um poluente ao longo dos anos.
@@ -104,13 +141,7 @@ def _make_heatmap(df, values_col, title, cmap):
     - title (str): título do heatmap.
     - cmap: colormap Matplotlib a ser usado.
     """
-    # monta tabela pivot com meses nas linhas, anos nas colunas e média dos valores
-    pivot = df.pivot_table(
-        index='month',
-        columns='year',
-        values=values_col,
-        aggfunc='mean'
-    ).sort_index()
+    pivot = _pivot(df, values_col)
 
     ax = plt.gca()  # pega o eixo atual para plotagem
     # plota matriz de valores como imagem, com origem "lower" para mês 1 embaixo
@@ -140,34 +171,30 @@ def _make_heatmap(df, values_col, title, cmap):
     cbar = plt.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
     _style_colorbar(cbar)  # aplica estilo ao colorbar
 
-def generate_gradient_image(csv_path):
+def _monthly_values(cubo_path, serie, suffix):
+    """
+    Valores mensais × anuais dos três poluentes a partir do cubo de estatísticas.
+    - serie: série derivada entre estações ("media_estacoes", "max_estacoes" ou "min_estacoes").
+    - Cada linha é um (ano, mês) com a média dos valores horários da série no mês;
+      as colunas de valores se chamam '<poluente><suffix>' (ex.: 'MP10_mean').
+    """
+    with medir("gradiente.cubo"):
+        tabela = obter_cubo(cubo_path).tabela(manter=("poluente", "ano", "mes"), serie=[serie])
+    with medir("gradiente.pivot"):
+        df = tabela.pivot(index=["ano", "mes"], columns="poluente", values="media")
+    df.columns = [f"{pollutant}{suffix}" for pollutant in df.columns]
+    return df.reset_index().rename(columns={"ano": "year", "mes": "month"})
+
+def _figure_mean(cubo_path=CUBO_ESTATISTICAS_PATH):
     """
     Gera um colormap em gradiente para IQAr (MP2.5, MP10) e PTS.
-    - Lê arquivo CSV com timestamp e valores médios por estação.
-    - Calcula média mensal × anual para cada poluente.
+    - Lê do cubo de estatísticas a média mensal × anual da média entre estações.
     - Plota três heatmaps lado a lado com tema escuro.
-    - Retorna imagem codificada em data URI (Base64 PNG).
+    - Retorna a figura Matplotlib.
     """
-    # carrega dados e define timestamp como índice
-    df = pd.read_csv(csv_path, parse_dates=['timestamp']).set_index('timestamp')
-
-    # calcula, para cada poluente, a média diária média de todas as estações
-    for pollutant, suffix in [
-        ("MP2.5", "_MP2.5_media"),
-        ("MP10",  "_MP10_media"),
-        ("PTS",   "_PTS_media")
-    ]:
-        # seleciona colunas que terminam com o sufixo
-        cols = [c for c in df.columns if c.endswith(suffix)]
-        # empilha por estação, converte em numérico e calcula a média diária
-        df[f"{pollutant}_mean"] = (
-            pd.to_numeric(df[cols].stack(), errors='coerce')
-              .unstack()
-              .mean(axis=1)
-        )
-
-    # extrai ano e mês a partir do índice de datas
-    df['year'], df['month'] = df.index.year, df.index.month
+    # médias mensais × anuais da série 'media_estacoes' (média entre as estações a cada hora),
+    # lidas do cubo de estatísticas pré-agregadas
+    df = _monthly_values(cubo_path, "media_estacoes", "_mean")
 
     # cria figura com 3 subplots (um para cada poluente)
     fig, axes = plt.subplots(
@@ -187,40 +214,22 @@ def generate_gradient_image(csv_path):
     plt.sca(axes[2])
     _make_heatmap(df, "PTS_mean",   "PTS Média",        _CMAP_MEAN)
 
-    # converte figura para data URI e retorna para uso inline em HTML
-    return _encode_figure_to_datauri(fig)
+    return fig
 
-def generate_max_gradient_image(csv_path):
+def _figure_max(cubo_path=CUBO_ESTATISTICAS_PATH):
     """
     Gera mapa de calor com os valores MÁXIMOS mensais × anuais para MP2.5, MP10 e PTS.
     Utiliza o colormap _CMAP_MAX (sem o verde mais escuro).
     
     Parâmetros:
-    - csv_path (str): caminho para o CSV de dados com timestamp e valores por estação.
+    - cubo_path (str): caminho do cubo de estatísticas (cubo_estatisticas.npz).
     
     Retorna:
-    - data URI contendo uma imagem PNG Base64 do gráfico gerado.
+    - a figura Matplotlib do gráfico gerado.
     """
-    # carrega dados e define timestamp como índice
-    df = pd.read_csv(csv_path, parse_dates=['timestamp']).set_index('timestamp')
-
-    # para cada poluente, calcula o valor máximo diário entre todas as estações
-    for pollutant, suffix in [
-        ("MP2.5", "_MP2.5_media"),
-        ("MP10",  "_MP10_media"),
-        ("PTS",   "_PTS_media")
-    ]:
-        # seleciona as colunas daquele poluente
-        cols = [c for c in df.columns if c.endswith(suffix)]
-        # empilha por estação, converte em numérico e extrai o máximo ao longo das colunas
-        df[f"{pollutant}_max"] = (
-            pd.to_numeric(df[cols].stack(), errors='coerce')
-              .unstack()
-              .max(axis=1)
-        )
-
-    # extrai ano e mês para agrupamento no heatmap
-    df['year'], df['month'] = df.index.year, df.index.month
+    # médias mensais × anuais da série 'max_estacoes' (máximo entre as estações a cada hora),
+    # lidas do cubo de estatísticas pré-agregadas
+    df = _monthly_values(cubo_path, "max_estacoes", "_max")
 
     # cria figura com 3 subplots (um para cada poluente) e tema escuro
     fig, axes = plt.subplots(
@@ -240,40 +249,22 @@ def generate_max_gradient_image(csv_path):
     plt.sca(axes[2])
     _make_heatmap(df, "PTS_max",   "PTS Máximo",        _CMAP_MAX)
 
-    # retorna a figura codificada como data URI para uso inline
-    return _encode_figure_to_datauri(fig)
+    return fig
 
-def generate_min_gradient_image(csv_path):
+def _figure_min(cubo_path=CUBO_ESTATISTICAS_PATH):
     """
     Gera mapa de calor com os valores MÍNIMOS mensais × anuais para MP2.5, MP10 e PTS.
     Utiliza o colormap _CMAP_MIN (sem o vermelho mais intenso).
     
     Parâmetros:
-    - csv_path (str): caminho para o CSV de dados com timestamp e valores por estação.
+    - cubo_path (str): caminho do cubo de estatísticas (cubo_estatisticas.npz).
     
     Retorna:
-    - data URI contendo uma imagem PNG Base64 do gráfico gerado.
+    - a figura Matplotlib do gráfico gerado.
     """
-    # carrega dados e define timestamp como índice
-    df = pd.read_csv(csv_path, parse_dates=['timestamp']).set_index('timestamp')
-
-    # para cada poluente, calcula o valor mínimo diário entre todas as estações
-    for pollutant, suffix in [
-        ("MP2.5", "_MP2.5_media"),
-        ("MP10",  "_MP10_media"),
-        ("PTS",   "_PTS_media")
-    ]:
-        # seleciona as colunas daquele poluente
-        cols = [c for c in df.columns if c.endswith(suffix)]
-        # empilha por estação, converte em numérico e extrai o mínimo ao longo das colunas
-        df[f"{pollutant}_min"] = (
-            pd.to_numeric(df[cols].stack(), errors='coerce')
-              .unstack()
-              .min(axis=1)
-        )
-
-    # extrai ano e mês para agrupamento no heatmap
-    df['year'], df['month'] = df.index.year, df.index.month
+    # médias mensais × anuais da série 'min_estacoes' (mínimo entre as estações a cada hora),
+    # lidas do cubo de estatísticas pré-agregadas
+    df = _monthly_values(cubo_path, "min_estacoes", "_min")
 
     # cria figura com 3 subplots (um para cada poluente) e tema escuro
     fig, axes = plt.subplots(
@@ -293,5 +284,57 @@ def generate_min_gradient_image(csv_path):
     plt.sca(axes[2])
     _make_heatmap(df, "PTS_min",   "PTS Mínimo",        _CMAP_MIN)
 
-    # retorna a figura codificada como data URI para uso inline
-    return _encode_figure_to_datauri(fig)
+    return fig
+
+# Figuras de cada tipo de gradiente
+_FIGURAS = {
+    "media": _figure_mean,
+    "max":   _figure_max,
+    "min":   _figure_min,
+}
+
+def render_gradient_images(tipo, cubo_path=CUBO_ESTATISTICAS_PATH,
+                           formatos=("webp", "png"), larguras=(1200,), dpi=100, qualidade=80):
+    """
+    Variantes servidas por URL de um tipo de gradiente ("media", "max" ou "min"):
+    dicionário (formato, largura) → bytes da imagem.
+    """
+    with medir("gradiente.figura"):
+        fig = _FIGURAS[tipo](cubo_path)
+    return _encode_figure_variants(fig, formatos, larguras, dpi, qualidade)
+
+# Série do cubo, sufixo das colunas, cores do colormap e painéis (poluente, título) de cada tipo
+_MATRIZES = {
+    "media": ("media_estacoes", "_mean", _COLORS,
+              (("MP2.5", "MP2.5 IQAr Média"), ("MP10", "MP10 IQAr Média"), ("PTS", "PTS Média"))),
+    "max":   ("max_estacoes", "_max", _COLORS[1:],
+              (("MP2.5", "MP2.5 IQAr Máximo"), ("MP10", "MP10 IQAr Máximo"), ("PTS", "PTS Máximo"))),
+    "min":   ("min_estacoes", "_min", _COLORS[:-1],
+              (("MP2.5", "MP2.5 IQAr Mínimo"), ("MP10", "MP10 IQAr Mínimo"), ("PTS", "PTS Mínimo"))),
+}
+
+def gradient_matrices(tipo, cubo_path=CUBO_ESTATISTICAS_PATH):
+    """
+    Matrizes dos heatmaps de um tipo de gradiente para renderização no cliente.
+    - Cada painel traz meses (linhas, de baixo para cima), anos (colunas), os valores
+      arredondados a 2 casas (None = sem dados) e os limites da escala de cores.
+    - 'cores' são as paradas do colormap (igualmente espaçadas, como no Matplotlib).
+    """
+    serie, suffix, cores, paineis = _MATRIZES[tipo]
+    df = _monthly_values(cubo_path, serie, suffix)
+
+    resultado = []
+    for pollutant, title in paineis:
+        pivot = _pivot(df, f"{pollutant}{suffix}")
+        valores = np.round(pivot.to_numpy(dtype=float), 2)
+        validos = valores[~np.isnan(valores)]
+        resultado.append({
+            "poluente": pollutant,
+            "titulo":   title,
+            "meses":    [int(m) for m in pivot.index],
+            "anos":     [int(a) for a in pivot.columns],
+            "valores":  [[None if np.isnan(v) else float(v) for v in linha] for linha in valores],
+            "vmin":     float(validos.min()) if len(validos) else None,
+            "vmax":     float(validos.max()) if len(validos) else None,
+        })
+    return {"tipo": tipo, "cores": list(cores), "fundo": _DARK_BG, "paineis": resultado}
@@ -3,91 +3,79 @@
 Arquivo: visualization_plotly.py
 --------------------------------------------
 Preparação e geração de gráficos 3D interativos Plotly:
-- _load_data: carrega CSV resumido, parseia timestamp, extrai ano/mês,
-  calcula médias mensais de MP10 e MP2.5 por estação.
-- _DATA: cache global dos dados processados.
+- _load_data: médias mensais de MP10 e MP2.5 por estação, lidas do cubo de
+  estatísticas pré-agregadas (utils/cubo.py).
+- _dados: cache global dos dados processados, recarregado quando o cubo
+  muda em disco (o processo não precisa ser reiniciado após uma reconstrução).
 - generate_plotly_html: decora e retorna HTML embed de gráfico 3D Plotly
   com superfícies por estação e ano, configura layout, cores e hovertemplate.
-- Usa lru_cache para evitar recálculo ao mudar apenas a métrica.
+- O HTML não é guardado aqui: o cache por (métrica, versão do cubo) é o single-flight
+  de utils/artefatos.py.
 ============================================
 """
 
-import os
-import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from functools import lru_cache
+from utils.classifica import ESTACOES
+from utils.single_flight import versao_dataset
+from utils.cubo import obter_cubo
+from config import CUBO_ESTATISTICAS_PATH
 
 def _load_data():
     """
-    Carrega e prepara os dados do arquivo CSV 'database_resumido.csv' para geração de gráficos Plotly.
+    Prepara os dados dos gráficos Plotly a partir do cubo de estatísticas pré-agregadas.
     
-    - Lê o CSV, converte a coluna 'timestamp' em índice datetime.
-    - Extrai ano e mês como colunas separadas.
-    - Para cada estação, agrupa médias mensais de MP10 e MP2.5.
+    - As médias mensais por estação/ano saem do roll-up (série, poluente, ano, mês) do cubo,
+      sem reler os dados horários.
     - Retorna um dicionário contendo:
         * "mp10": DataFrame com médias mensais de MP10 por estação/ano/mês
         * "mp2.5": DataFrame com médias mensais de MP2.5 por estação/ano/mês
         * "stations": lista de estações processadas
-        * "years": lista de anos encontrados no índice
+        * "years": lista de anos presentes nos dados
     """
-    # Caminho absoluto até este arquivo
-    base_dir = os.path.dirname(__file__)
-    # Constrói o caminho até o CSV de dados resumidos
-    csv_path = os.path.abspath(
-        os.path.join(base_dir, '..', '..', 'tratamento-dos-dados', 'database_resumido.csv')
-    )
-
-    # Lê o CSV em DataFrame, parsing da coluna 'timestamp' como datetime
-    df = pd.read_csv(csv_path, parse_dates=["timestamp"])
-    # Define 'timestamp' como índice do DataFrame
-    df.set_index("timestamp", inplace=True)
-    # Adiciona colunas auxiliares para ano e mês
-    df["year"]  = df.index.year
-    df["month"] = df.index.month
-
-    # Lista fixa de estações a serem incluídas na análise
-    stations = ["EAMA11","EAMA21","EAMA31","EAMA41"]
+    # Estações vindas do registro (estacoes.json)
+    stations = list(ESTACOES)
+    cubo = obter_cubo(CUBO_ESTATISTICAS_PATH)
 
-    def prepare(suffix):
+    def prepare(pollutant):
         """
-        Preparação de dados para um indicador (suffix):
-        
-        - Itera sobre cada estação em 'stations'.
-        - Converte a coluna específica (e.g. 'EAMA11_MP10_media') para numérico.
-        - Monta um DataFrame temporário com colunas: value, year, month, station.
-        - Concatena todos os DataFrames e calcula média por (year, station, month).
+        Médias mensais de um poluente: colunas year, station, month e value
+        (NaN nos meses sem dados válidos).
         """
-        recs = []
-        for st in stations:
-            # Tenta converter valores para numérico, valores inválidos viram NaN
-            ser = pd.to_numeric(df[f"{st}_{suffix}"], errors="coerce")
-            # Cria DataFrame temporário com colunas padronizadas
-            recs.append(pd.DataFrame({
-                "value":   ser,
-                "year":    df["year"],
-                "month":   df["month"],
-                "station": st
-            }))
-        # Concatena todos e agrupa por ano, estação e mês, calculando média
-        return (
-            pd.concat(recs, ignore_index=True)
-              .groupby(["year", "station", "month"], as_index=False)
-              .mean()
+        tabela = cubo.tabela(
+            manter=("serie", "ano", "mes"),
+            serie=stations,
+            poluente=[pollutant]
         )
+        return tabela.rename(columns={
+            "serie": "station", "ano": "year", "mes": "month", "media": "value"
+        })[["year", "station", "month", "value"]]
 
     # Chama 'prepare' para MP10 e MP2.5 e retorna dicionário com resultados
     return {
-        "mp10":     prepare("MP10_media"),
-        "mp2.5":    prepare("MP2.5_media"),
+        "mp10":     prepare("MP10"),
+        "mp2.5":    prepare("MP2.5"),
         "stations": stations,
-        "years":    sorted(df.index.year.unique())
+        "years":    cubo.rotulos["ano"]
     }
 
-# Carrega uma vez os dados preparados para uso nas gerações de gráficos
-_DATA = _load_data()
+# Dados preparados e a versão do cubo da qual vieram (carregados sob demanda)
+_DATA = None
+_DATA_VERSAO = None
+
+def _dados():
+    """
+    Retorna os dados preparados e sua versão, recarregando-os apenas quando a versão
+    do cubo de estatísticas (hash de conteúdo do manifesto, ver versao_dataset) muda.
+    """
+    global _DATA, _DATA_VERSAO
+    versao = versao_dataset(CUBO_ESTATISTICAS_PATH)
+    data = _DATA
+    if data is None or versao != _DATA_VERSAO:
+        data = _load_data()
+        _DATA, _DATA_VERSAO = data, versao
+    return data, versao
 
-@lru_cache(maxsize=32)
 def generate_plotly_html(metric: str) -> str:
     """
     Gera o HTML embutido de um gráfico Plotly 3D para o indicador especificado.
@@ -98,12 +86,20 @@ def generate_plotly_html(metric: str) -> str:
     Retorna:
     - String HTML com a figura Plotly pronta para ser inserida em template.
     """
+    data, _ = _dados()
+    return _render(metric, data)
+
+def _render(metric, data):
+    """
+    Renderiza o gráfico a partir de 'data' (o retorno de _dados() lido uma única vez, para
+    que uma recarga concorrente de _DATA não misture duas versões do cubo).
+    """
     # Obtém o DataFrame agrupado conforme o indicador escolhido
-    grouped  = _DATA[metric]
+    grouped  = data[metric]
     # Meses do ano (1 a 12) e listas de estações e anos disponíveis
     months   = list(range(1, 13))
-    stations = _DATA["stations"]
-    years    = _DATA["years"]
+    stations = data["stations"]
+    years    = data["years"]
 
     # Espaçamento e espessura das camadas no eixo Y
     spacing   = 1.2
@@ -3,62 +3,100 @@
 Arquivo: classifica.py
 --------------------------------------------
 Define funções para cálculo do Índice de Qualidade do Ar (IQAr):
-- Dicionário de parâmetros (faixas de concentração e índices) para MP2.5 e MP10.
+- carregar_faixas: lê as faixas de concentração/índice de cada poluente (faixas_iqar.json,
+  com a janela de média de cada um) e as compila em arrays NumPy (TabelaFaixas):
+  a faixa de qualquer valor ou coluna é um único searchsorted, seguido de interpolação.
+- PARAMS: poluente → TabelaFaixas (poluentes sem tabela, como PTS, só recebem média).
+- carregar_estacoes: lê o registro de estações (estacoes.json) e calcula o layout
+  de colunas de cada estação/poluente, inclusive as colunas da linha 12:00:00.
 - get_parameter_range: busca faixas de concentração/índice.
 - calculate_IQAr: calcula IQAr e retorna parâmetros de interpolação.
 - classify_air_quality: mapeia valor de IQAr para categoria qualitativa.
+- calcular_iqar_array / classificar_iqar_array: as mesmas contas para colunas inteiras.
 - parse_date_time: converte strings de data/hora para datetime.
 - extract_valid_values: filtra valores numéricos de série.
-- classify_air: orquestra leitura de CSV, seleção de dados por horário,
-  cálculo de médias, IQAr e classificação final para MP10, MP2.5 e PTS.
+- IndicePrefixos: somas e contagens de válidos acumuladas por coluna sobre a grade
+  horária; a média/contagem de qualquer janela são duas subtrações (pontual ou móvel).
+- minimo_validos / limites_periodo: regra de mínimo de amostras e limites de mês/ano.
+- ler_janela_csv: lê do CSV os valores de uma estação na janela de 24 h.
+- Leitura do CSV, filtro da janela e cálculo das médias são seções medidas pelo perfil de
+  requisições do app (utils/perfil.py); fora do app, medir é um contexto vazio.
+- classify_air: orquestra a leitura da janela (CSV, outro leitor plugável como o
+  backend SQLite, ou um IndicePrefixos já montado), cálculo de médias (na janela de
+  cada poluente), IQAr e classificação final de cada poluente.
+- resultado_classificacao / resultado_medias: médias, IQAr e classificação a partir dos
+  valores de uma janela ou de suas médias e contagens.
 - Permite execução standalone via CLI para testes rápidos.
 ============================================
 """
 
+import json
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from config import ESTACOES_PATH, FAIXAS_IQAR_PATH
 
-# Dicionário de parâmetros: limites de concentração e índices para cada poluente.
-PARAMS = {
-    "MP2.5": {
-        "concentration_ranges": [
-            (25, (0, 25)),
-            (50, (26, 50)),
-            (75, (51, 75)),
-            (125, (76, 125)),
-            (float("inf"), (126, 300))
-        ],
-        "indices": [
-            (25, (0, 40)),
-            (50, (41, 80)),
-            (75, (81, 120)),
-            (125, (121, 200)),
-            (float("inf"), (201, 400))
-        ]
-    },
-    "MP10": {
-        "concentration_ranges": [
-            (50, (0, 50)),
-            (100, (51, 100)),
-            (150, (101, 150)),
-            (250, (151, 250)),
-            (float("inf"), (251, 600))
-        ],
-        "indices": [
-            (50, (0, 40)),
-            (100, (41, 80)),
-            (150, (81, 120)),
-            (250, (121, 200)),
-            (float("inf"), (201, 400))
-        ]
+try:
+    from utils.perfil import medir
+except ImportError:  # pipeline de tratamento: sem perfil de requisições
+    from contextlib import nullcontext as medir
+
+class TabelaFaixas:
+    """
+    Faixas de IQAr de um poluente compiladas em arrays NumPy.
+
+    Cada faixa é (C_ini, C_fin, I_ini, I_fin). Um valor pertence à primeira faixa cujo
+    C_fin é maior ou igual a ele (a última faixa é aberta), então a faixa de um valor
+    ou de uma coluna inteira é um único np.searchsorted sobre os limites.
+    """
+
+    def __init__(self, poluente, faixas, janela_horas, unidade=None):
+        self.poluente = poluente
+        self.janela_horas = janela_horas
+        self.unidade = unidade
+        # Valores originais do JSON (int/float nativos), devolvidos nas respostas
+        self.faixas = [tuple(f) for f in faixas]
+        self.nativos = np.empty((len(faixas), 4), dtype=object)
+        self.nativos[:] = self.faixas
+        self.C_ini, self.C_fin, self.I_ini, self.I_fin = np.array(faixas, dtype=float).T
+        self.limites = np.append(self.C_fin[:-1], np.inf)
+
+    def faixa(self, valores):
+        """Índice da faixa de cada valor (NaN cai na última faixa; trate-o antes)."""
+        return np.minimum(np.searchsorted(self.limites, valores, side="left"), len(self.limites) - 1)
+
+    def iqar(self, valores, k=None):
+        """Interpolação linear do IQAr dentro da faixa de cada valor."""
+        k = self.faixa(valores) if k is None else k
+        return self.I_ini[k] + ((self.I_fin[k] - self.I_ini[k]) / (self.C_fin[k] - self.C_ini[k])) * (valores - self.C_ini[k])
+
+def carregar_faixas(path=FAIXAS_IQAR_PATH):
+    """
+    Lê faixas_iqar.json e compila as tabelas.
+
+    Retorna:
+      - tabelas: dicionário poluente → TabelaFaixas.
+      - categorias: (limites, nomes) — o IQAr cai na primeira categoria cujo limite é
+        maior ou igual a ele; a última categoria (limite null) é aberta.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+
+    tabelas = {
+        pol: TabelaFaixas(pol, p["faixas"], p["janela_horas"], p.get("unidade"))
+        for pol, p in cfg["poluentes"].items()
     }
-}
+    limites = np.array([lim for lim, _ in cfg["categorias"][:-1]], dtype=float)
+    nomes = np.array([nome for _, nome in cfg["categorias"]], dtype=object)
+    return tabelas, (limites, nomes)
+
+# Tabelas de faixas por poluente e categorias de IQAr (carregadas uma vez)
+PARAMS, CATEGORIAS_IQAR = carregar_faixas()
 
 def get_parameter_range(value, pollutant_type, key):
     """
     Busca a faixa (concentração ou índice) para o valor informado, 
-    baseado no dicionário de parâmetros.
+    baseado nas tabelas de faixas.
     
     Parâmetros:
       - value: valor medido.
@@ -67,11 +105,8 @@ def get_parameter_range(value, pollutant_type, key):
     
     Retorna a tupla com os limites da faixa.
     """
-    for limit, range_tuple in PARAMS[pollutant_type][key]:
-        if value <= limit:
-            return range_tuple
-    # Caso não encontre, pode retornar o último ou lançar erro.
-    return PARAMS[pollutant_type][key][-1][1]
+    C_ini, C_fin, I_ini, I_fin = PARAMS[pollutant_type].faixas[int(PARAMS[pollutant_type].faixa(value))]
+    return (C_ini, C_fin) if key == "concentration_ranges" else (I_ini, I_fin)
 
 def calculate_IQAr(value, pollutant_type):
     """
@@ -80,8 +115,8 @@ def calculate_IQAr(value, pollutant_type):
     """
     if pd.isna(value):
         return "Não Representa", None, None, None, None
-    C_ini, C_fin = get_parameter_range(value, pollutant_type, "concentration_ranges")
-    I_ini, I_fin = get_parameter_range(value, pollutant_type, "indices")
+    tabela = PARAMS[pollutant_type]
+    C_ini, C_fin, I_ini, I_fin = tabela.faixas[int(tabela.faixa(value))]
     iqar = I_ini + ((I_fin - I_ini) / (C_fin - C_ini)) * (value - C_ini)
     return iqar, I_ini, I_fin, C_ini, C_fin
 
@@ -107,38 +142,276 @@ def classify_air_quality(iqar):
     """
     if iqar == "Não Representa":
         return iqar
+    limites, nomes = CATEGORIAS_IQAR
+    return nomes[np.searchsorted(limites, iqar, side="left")]
+
+def calcular_iqar_array(valores, pollutant_type):
+    """
+    Versão vetorizada de calculate_IQAr para um array de médias (sem NaN).
+    Retorna (iqar, I_ini, I_fin, C_ini, C_fin); os limites vêm como arrays de objetos
+    com os valores nativos do JSON, como na versão escalar.
+    """
+    tabela = PARAMS[pollutant_type]
+    k = tabela.faixa(valores)
+    C_ini, C_fin, I_ini, I_fin = tabela.nativos[k].T
+    return tabela.iqar(valores, k), I_ini, I_fin, C_ini, C_fin
+
+def classificar_iqar_array(iqar):
+    """Versão vetorizada de classify_air_quality (array de objetos com as categorias)."""
+    limites, nomes = CATEGORIAS_IQAR
+    return nomes[np.searchsorted(limites, iqar, side="left")]
+
+def carregar_estacoes(path=ESTACOES_PATH):
+    """
+    Lê o registro de estações e calcula o layout de colunas do database.csv.
+
+    O JSON define a primeira coluna de dados, quantas colunas cada estação ocupa,
+    o deslocamento de cada poluente dentro do bloco da estação e o deslocamento
+    extra das colunas usadas na linha "12:00:00" (médias de 24 h).
+
+    Retorna:
+      - estacoes: lista com os códigos das estações, na ordem do arquivo.
+      - poluentes: lista dos poluentes presentes em cada bloco.
+      - mapping: dicionário estação → tipo de linha → poluente → coluna.
+      - indices: dicionário tipo de linha → array (n_estacoes × n_poluentes) de colunas.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+
+    estacoes  = list(cfg["estacoes"])
+    poluentes = list(cfg["poluentes"])
+    deslocamentos = np.array([cfg["poluentes"][p] for p in poluentes])
+    inicio_bloco  = cfg["primeira_coluna"] + cfg["colunas_por_estacao"] * np.arange(len(estacoes))
 
-    thresholds = [
-        (40, "BOA"),
-        (80, "MODERADA"),
-        (120, "RUIM"),
-        (200, "MUITO RUIM")
-    ]
-
-    for limit, category in thresholds:
-        if iqar <= limit:
-            return category
-    return "PÉSSIMA"
-
-# Mapeamento das colunas para cada estação e tipo de linha
-columns_mapping = {
-    "EAMA11": {
-        "normal": {"PTS": 1, "MP10": 5, "MP2.5": 9},
-        "12:00:00": {"PTS": 3, "MP10": 7, "MP2.5": 11}
-    },
-    "EAMA21": {
-        "normal": {"PTS": 13, "MP10": 17, "MP2.5": 21},
-        "12:00:00": {"PTS": 15, "MP10": 19, "MP2.5": 23}
-    },
-    "EAMA31": {
-        "normal": {"PTS": 25, "MP10": 29, "MP2.5": 33},
-        "12:00:00": {"PTS": 27, "MP10": 31, "MP2.5": 35}
-    },
-    "EAMA41": {
-        "normal": {"PTS": 37, "MP10": 41, "MP2.5": 45},
-        "12:00:00": {"PTS": 39, "MP10": 43, "MP2.5": 47}
+    normal = inicio_bloco[:, None] + deslocamentos[None, :]
+    indices = {
+        "normal":   normal,
+        "12:00:00": normal + cfg["deslocamento_12h"],
     }
-}
+    mapping = {
+        st: {rt: dict(zip(poluentes, cols[i].tolist())) for rt, cols in indices.items()}
+        for i, st in enumerate(estacoes)
+    }
+    return estacoes, poluentes, mapping, indices
+
+# Registro carregado uma vez: estações, poluentes e mapeamento das colunas por tipo de linha
+ESTACOES, POLUENTES_COLUNAS, columns_mapping, INDICES_COLUNAS = carregar_estacoes()
+
+# Média de 24 h: duração da janela e mínimo de valores válidos exigidos
+HORAS_MEDIA = 24
+MINIMO_VALIDOS_MEDIA = 16
+
+# Janelas móveis usuais (em horas) para o índice de somas acumuladas
+JANELAS_HORAS = {"1h": 1, "8h": 8, "24h": 24}
+
+def minimo_validos(horas):
+    """
+    Mínimo de valores válidos para uma janela de 'horas' horas, na mesma proporção
+    da média de 24 h (16 de 24): 1 h → 1, 8 h → 6, 24 h → 16.
+    """
+    return max(1, -(-horas * MINIMO_VALIDOS_MEDIA // HORAS_MEDIA))
+
+def janela_poluente(pollutant):
+    """Duração (h) da média de um poluente: a da sua tabela de faixas, senão a de 24 h."""
+    tabela = PARAMS.get(pollutant)
+    return tabela.janela_horas if tabela else HORAS_MEDIA
+
+# Janela e mínimo de válidos de cada coluna de poluente, na ordem de POLUENTES_COLUNAS
+JANELAS_POLUENTES = np.array([janela_poluente(p) for p in POLUENTES_COLUNAS])
+MINIMOS_POLUENTES = np.array([minimo_validos(h) for h in JANELAS_POLUENTES])
+
+# Ordem dos poluentes nos resultados: com IQAr primeiro (MP10, MP2.5, ...), depois os demais (PTS)
+ORDEM_POLUENTES = sorted(range(len(POLUENTES_COLUNAS)), key=lambda j: POLUENTES_COLUNAS[j] not in PARAMS)
+
+def medias_por_poluente(resumo_janela):
+    """
+    Médias e contagens de válidos de cada poluente, cada um na sua janela.
+    'resumo_janela(horas)' devolve (linhas, soma, validos) da janela de 'horas' horas, com
+    os poluentes no último eixo; é chamado uma vez por duração distinta.
+    Retorna (linhas da janela mais longa, medias, validos).
+    """
+    linhas = 0
+    medias = validos = None
+    for horas in np.unique(JANELAS_POLUENTES)[::-1]:
+        n, soma, v = resumo_janela(int(horas))
+        if medias is None:
+            linhas = n
+            medias = np.full(np.shape(soma), np.nan)
+            validos = np.zeros(np.shape(v), dtype=np.int64)
+        cols = JANELAS_POLUENTES == horas
+        medias[..., cols] = media_acumulada(soma[..., cols], v[..., cols])
+        validos[..., cols] = v[..., cols]
+    return linhas, medias, validos
+
+def limites_periodo(ano, mes=None, ms_str="30:00"):
+    """
+    Primeiro e último horário (com os minutos:segundos ms_str) de um mês ou, sem 'mes',
+    de um ano inteiro — para consultas mensais/anuais no IndicePrefixos.
+    """
+    minuto, segundo = (int(x) for x in ms_str.split(":"))
+    inicio = datetime(ano, mes or 1, 1, 0, minuto, segundo)
+    if mes is None or mes == 12:
+        proximo = datetime(ano + 1, 1, 1, 0, minuto, segundo)
+    else:
+        proximo = datetime(ano, mes + 1, 1, 0, minuto, segundo)
+    return inicio, proximo - timedelta(hours=1)
+
+def _soma_compensada(valores):
+    """
+    Soma acumulada (ao longo do eixo 0) e o erro acumulado de arredondamento de cada passo,
+    obtido pelo TwoSum entre a soma anterior e o valor somado.
+    """
+    soma = np.cumsum(valores, axis=0)
+    anterior, atual, x = soma[:-1], soma[1:], valores[1:]
+    parcela = atual - anterior
+    erro = (anterior - (atual - parcela)) + (x - parcela)
+    return soma, np.concatenate([np.zeros_like(soma[:1]), np.cumsum(erro, axis=0)])
+
+def _segundos(instante):
+    """datetime / datetime64 → segundos desde a época (int)."""
+    return int(np.datetime64(instante, "s").astype(np.int64))
+
+class IndicePrefixos:
+    """
+    Somas e contagens acumuladas por coluna sobre a grade horária canônica.
+
+    A janela de uma média só considera registros com os mesmos minutos:segundos do
+    horário alvo, então cada "fase" (segundos dentro da hora) tem sua própria grade
+    horária densa, do primeiro ao último registro daquela fase. Em cada grade são
+    guardados, com uma posição extra no início (zero):
+      - linhas: quantos registros existem até a hora;
+      - soma:   soma acumulada dos valores válidos (NaN conta como 0), com o erro de
+                arredondamento de cada passo acumulado à parte (soma compensada), para
+                que a diferença entre posições distantes tenha a precisão de uma soma direta;
+      - validos: contagem acumulada de valores válidos.
+    Assim a soma e a contagem de qualquer janela [inicio, fim] são duas subtrações.
+    """
+
+    def __init__(self, ts, valores):
+        """
+        ts: datetime64 ordenado e sem repetições; valores: float (T × ...), NaN nos ausentes.
+        """
+        self.ts = np.asarray(ts, dtype="datetime64[s]")
+        self.forma = valores.shape[1:]
+        segundos = self.ts.astype(np.int64)
+        fase_ts = segundos % 3600
+        self._fases = {}
+        # Posição de cada timestamp na grade da sua fase (usada pelo cálculo móvel)
+        self._posicao = np.empty(len(self.ts), dtype=np.int64)
+
+        for fase in np.unique(fase_ts):
+            sel = np.flatnonzero(fase_ts == fase)
+            horas = (segundos[sel] - fase) // 3600
+            h0 = int(horas[0])
+            pos = horas - h0
+            n = int(pos[-1]) + 1
+
+            validos = ~np.isnan(valores[sel])
+            linhas = np.zeros(n + 1, dtype=np.int64)
+            soma = np.zeros((n + 1, *self.forma))
+            contagem = np.zeros((n + 1, *self.forma), dtype=np.int64)
+            linhas[pos + 1] = 1
+            soma[pos + 1] = np.where(validos, valores[sel], 0.0)
+            contagem[pos + 1] = validos
+
+            self._fases[int(fase)] = (
+                h0,
+                np.cumsum(linhas),
+                _soma_compensada(soma),
+                np.cumsum(contagem, axis=0),
+            )
+            self._posicao[sel] = pos
+
+    def arrays(self):
+        """Arrays do índice num dicionário plano (ex.: para memória compartilhada); ver de_arrays."""
+        arrays = {
+            "ts": self.ts,
+            "posicao": self._posicao,
+            "forma": np.array(self.forma, dtype=np.int64),
+            "fases": np.array([(fase, h0) for fase, (h0, *_) in self._fases.items()], dtype=np.int64).reshape(-1, 2),
+        }
+        for fase, (_, linhas, (soma, erro), validos) in self._fases.items():
+            arrays.update({
+                f"{fase}/linhas": linhas, f"{fase}/soma": soma,
+                f"{fase}/erro": erro, f"{fase}/validos": validos,
+            })
+        return arrays
+
+    @classmethod
+    def de_arrays(cls, arrays):
+        """Índice montado sobre arrays já calculados (sem copiá-los nem recalcular as somas)."""
+        indice = cls.__new__(cls)
+        indice.ts = arrays["ts"]
+        indice._posicao = arrays["posicao"]
+        indice.forma = tuple(int(n) for n in arrays["forma"])
+        indice._fases = {
+            int(fase): (
+                int(h0),
+                arrays[f"{fase}/linhas"],
+                (arrays[f"{fase}/soma"], arrays[f"{fase}/erro"]),
+                arrays[f"{fase}/validos"],
+            )
+            for fase, h0 in arrays["fases"]
+        }
+        return indice
+
+    def resumo(self, inicio, fim):
+        """
+        (linhas, soma, validos) dos registros em [inicio, fim] com os mesmos minutos:segundos de 'fim'.
+        'soma' e 'validos' têm a forma das colunas indexadas.
+        """
+        fim_s = _segundos(fim)
+        fase = fim_s % 3600
+        if fase not in self._fases:
+            return 0, np.zeros(self.forma), np.zeros(self.forma, dtype=np.int64)
+        h0, linhas, (soma, erro), validos = self._fases[fase]
+        n = len(linhas) - 1
+        # Primeira hora da fase >= inicio e última <= fim, como posições na grade
+        lo = min(max(-((fase - _segundos(inicio)) // 3600) - h0, 0), n)
+        hi = min(max((fim_s - fase) // 3600 - h0 + 1, lo), n)
+        return (
+            int(linhas[hi] - linhas[lo]),
+            (soma[hi] - soma[lo]) + (erro[hi] - erro[lo]),
+            validos[hi] - validos[lo],
+        )
+
+    def janela(self, fim, horas=HORAS_MEDIA):
+        """resumo da janela de 'horas' horas que termina em 'fim' (inclusive)."""
+        inicio = np.datetime64(fim, "s") - np.timedelta64(horas - 1, "h")
+        return self.resumo(inicio, fim)
+
+    def media(self, inicio, fim, minimo=1):
+        """Média e contagem de válidos em [inicio, fim]; NaN onde há menos de 'minimo' válidos."""
+        _, soma, validos = self.resumo(inicio, fim)
+        return media_acumulada(soma, validos, minimo), validos
+
+    def movel(self, horas=HORAS_MEDIA, inicio=0, fim=None):
+        """
+        Resumo da janela de 'horas' horas terminando em cada timestamp do índice, de uma vez:
+        (linhas (T,), soma (T × ...), validos (T × ...)), na ordem de self.ts.
+        'inicio'/'fim' restringem o cálculo às posições self.ts[inicio:fim] (memória
+        proporcional ao trecho, para percorrer o índice em blocos).
+        """
+        ts = self.ts[inicio:fim]
+        posicao = self._posicao[inicio:fim]
+        linhas = np.zeros(len(ts), dtype=np.int64)
+        soma = np.zeros((len(ts), *self.forma))
+        validos = np.zeros((len(ts), *self.forma), dtype=np.int64)
+        fase_ts = ts.astype(np.int64) % 3600
+        for fase, (_, acum_linhas, (acum_soma, acum_erro), acum_validos) in self._fases.items():
+            sel = np.flatnonzero(fase_ts == fase)
+            hi = posicao[sel] + 1
+            lo = np.maximum(hi - horas, 0)
+            linhas[sel] = acum_linhas[hi] - acum_linhas[lo]
+            soma[sel] = (acum_soma[hi] - acum_soma[lo]) + (acum_erro[hi] - acum_erro[lo])
+            validos[sel] = acum_validos[hi] - acum_validos[lo]
+        return linhas, soma, validos
+
+def media_acumulada(soma, validos, minimo=1):
+    """Média a partir de soma e contagem; NaN onde há menos de 'minimo' valores válidos."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = soma / validos
+    return np.where(validos >= minimo, media, np.nan)
 
 def parse_date_time(input_date_str, input_time_str):
     """
@@ -174,11 +447,49 @@ def extract_valid_values(series):
             continue
     return valores
 
-def classify_air(input_date_str, input_time_str, station, database_path="database.csv"):
+def ler_janela_csv(database_path, station, inicio, fim, ms_str, row_type):
+    """
+    Lê o database.csv e retorna os valores (linhas × poluentes) da estação entre
+    inicio e fim (inclusive), apenas nos registros com os minutos:segundos ms_str.
+    Lança ValueError com a mensagem de erro em caso de falha de leitura.
+    """
+    try:
+        with medir("classify_air.read_csv"):
+            df = pd.read_csv(database_path, header=None, skiprows=1, low_memory=False)
+    except Exception as e:
+        raise ValueError(f"Erro ao ler o arquivo CSV: {e}")
+    
+    with medir("classify_air.filtro"):
+        try:
+            df[0] = pd.to_datetime(df[0], format="%Y-%m-%d %H:%M:%S")
+        except Exception as e:
+            raise ValueError(f"Erro ao converter a coluna de timestamp: {e}")
+
+        selected_df = df[
+            (df[0] >= inicio) &
+            (df[0] <= fim) &
+            (df[0].dt.strftime("%M:%S") == ms_str)
+        ].sort_values(by=0)
+
+        # Converte de uma vez as colunas da estação (uma por poluente)
+        station_cols = INDICES_COLUNAS[row_type][ESTACOES.index(station)]
+        return (
+            selected_df[station_cols]
+            .apply(pd.to_numeric, errors="coerce")
+            .to_numpy(dtype=float)
+        )
+
+def classify_air(input_date_str, input_time_str, station, database_path="database.csv",
+                 ler_janela=ler_janela_csv, indice=None):
     """
     Realiza a classificação da qualidade do ar para a data, horário e estação informados.
-    Retorna um dicionário com os resultados para MP10, MP2.5 e a média horária de PTS,
-    ou uma mensagem de erro.
+    Retorna um dicionário com os resultados de cada poluente (IQAr para os que têm
+    tabela de faixas, apenas a média para os demais, como PTS) ou uma mensagem de erro.
+    'ler_janela' recebe (database_path, station, inicio, fim, ms_str, row_type) e retorna
+    o array de valores; o padrão lê o CSV.
+    'indice', se informado, é um dicionário row_type → IndicePrefixos (T × estações × poluentes)
+    e substitui 'ler_janela': a média e a contagem saem do índice, sem ler a janela.
+    Cada poluente usa a janela da sua tabela de faixas (JANELAS_POLUENTES).
     """
     try:
         target_datetime = parse_date_time(input_date_str, input_time_str)
@@ -191,62 +502,76 @@ def classify_air(input_date_str, input_time_str, station, database_path="databas
     if station not in columns_mapping:
         return {"error": "Estação inválida!"}
     
+    if indice is not None:
+        i = ESTACOES.index(station)
+
+        def resumo_janela(horas):
+            linhas, soma, validos = indice[row_type].janela(target_datetime, horas)
+            return linhas, soma[i], validos[i]
+    else:
+        ms_str = target_datetime.strftime("%M:%S")
+
+        def resumo_janela(horas):
+            start_datetime = target_datetime - timedelta(hours=horas - 1)
+            valores = ler_janela(database_path, station, start_datetime, target_datetime, ms_str, row_type)
+            return len(valores), np.nansum(valores, axis=0), np.count_nonzero(~np.isnan(valores), axis=0)
+
     try:
-        df = pd.read_csv(database_path, header=None, skiprows=1, low_memory=False)
-    except Exception as e:
-        return {"error": f"Erro ao ler o arquivo CSV: {e}"}
-    
-    try:
-        df[0] = pd.to_datetime(df[0], format="%Y-%m-%d %H:%M:%S")
-    except Exception as e:
-        return {"error": f"Erro ao converter a coluna de timestamp: {e}"}
-    
-    ms_str = target_datetime.strftime("%M:%S")
-    start_datetime = target_datetime - timedelta(hours=23)
-    
-    selected_df = df[
-        (df[0] >= start_datetime) &
-        (df[0] <= target_datetime) &
-        (df[0].dt.strftime("%M:%S") == ms_str)
-    ].sort_values(by=0)
+        with medir("classify_air.medias"):
+            linhas, medias, validos = medias_por_poluente(resumo_janela)
+    except ValueError as e:
+        return {"error": str(e)}
     
-    if selected_df.empty:
+    if linhas == 0:
         return {"error": "Nenhum registro encontrado no intervalo especificado."}
     
+    return resultado_medias(medias, validos)
+
+def resultado_classificacao(valores):
+    """
+    Monta o resultado de classify_air a partir dos valores de uma única janela (linhas × poluentes),
+    usada para todos os poluentes.
+    """
+    # Contagem de válidos e média ao longo do eixo do tempo
+    validos = np.count_nonzero(~np.isnan(valores), axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = np.nansum(valores, axis=0) / validos
+    return resultado_medias(medias, validos)
+
+def resultado_medias(medias, validos):
+    """
+    Monta o resultado de classify_air a partir das médias e contagens de válidos
+    de cada poluente na janela (arrays na ordem de POLUENTES_COLUNAS):
+    média, IQAr e classificação para os poluentes com tabela de faixas e apenas a
+    média para os demais. Poluentes com menos válidos que o mínimo da sua janela
+    (16 para 24 h) recebem uma mensagem de erro.
+    """
     result = {}
-    
-    # Função auxiliar para processamento geral dos dados
-    def process_pollutant(col, pollutant, func):
-        valores = extract_valid_values(selected_df[col])
-        if len(valores) < 16:
-            return { "error": f"Dados insuficientes para {pollutant} (apenas {len(valores)} valores válidos encontrados)." }
-        media = np.mean(valores)
-        if func:
-            # Calcular IQAr e classificação
-            iqar, I_ini, I_fin, C_ini, C_fin = calculate_IQAr(media, pollutant)
-            return {
-                "Média Horária": media,
-                "Índice Inicial": I_ini,
-                "Índice Final": I_fin,
-                "Concentração Inicial": C_ini,
-                "Concentração Final": C_fin,
-                "IQAr": iqar,
-                "Classificação": classify_air_quality(iqar)
-            }
-        return {"Média Horária": media}
-    
-    # Processamento para MP10, MP2.5 e PTS
-    station_cols = columns_mapping[station][row_type]
-    
-    result["MP10"] = process_pollutant(station_cols["MP10"], "MP10", func=True)
-    result["MP2.5"] = process_pollutant(station_cols["MP2.5"], "MP2.5", func=True)
-    result["PTS"] = process_pollutant(station_cols["PTS"], "PTS", func=False)
-    
+    for j in ORDEM_POLUENTES:
+        pollutant = POLUENTES_COLUNAS[j]
+        if validos[j] < MINIMOS_POLUENTES[j]:
+            result[pollutant] = { "error": f"Dados insuficientes para {pollutant} (apenas {validos[j]} valores válidos encontrados)." }
+            continue
+        media = float(medias[j])
+        if pollutant not in PARAMS:
+            result[pollutant] = {"Média Horária": media}
+            continue
+        # Calcular IQAr e classificação
+        iqar, I_ini, I_fin, C_ini, C_fin = calculate_IQAr(media, pollutant)
+        result[pollutant] = {
+            "Média Horária": media,
+            "Índice Inicial": I_ini,
+            "Índice Final": I_fin,
+            "Concentração Inicial": C_ini,
+            "Concentração Final": C_fin,
+            "IQAr": iqar,
+            "Classificação": classify_air_quality(iqar)
+        }
     return result
 
 if __name__ == "__main__":
     input_date_str = input("Digite a data (dd-mm-aaaa ou yyyy-mm-dd): ").strip()
     input_time_str = input("Digite o horário (HH:MM:SS): ").strip()
-    station = input("Digite a estação (EAMA11, EAMA21, EAMA31 ou EAMA41): ").strip().upper()
+    station = input(f"Digite a estação ({', '.join(ESTACOES)}): ").strip().upper()
     resultado = classify_air(input_date_str, input_time_str, station)
     print(resultado)
@@ -4,9 +4,16 @@ Arquivo: config.py
 --------------------------------------------
 Configura caminhos e variáveis de ambiente para a aplicação:
 - BASE_DIR, SRC_DIR: determinação de diretórios base do projeto.
+- DADOS_COLETADOS_DIR: planilhas/CSVs brutos organizados em <ano>/<mes>.
 - DATABASE_PATH: CSV original de medições de qualidade do ar.
 - NEW_DATABASE_PATH: CSV resumido para geração de gradientes.
+- DATABASE_PARTICOES_DIR, NEW_DATABASE_PARTICOES_DIR, METEOROLOGY_PARTICOES_DIR: os mesmos
+  CSVs particionados por ano/mês (<pasta>/<AAAA>/<MM>.csv, ver particoes.py).
 - METEOROLOGY_PATH: CSV de dados meteorológicos.
+- METEOROLOGY_NPZ_PATH: mesma meteorologia em formato numérico (.npz, float32 + timestamps).
+- CUBO_ESTATISTICAS_PATH: cubo pré-agregado (estação × poluente × ano × mês × hora) das médias.
+- ESTACOES_PATH: registro de estações (JSON) que define o layout de colunas do database.
+- FAIXAS_IQAR_PATH: faixas de concentração/índice e janela de média de cada poluente (JSON).
 - SQLALCHEMY_DATABASE_URI: string de conexão (SQLite por default).
 ============================================
 """
@@ -19,14 +26,39 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 # subindo uma pasta até src
 SRC_DIR = os.path.abspath(os.path.join(BASE_DIR, '..'))
 
-# Caminho relativo para o diretório 'dados-coletados'
-DADOS_COLETADOS_DIR = os.path.join(BASE_DIR, 'dados-coletados')
+# Diretório 'dados-coletados' (src/dados-coletados); pode ser trocado via variável de ambiente,
+# a mesma lida pelo app e pelo serviço de reconstrução (analise-ambiental/config.py)
+DADOS_COLETADOS_DIR = os.environ.get(
+    "DADOS_COLETADOS_DIR",
+    os.path.join(SRC_DIR, 'dados-coletados')
+)
 
 # CSV de medições de qualidade do ar — serve tanto ao app Flask quanto ao "adiciona ao database"
 DATABASE_PATH         = os.path.join(SRC_DIR, "tratamento-dos-dados", "database.csv")
 NEW_DATABASE_PATH     = os.path.join(SRC_DIR, "tratamento-dos-dados", "new_database.csv")
 METEOROLOGY_PATH      = os.path.join(SRC_DIR, "tratamento-dos-dados", "database_met.csv")
+METEOROLOGY_NPZ_PATH  = os.path.join(SRC_DIR, "tratamento-dos-dados", "database_met.npz")
+CUBO_ESTATISTICAS_PATH = os.path.join(SRC_DIR, "tratamento-dos-dados", "cubo_estatisticas.npz")
+
+# Partições por ano/mês dos CSVs acima (consultas por intervalo leem só os meses necessários)
+PARTICOES_DIR              = os.path.join(SRC_DIR, "tratamento-dos-dados", "particoes")
+DATABASE_PARTICOES_DIR     = os.path.join(PARTICOES_DIR, "database")
+NEW_DATABASE_PARTICOES_DIR = os.path.join(PARTICOES_DIR, "new_database")
+METEOROLOGY_PARTICOES_DIR  = os.path.join(PARTICOES_DIR, "database_met")
+
 INFO_DATABASE_MESES_PATH = os.path.join(SRC_DIR, "tratamento-dos-dados", "info-database-meses.txt")
 
+# Registro de estações: lista de estações e deslocamentos de colunas (pode ser trocado via variável de ambiente)
+ESTACOES_PATH = os.environ.get(
+    "ESTACOES_PATH",
+    os.path.join(SRC_DIR, "tratamento-dos-dados", "estacoes.json")
+)
+
+# Faixas do IQAr por poluente (pode ser trocado via variável de ambiente)
+FAIXAS_IQAR_PATH = os.environ.get(
+    "FAIXAS_IQAR_PATH",
+    os.path.join(SRC_DIR, "tratamento-dos-dados", "faixas_iqar.json")
+)
+
 # Mantém o SQLite para erros
 SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///error_reports.db')
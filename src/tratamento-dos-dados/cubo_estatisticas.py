@@ -0,0 +1,205 @@
+"""
+============================================
+Arquivo: cubo_estatisticas.py
+--------------------------------------------
+Cubo de estatísticas pré-agregadas das médias de 24 h do new_database.csv:
+- Eixos: série × poluente × ano × mês × hora do dia.
+  * Séries: cada estação do registro (estacoes.json) e três séries derivadas por
+    timestamp entre as estações: média ("media_estacoes"), máximo ("max_estacoes")
+    e mínimo ("min_estacoes") — as mesmas usadas pelos gradientes.
+- Por célula: soma, contagem, mínimo, máximo e soma dos quadrados (dados ausentes
+  não entram na célula). Com isso qualquer agregação (média, desvio, extremos) de
+  qualquer combinação de eixos sai do cubo sem reler os dados horários.
+- Construção em uma única passada (np.bincount / ufunc.at sobre o índice da célula).
+- Atualização incremental: o cubo guarda o último timestamp agregado e uma assinatura
+  dos valores até ele; se o CSV só recebeu linhas novas, apenas elas são acumuladas.
+  Se algo anterior mudou (ou o registro de estações mudou), o cubo é refeito inteiro.
+- Saída: cubo_estatisticas.npz (escrita atômica), lido pelo app em utils/cubo.py.
+
+Uso:
+    python cubo_estatisticas.py             # incremental quando possível
+    python cubo_estatisticas.py --completo  # reconstrói do zero
+============================================
+"""
+
+import os
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+
+from classifica import ESTACOES, POLUENTES_COLUNAS
+from config import NEW_DATABASE_PATH, CUBO_ESTATISTICAS_PATH
+
+# Séries derivadas entre estações (calculadas por timestamp, antes da agregação)
+SERIES_DERIVADAS = ("media_estacoes", "max_estacoes", "min_estacoes")
+
+MESES = 12
+HORAS = 24
+
+
+def ler_medias(csv_path=NEW_DATABASE_PATH):
+    """
+    Lê do new_database.csv apenas os timestamps e as colunas <estação>_<poluente>_media.
+    Retorna (ts datetime64[s], valores float (T × séries × poluentes)), já com as séries derivadas.
+    """
+    colunas = [f"{st}_{pol}_media" for st in ESTACOES for pol in POLUENTES_COLUNAS]
+    df = pd.read_csv(csv_path, usecols=["timestamp", *colunas], encoding="utf-8-sig", low_memory=False)
+    ts = pd.to_datetime(df["timestamp"], format="%Y-%m-%d %H:%M:%S").to_numpy("datetime64[s]")
+    # "dados insuficientes" e demais textos viram NaN
+    estacoes = (
+        df[colunas].apply(pd.to_numeric, errors="coerce")
+        .to_numpy(dtype=float)
+        .reshape(len(df), len(ESTACOES), len(POLUENTES_COLUNAS))
+    )
+
+    validos = ~np.isnan(estacoes)
+    contagem = validos.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.where(validos, estacoes, 0.0).sum(axis=1) / contagem
+    maximo = np.where(validos, estacoes, -np.inf).max(axis=1)
+    minimo = np.where(validos, estacoes, np.inf).min(axis=1)
+    sem_dados = contagem == 0
+    for derivada in (media, maximo, minimo):
+        derivada[sem_dados] = np.nan
+
+    valores = np.concatenate([estacoes, np.stack([media, maximo, minimo], axis=1)], axis=1)
+    return ts, valores
+
+
+def _assinatura(valores):
+    """Hash dos valores agregados (detecta mudança em linhas já incluídas no cubo)."""
+    return hashlib.sha1(np.ascontiguousarray(valores).tobytes()).hexdigest()
+
+
+def cubo_vazio(anos):
+    """Cubo sem dados para a lista de anos informada."""
+    forma = (len(ESTACOES) + len(SERIES_DERIVADAS), len(POLUENTES_COLUNAS), len(anos), MESES, HORAS)
+    return {
+        "series":          np.array([*ESTACOES, *SERIES_DERIVADAS]),
+        "poluentes":       np.array(POLUENTES_COLUNAS),
+        "anos":            np.asarray(anos, dtype=np.int64),
+        "soma":            np.zeros(forma),
+        "contagem":        np.zeros(forma, dtype=np.int64),
+        "minimo":          np.full(forma, np.inf),
+        "maximo":          np.full(forma, -np.inf),
+        "soma_quadrados":  np.zeros(forma),
+        "ultimo_ts":       np.datetime64("NaT", "s"),
+        "assinatura":      np.array(""),
+    }
+
+
+def _incluir_anos(cubo, anos):
+    """Estende o eixo de anos do cubo (células novas vazias) para cobrir 'anos'."""
+    novos = np.setdiff1d(anos, cubo["anos"])
+    if len(novos) == 0:
+        return cubo
+    todos = np.union1d(cubo["anos"], novos)
+    estendido = cubo_vazio(todos)
+    pos = np.searchsorted(todos, cubo["anos"])
+    for campo in ("soma", "contagem", "minimo", "maximo", "soma_quadrados"):
+        estendido[campo][:, :, pos] = cubo[campo]
+    estendido["ultimo_ts"] = cubo["ultimo_ts"]
+    estendido["assinatura"] = cubo["assinatura"]
+    return estendido
+
+
+def acumular(cubo, ts, valores):
+    """
+    Soma ao cubo as linhas (ts, valores T × séries × poluentes), em uma única passada.
+    Cada valor válido cai na célula (série, poluente, ano, mês, hora) do seu timestamp.
+    """
+    if len(ts) == 0:
+        return cubo
+    anos = ts.astype("datetime64[Y]").astype(np.int64) + 1970
+    cubo = _incluir_anos(cubo, np.unique(anos))
+
+    ano_idx = np.searchsorted(cubo["anos"], anos)
+    mes_idx = ts.astype("datetime64[M]").astype(np.int64) % MESES
+    hora_idx = (ts.astype(np.int64) // 3600) % HORAS
+    # Célula do timestamp dentro do bloco (ano × mês × hora)
+    celula_tempo = (ano_idx * MESES + mes_idx) * HORAS + hora_idx
+
+    n_series, n_pol, n_anos = cubo["soma"].shape[:3]
+    bloco = n_anos * MESES * HORAS
+    serie_pol = np.arange(n_series * n_pol).reshape(n_series, n_pol)
+    celula = serie_pol[None, :, :] * bloco + celula_tempo[:, None, None]
+
+    validos = ~np.isnan(valores)
+    celula, v = celula[validos], valores[validos]
+    tamanho = cubo["soma"].size
+
+    cubo["soma"] += np.bincount(celula, weights=v, minlength=tamanho).reshape(cubo["soma"].shape)
+    cubo["soma_quadrados"] += np.bincount(celula, weights=v * v, minlength=tamanho).reshape(cubo["soma"].shape)
+    cubo["contagem"] += np.bincount(celula, minlength=tamanho).reshape(cubo["soma"].shape)
+    np.minimum.at(cubo["minimo"].reshape(-1), celula, v)
+    np.maximum.at(cubo["maximo"].reshape(-1), celula, v)
+    return cubo
+
+
+def carregar_cubo(path=CUBO_ESTATISTICAS_PATH):
+    """Cubo gravado em disco, ou None se não existir/estiver ilegível."""
+    try:
+        with np.load(path) as npz:
+            return {k: npz[k] for k in npz.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _compativel(cubo):
+    """O cubo gravado usa as mesmas séries e poluentes do registro atual?"""
+    return (
+        cubo is not None
+        and list(cubo["series"]) == [*ESTACOES, *SERIES_DERIVADAS]
+        and list(cubo["poluentes"]) == list(POLUENTES_COLUNAS)
+        and not np.isnat(cubo["ultimo_ts"])
+    )
+
+
+def salvar_cubo(cubo, path=CUBO_ESTATISTICAS_PATH):
+    """Grava o cubo de forma atômica (arquivo temporário + os.replace)."""
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        np.savez_compressed(f, **cubo)
+    os.replace(tmp_file, path)
+
+
+def atualizar_cubo(csv_path=NEW_DATABASE_PATH, path=CUBO_ESTATISTICAS_PATH, completo=False):
+    """
+    Atualiza o cubo a partir do new_database.csv.
+    Retorna o número de linhas acumuladas nesta execução.
+    """
+    ts, valores = ler_medias(csv_path)
+    ordem = np.argsort(ts, kind="stable")
+    ts, valores = ts[ordem], valores[ordem]
+
+    cubo = None if completo else carregar_cubo(path)
+    if _compativel(cubo):
+        ja_agregadas = int(np.searchsorted(ts, cubo["ultimo_ts"], side="right"))
+        if _assinatura(valores[:ja_agregadas]) != str(cubo["assinatura"]):
+            cubo = None  # linhas antigas mudaram: refaz do zero
+    else:
+        cubo = None
+
+    if cubo is None:
+        cubo, ja_agregadas = cubo_vazio(np.unique(ts.astype("datetime64[Y]").astype(np.int64) + 1970)), 0
+
+    cubo = acumular(cubo, ts[ja_agregadas:], valores[ja_agregadas:])
+    if len(ts):
+        cubo["ultimo_ts"] = ts[-1]
+        cubo["assinatura"] = np.array(_assinatura(valores))
+    salvar_cubo(cubo, path)
+    return len(ts) - ja_agregadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atualiza o cubo de estatísticas pré-agregadas.")
+    parser.add_argument("--completo", action="store_true", help="reconstrói o cubo do zero")
+    args = parser.parse_args()
+
+    novas = atualizar_cubo(completo=args.completo)
+    print(f"Cubo de estatísticas salvo em: {CUBO_ESTATISTICAS_PATH} ({novas} linhas acumuladas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import os
 import pandas as pd
 from datetime import datetime
-from config import DADOS_COLETADOS_DIR as BASE_DIR
+from config import DADOS_COLETADOS_DIR as BASE_DIR, DATABASE_PARTICOES_DIR
+from particoes import gravar_particoes
 
 # CONFIGURAÇÕES
 # Diretório onde o script está localizado (usado para salvar os arquivos gerados)
@@ -52,7 +53,7 @@ def combinar_csvs(base_dir, output_csv):
     lista_dfs = []
 
     # Percorre as pastas de anos
-    for ano in os.listdir(base_dir):
+    for ano in sorted(os.listdir(base_dir)):
         caminho_ano = os.path.join(base_dir, ano)
         if not os.path.isdir(caminho_ano):
             continue
@@ -80,8 +81,14 @@ def combinar_csvs(base_dir, output_csv):
     if lista_dfs:
         df_final = pd.concat(lista_dfs, ignore_index=True)
         df_final[0] = df_final.apply(lambda row: corrigir_timestamp(row[0], row['Mes']), axis=1)
-        df_final.to_csv(output_csv, index=False, encoding='utf-8-sig', header=False)
+        # Grava em arquivo temporário e troca de uma vez, para leitores nunca verem o CSV pela metade
+        tmp_csv = output_csv + ".tmp"
+        df_final.to_csv(tmp_csv, index=False, encoding='utf-8-sig', header=False)
+        os.replace(tmp_csv, output_csv)
         print(f"Dados combinados e corrigidos salvos em '{output_csv}'.")
+        # Mesmas linhas particionadas por ano/mês, para consultas por intervalo
+        mudaram = gravar_particoes(df_final, DATABASE_PARTICOES_DIR)
+        print(f"Partições mensais em '{DATABASE_PARTICOES_DIR}' ({mudaram} alteradas).")
     else:
         print("Nenhum arquivo válido encontrado.")
 
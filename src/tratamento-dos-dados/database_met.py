@@ -1,19 +1,28 @@
 import os
+import numpy as np
 import pandas as pd
+from config import DADOS_COLETADOS_DIR, METEOROLOGY_PATH, METEOROLOGY_NPZ_PATH, METEOROLOGY_PARTICOES_DIR
+from particoes import gravar_particoes
 
-# Diretório onde o script está localizado
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+# Pasta com os dados brutos (<ano>/<mes>/met.csv)
+BASE_DIR = DADOS_COLETADOS_DIR
 
-# Caminho relativo para a pasta 'dados-coletados'
-OUTPUT_DIR = os.path.abspath(os.path.join(BASE_DIR, '..', 'tratamento-dos-dados'))
-OUTPUT_FILE = os.path.join(OUTPUT_DIR, "database_met.csv")
+# Arquivos de saída: CSV legado e armazenamento numérico (.npz)
+OUTPUT_FILE = METEOROLOGY_PATH
+OUTPUT_NPZ  = METEOROLOGY_NPZ_PATH
+
+# Colunas de valores do met.csv (depois do timestamp)
+COLUNAS_MET = [
+    "vento_velocidade", "vento_direcao", "precipitacao",
+    "temperatura", "umidade", "pressao"
+]
 
 # Mapeamento dos nomes dos meses em português para números
 months_map = {
     'janeiro': 1,
     'fevereiro': 2,
     'março': 3,
-    'marco': 3,  
+    'marco': 3,
     'abril': 4,
     'maio': 5,
     'junho': 6,
@@ -25,52 +34,97 @@ months_map = {
     'dezembro': 12,
 }
 
-files_list = []
-
-# Percorre as pastas de ano dentro do BASE_DIR
-for year_folder in os.listdir(BASE_DIR):
-    year_path = os.path.join(BASE_DIR, year_folder)
-    if not os.path.isdir(year_path):
-        continue
-    try:
-        year_int = int(year_folder)
-    except ValueError:
-        continue
-    if year_int < 2022:
-        continue
+def listar_arquivos_met(base_dir):
+    """
+    Percorre as pastas de ano e mês e retorna a lista (ano, mês, caminho) dos met.csv,
+    ordenada por ano e mês.
+    """
+    files_list = []
 
-    # Percorre as pastas de mês dentro do ano
-    for month_folder in os.listdir(year_path):
-        month_path = os.path.join(year_path, month_folder)
-        if not os.path.isdir(month_path):
+    # Percorre as pastas de ano dentro do base_dir
+    for year_folder in os.listdir(base_dir):
+        year_path = os.path.join(base_dir, year_folder)
+        if not os.path.isdir(year_path):
             continue
-        month_name = month_folder.lower()
-        if month_name not in months_map:
+        try:
+            year_int = int(year_folder)
+        except ValueError:
             continue
-        month_number = months_map[month_name]
-        # Verifica se o arquivo "met.csv" existe na pasta do mês
-        met_csv_path = os.path.join(month_path, "met.csv")
-        if os.path.isfile(met_csv_path):
-            files_list.append((year_int, month_number, met_csv_path))
+        if year_int < 2022:
+            continue
+
+        # Percorre as pastas de mês dentro do ano
+        for month_folder in os.listdir(year_path):
+            month_path = os.path.join(year_path, month_folder)
+            if not os.path.isdir(month_path):
+                continue
+            month_name = month_folder.lower()
+            if month_name not in months_map:
+                continue
+            month_number = months_map[month_name]
+            # Verifica se o arquivo "met.csv" existe na pasta do mês
+            met_csv_path = os.path.join(month_path, "met.csv")
+            if os.path.isfile(met_csv_path):
+                files_list.append((year_int, month_number, met_csv_path))
+
+    # Ordena os arquivos por ano e mês
+    files_list.sort(key=lambda x: (x[0], x[1]))
+    return files_list
+
+def salvar_met_numerico(combined_df, output_npz):
+    """
+    Grava a meteorologia em formato numérico, com a vírgula decimal convertida uma única vez:
+    - ts: datetime64[s] ordenado, sem repetições (vale o primeiro registro, como na leitura do CSV);
+    - valores: float32 (n × 6), com NaN no lugar de "n";
+    - colunas: nomes das colunas de valores.
+    """
+    ts = pd.to_datetime(combined_df[0], format="%Y-%m-%d %H:%M:%S", errors="coerce").to_numpy("datetime64[s]")
+    valores = (
+        combined_df[list(range(1, len(COLUNAS_MET) + 1))]
+        .apply(lambda col: pd.to_numeric(col.str.replace(",", ".", regex=False), errors="coerce"))
+        .to_numpy(dtype=np.float32)
+    )
+    validos = ~np.isnat(ts)
+    ts, valores = ts[validos], valores[validos]
+    # np.unique devolve os timestamps ordenados e o índice da primeira ocorrência de cada um
+    ts, primeiro = np.unique(ts, return_index=True)
+    valores = valores[primeiro]
+
+    tmp_file = output_npz + ".tmp"
+    with open(tmp_file, "wb") as f:
+        np.savez(f, ts=ts, valores=valores, colunas=np.array(COLUNAS_MET))
+    os.replace(tmp_file, output_npz)
+    print(f"Armazenamento numérico criado em: {output_npz}")
 
-# Ordena os arquivos por ano e mês
-files_list.sort(key=lambda x: (x[0], x[1]))
+def combinar_met(base_dir, output_file, output_npz=None):
+    """
+    Lê e concatena todos os met.csv, gravando o database_met.csv (sem cabeçalho)
+    e, se output_npz for informado, a versão numérica (.npz).
+    """
+    dfs = []
+    for year, month, file_path in listar_arquivos_met(base_dir):
+        try:
+            df = pd.read_csv(file_path, header=None, encoding="utf-8-sig", dtype=str)
+            dfs.append(df)
+            print(f"Processado: {file_path}")
+        except Exception as e:
+            print(f"Erro ao ler {file_path}: {e}")
 
-# Lê e acumula os arquivos CSV
-dfs = []
-for year, month, file_path in files_list:
-    try:
-        df = pd.read_csv(file_path, header=None, encoding="utf-8-sig")
-        dfs.append(df)
-        print(f"Processado: {file_path}")
-    except Exception as e:
-        print(f"Erro ao ler {file_path}: {e}")
+    if dfs:
+        # Concatena todos os DataFrames ignorando os índices
+        combined_df = pd.concat(dfs, ignore_index=True)
+        # Salva o database final sem cabeçalho (escrita atômica via arquivo temporário)
+        tmp_file = output_file + ".tmp"
+        combined_df.to_csv(tmp_file, index=False, header=False, encoding="utf-8-sig")
+        os.replace(tmp_file, output_file)
+        print(f"Database criado com sucesso em: {output_file}")
+        # Mesmas linhas particionadas por ano/mês, para consultas por intervalo
+        mudaram = gravar_particoes(combined_df, METEOROLOGY_PARTICOES_DIR)
+        print(f"Partições mensais em '{METEOROLOGY_PARTICOES_DIR}' ({mudaram} alteradas).")
+        if output_npz:
+            salvar_met_numerico(combined_df, output_npz)
+    else:
+        print("Nenhum arquivo CSV encontrado para a criação do database.")
 
-if dfs:
-    # Concatena todos os DataFrames ignorando os índices
-    combined_df = pd.concat(dfs, ignore_index=True)
-    # Salva o database final sem cabeçalho
-    combined_df.to_csv(OUTPUT_FILE, index=False, header=False, encoding="utf-8-sig")
-    print(f"Database criado com sucesso em: {OUTPUT_FILE}")
-else:
-    print("Nenhum arquivo CSV encontrado para a criação do database.")
+if __name__ == "__main__":
+    combinar_met(BASE_DIR, OUTPUT_FILE, OUTPUT_NPZ)
@@ -3,6 +3,7 @@
 
 import os
 import pandas as pd
+from classifica import ESTACOES
 
 def main():
     # pasta onde está este script
@@ -10,16 +11,12 @@ def main():
     input_file  = os.path.join(script_dir, "new_database.csv")
     output_file = os.path.join(script_dir, "database_resumido.csv")
 
-    cols = [
-        "timestamp",
-        "EAMA11_MP10_media","EAMA11_MP10_IQAr","EAMA11_MP10_class",
-        "EAMA11_MP2.5_media","EAMA11_MP2.5_IQAr","EAMA11_MP2.5_class",
-        "EAMA21_MP10_media","EAMA21_MP10_IQAr","EAMA21_MP10_class",
-        "EAMA21_MP2.5_media","EAMA21_MP2.5_IQAr","EAMA21_MP2.5_class",
-        "EAMA31_MP10_media","EAMA31_MP10_IQAr","EAMA31_MP10_class",
-        "EAMA31_MP2.5_media","EAMA31_MP2.5_IQAr","EAMA31_MP2.5_class",
-        "EAMA41_MP10_media","EAMA41_MP10_IQAr","EAMA41_MP10_class",
-        "EAMA41_MP2.5_media","EAMA41_MP2.5_IQAr","EAMA41_MP2.5_class",
+    # Colunas de saída derivadas do registro de estações (estacoes.json)
+    cols = ["timestamp"] + [
+        f"{st}_{pol}_{campo}"
+        for st in ESTACOES
+        for pol in ("MP10", "MP2.5")
+        for campo in ("media", "IQAr", "class")
     ]
 
     try:
@@ -33,7 +30,10 @@ def main():
         print("Colunas não encontradas:", missing)
         return
 
-    df[cols].to_csv(output_file, index=False, encoding="utf-8-sig")
+    # Escrita atômica (arquivo temporário + os.replace)
+    tmp_file = output_file + ".tmp"
+    df[cols].to_csv(tmp_file, index=False, encoding="utf-8-sig")
+    os.replace(tmp_file, output_file)
     print(f"Arquivo resumido salvo em '{output_file}'.")
 
 if __name__ == "__main__":
@@ -0,0 +1,339 @@
+"""
+============================================
+Arquivo: gera_dados_sinteticos.py
+--------------------------------------------
+Gerador de dados sintéticos nos mesmos formatos que o pipeline consome,
+para testes de escala e de carga sem depender do acervo real:
+
+- dados-coletados/<ano>/<mes>/qar.csv (ou qar_novo.csv): 8 linhas de cabeçalho,
+  medições horárias com 'n' como valor ausente, 12 colunas por estação
+  (PTS, MP10, MP2.5 × valor/flag/média 24 h/flag) e a linha diária 12:00:00
+  com as médias de 24 h (flag "VM").
+- dados-coletados/<ano>/<mes>/met.csv: meteorologia com decimal vírgula entre aspas.
+- qar.xlsx / met.xlsx opcionais nos layouts de planilha reconhecidos pelos validadores
+  (original, novo, cenário maior e cenário maior invertido; met versões 1, 2 e 3).
+- database.csv, database_met.csv e database_met.npz consolidados, no mesmo formato
+  produzido por database.py e database_met.py.
+- estacoes.json com o registro das estações geradas (use ESTACOES_PATH para apontá-lo).
+
+Configurável por número de estações, intervalo de anos, passo de amostragem
+(horário ou sub-horário) e taxa de dados ausentes.
+
+Uso:
+  python gera_dados_sinteticos.py --saida /tmp/sintetico --estacoes 12 \
+      --ano-inicio 2015 --ano-fim 2024 --faltantes 0.05 --planilhas
+============================================
+"""
+
+import os
+import csv
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from database_met import salvar_met_numerico
+
+MESES = ["janeiro", "fevereiro", "marco", "abril", "maio", "junho",
+         "julho", "agosto", "setembro", "outubro", "novembro", "dezembro"]
+
+POLUENTES = ["PTS", "MP10", "MP2.5"]
+COLUNAS_POR_ESTACAO = 12   # 3 poluentes × (valor, flag, média 24 h, flag)
+COLUNAS_MAIOR = 20         # blocos por estação no "cenário maior" das planilhas
+
+LAYOUTS_QAR = ["original", "novo", "maior", "invertida"]
+
+# Proporção média de cada poluente em relação ao PTS
+_FATOR_POLUENTE = np.array([1.0, 0.55, 0.3])
+
+
+def nomes_estacoes(n):
+    """Nomes no padrão da rede: EAMA11, EAMA21, EAMA31, ..."""
+    return [f"EAMA{i + 1}1" for i in range(n)]
+
+
+def _tempos_do_mes(ano, mes, passo_minutos):
+    """Timestamps de medição do mês (começando em 00:30, como nas planilhas originais)."""
+    inicio = pd.Timestamp(ano, mes, 1) + pd.Timedelta(minutes=30)
+    fim = pd.Timestamp(ano, mes, 1) + pd.offsets.MonthBegin(1)
+    return pd.date_range(inicio, fim, freq=f"{passo_minutos}min", inclusive="left")
+
+
+def _gera_qar(tempos, n_estacoes, faltantes, rng):
+    """
+    Gera a matriz (tempo × estação × poluente) de concentrações horárias.
+    Sazonalidade com pico na estação seca (jun–set), ciclo diário e ruído log-normal.
+    """
+    mes = tempos.month.to_numpy()
+    hora = tempos.hour.to_numpy() + tempos.minute.to_numpy() / 60.0
+
+    sazonal = 1.0 + 0.5 * np.exp(-((mes - 8) ** 2) / 4.0)
+    diario = 1.0 + 0.35 * np.sin((hora - 9) / 24.0 * 2 * np.pi)
+    base_estacao = rng.uniform(25, 60, size=n_estacoes)
+
+    nivel = (sazonal * diario)[:, None, None] * base_estacao[None, :, None] * _FATOR_POLUENTE
+    ruido = rng.lognormal(0.0, 0.35, size=nivel.shape)
+    valores = np.round(nivel * ruido, 1)
+
+    valores[rng.random(valores.shape) < faltantes] = np.nan
+    return valores
+
+
+def _medias_diarias(tempos, valores):
+    """Média de 24 h por dia (exige 16 valores válidos, como em classifica.py)."""
+    dias = tempos.normalize()
+    dias_unicos, idx = np.unique(dias, return_inverse=True)
+    validos = ~np.isnan(valores)
+    shape = (len(dias_unicos),) + valores.shape[1:]
+    soma = np.zeros(shape)
+    cont = np.zeros(shape)
+    np.add.at(soma, idx, np.where(validos, valores, 0.0))
+    np.add.at(cont, idx, validos)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = np.round(soma / cont, 1)
+    medias[cont < 16] = np.nan
+    return pd.DatetimeIndex(dias_unicos), medias
+
+
+def _tabela_qar(tempos, valores):
+    """
+    Monta o DataFrame no layout do qar.csv: timestamp + 12 colunas por estação.
+    As linhas horárias preenchem o valor; a linha 12:00:00 preenche a média de 24 h com flag "VM".
+    """
+    n_t, n_est, n_pol = valores.shape
+    dias, medias = _medias_diarias(tempos, valores)
+    tempos_12h = dias + pd.Timedelta(hours=12)
+
+    n_linhas = n_t + len(dias)
+    horarias = np.full((n_linhas, n_est, n_pol), np.nan)
+    diarias = np.full((n_linhas, n_est, n_pol), np.nan)
+    horarias[:n_t] = valores
+    diarias[n_t:] = medias
+
+    todos_tempos = np.concatenate([tempos.to_numpy(), tempos_12h.to_numpy()])
+    ordem = np.argsort(todos_tempos, kind="stable")
+    horarias, diarias = horarias[ordem], diarias[ordem]
+
+    colunas = {0: pd.DatetimeIndex(todos_tempos[ordem]).strftime("%Y-%m-%d %H:%M:%S")}
+    for e in range(n_est):
+        for p in range(n_pol):
+            c = 1 + e * COLUNAS_POR_ESTACAO + p * 4
+            media = diarias[:, e, p]
+            colunas[c] = horarias[:, e, p]
+            colunas[c + 1] = np.nan
+            colunas[c + 2] = media
+            colunas[c + 3] = np.where(np.isnan(media), None, "VM")
+    return pd.DataFrame(colunas)
+
+
+def _cabecalho_qar(estacoes):
+    """As 8 linhas de cabeçalho do qar.csv, com os nomes das estações nas colunas de cada bloco."""
+    largura = 1 + COLUNAS_POR_ESTACAO * len(estacoes)
+    linhas = [["n"] * largura for _ in range(8)]
+    linhas[0][0], linhas[0][1] = "Data de Medição", "VALE - ITABIRA"
+    linhas[7][0] = "Data"
+    nomes_pol = ["Partículas Totais em Suspensão", "Partículas Inaláveis (<10µm)",
+                 "Partículas Inaláveis <2.5µm"]
+    for e, est in enumerate(estacoes):
+        c = 1 + e * COLUNAS_POR_ESTACAO
+        linhas[1][c] = est
+        linhas[2][c] = "Qualidade do Ar"
+        linhas[3][c] = "Ar Ambiente"
+        for p, nome in enumerate(nomes_pol):
+            cp = c + p * 4
+            linhas[4][cp] = nome
+            linhas[5][cp], linhas[5][cp + 2] = "1 h/horária/3,0 m", "Médias de 24 h Simples"
+            linhas[6][cp], linhas[6][cp + 2] = "Rotina", "Rotina"
+    for c in range(1, largura, 2):
+        linhas[7][c], linhas[7][c + 1] = "Valor [µg/m3]", "Flag"
+    return linhas
+
+
+def _gera_met(tempos, faltantes, rng):
+    """
+    Gera as 6 grandezas meteorológicas (vento, direção, chuva, temperatura, umidade, pressão).
+    Registros ausentes ficam inteiros como 'n', como ocorre nas planilhas reais.
+    """
+    n = len(tempos)
+    mes = tempos.month.to_numpy()
+    hora = tempos.hour.to_numpy() + tempos.minute.to_numpy() / 60.0
+    chuvoso = np.isin(mes, [10, 11, 12, 1, 2, 3])
+
+    vel = rng.gamma(2.0, 1.0, n)
+    direcao = np.degrees(rng.vonmises(np.radians(90), 1.5, n)) % 360
+    chuva = np.where(rng.random(n) < np.where(chuvoso, 0.12, 0.02), rng.exponential(2.0, n), 0.0)
+    temp = 22 + 5 * np.sin((hora - 9) / 24 * 2 * np.pi) - 3 * ~chuvoso + rng.normal(0, 1, n)
+    umid = np.clip(95 - 2.2 * (temp - 15) + 10 * (chuva > 0) + rng.normal(0, 4, n), 15, 100)
+    pres = 908 + 2 * np.sin(hora / 24 * 4 * np.pi) + rng.normal(0, 0.8, n)
+
+    met = np.round(np.column_stack([vel, direcao, chuva, temp, umid, pres]), 1)
+    met[rng.random(n) < faltantes] = np.nan
+    return met
+
+
+def _tabela_met(tempos, met):
+    df = pd.DataFrame(met)
+    df.insert(0, "ts", tempos.strftime("%Y-%m-%d %H:%M:%S"))
+    return df
+
+
+def _escreve_qar_csv(caminho, estacoes, tabela):
+    with open(caminho, "w", encoding="utf-8-sig", newline="") as f:
+        csv.writer(f, lineterminator="\n").writerows(_cabecalho_qar(estacoes))
+        tabela.to_csv(f, header=False, index=False, na_rep="n", float_format="%g", lineterminator="\n")
+
+
+def _escreve_met_csv(f, tabela):
+    tabela.to_csv(f, header=False, index=False, na_rep="n", float_format="%.1f",
+                  decimal=",", lineterminator="\n")
+
+
+def _planilha_qar(tabela, estacoes, layout):
+    """
+    Converte a tabela do qar.csv no layout de planilha indicado:
+      - original: coluna B vazia, EAMA11 em C2;
+      - novo: estações a partir de B2 (B2, N2, Z2, AL2, ...);
+      - maior: blocos de 20 colunas a partir de C, EAMA11 em C2;
+      - invertida: cenário maior com as estações em ordem inversa (EAMA41 em C2).
+    """
+    cabecalho = pd.DataFrame(_cabecalho_qar(estacoes)).replace("n", None)
+    dados = tabela.copy()
+    dados.columns = range(dados.shape[1])
+    df = pd.concat([cabecalho, dados], ignore_index=True)
+
+    if layout == "novo":
+        return df
+    if layout == "original":
+        df.insert(1, "b", None)
+        return df
+
+    ordem = list(range(len(estacoes)))
+    if layout == "invertida":
+        ordem = ordem[::-1]
+    blocos = [df.iloc[:, [0]], pd.DataFrame(index=df.index, columns=["b"])]
+    for e in ordem:
+        c = 1 + e * COLUNAS_POR_ESTACAO
+        bloco = df.iloc[:, c:c + COLUNAS_POR_ESTACAO]
+        # Colunas de outros parâmetros do bloco: só o cabeçalho, sem medições
+        preenchimento = pd.DataFrame(index=df.index, columns=range(COLUNAS_MAIOR - COLUNAS_POR_ESTACAO))
+        preenchimento.iloc[4, 0] = "Outros parâmetros"
+        preenchimento.iloc[7, :] = ["Valor", "Flag"] * ((COLUNAS_MAIOR - COLUNAS_POR_ESTACAO) // 2)
+        blocos.extend([bloco, preenchimento])
+    return pd.concat(blocos, axis=1)
+
+
+def _planilha_met(tabela, versao):
+    """
+    Met nas três versões detectadas por valida_met_automatico.detect_version:
+    EM11 em C2 (v1), AA2 (v2) ou B2 (v3); dados a partir da linha 9.
+    """
+    inicio = {1: 2, 2: 26, 3: 1}[versao]
+    # Deslocamentos de cada grandeza em relação à primeira coluna (umidade pula 4)
+    desloc = [0, 2, 4, 6, 10, 12]
+    largura = inicio + desloc[-1] + 2
+    df = pd.DataFrame(index=range(8 + len(tabela)), columns=range(largura), dtype=object)
+    df.iloc[1, inicio] = "EM11"
+    datas = pd.to_datetime(tabela["ts"]).dt.strftime("%d/%m/%Y %H:%M")
+    df.iloc[8:, 0] = datas.to_numpy()
+    for j, d in enumerate(desloc):
+        df.iloc[8:, inicio + d] = tabela[j].to_numpy()
+    return df
+
+
+def gerar(saida, n_estacoes=4, ano_inicio=2022, ano_fim=2024, faltantes=0.05,
+          passo_minutos=60, planilhas=False, layout_qar="misto", semente=42):
+    """
+    Gera a árvore dados-coletados/ e os bancos consolidados em 'saida'.
+    Retorna um dicionário com contagens de linhas geradas.
+    """
+    rng = np.random.default_rng(semente)
+    estacoes = nomes_estacoes(n_estacoes)
+    raiz = os.path.join(saida, "dados-coletados")
+    os.makedirs(raiz, exist_ok=True)
+
+    database_csv = os.path.join(saida, "database.csv")
+    database_met = os.path.join(saida, "database_met.csv")
+    linhas_qar = linhas_met = 0
+
+    with open(database_csv, "w", encoding="utf-8-sig", newline="") as f_db, \
+         open(database_met, "w", encoding="utf-8-sig", newline="") as f_met:
+        for ano in range(ano_inicio, ano_fim + 1):
+            for mes_num, mes in enumerate(MESES, start=1):
+                pasta = os.path.join(raiz, str(ano), mes)
+                os.makedirs(pasta, exist_ok=True)
+                tempos = _tempos_do_mes(ano, mes_num, passo_minutos)
+
+                layout = layout_qar
+                if layout == "misto":
+                    layout = LAYOUTS_QAR[(ano * 12 + mes_num) % len(LAYOUTS_QAR)]
+
+                tabela = _tabela_qar(tempos, _gera_qar(tempos, n_estacoes, faltantes, rng))
+                nome_csv = "qar_novo.csv" if layout == "novo" else "qar.csv"
+                _escreve_qar_csv(os.path.join(pasta, nome_csv), estacoes, tabela)
+                tabela.assign(ano=str(ano), mes=mes).to_csv(
+                    f_db, header=False, index=False, na_rep="n", float_format="%g", lineterminator="\n"
+                )
+                linhas_qar += len(tabela)
+
+                tab_met = _tabela_met(tempos, _gera_met(tempos, faltantes, rng))
+                with open(os.path.join(pasta, "met.csv"), "w", encoding="utf-8-sig", newline="") as f:
+                    _escreve_met_csv(f, tab_met)
+                _escreve_met_csv(f_met, tab_met)
+                linhas_met += len(tab_met)
+
+                if planilhas:
+                    _planilha_qar(tabela, estacoes, layout).to_excel(
+                        os.path.join(pasta, "qar.xlsx"), index=False, header=False
+                    )
+                    versao = (ano + mes_num) % 3 + 1
+                    _planilha_met(tab_met, versao).to_excel(
+                        os.path.join(pasta, "met.xlsx"), index=False, header=False
+                    )
+
+    # Versão numérica da meteorologia, gerada pela mesma função do database_met.py
+    salvar_met_numerico(
+        pd.read_csv(database_met, header=None, encoding="utf-8-sig", dtype=str),
+        os.path.join(saida, "database_met.npz")
+    )
+
+    # Registro de estações compatível com classifica.carregar_estacoes
+    with open(os.path.join(saida, "estacoes.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "primeira_coluna": 1,
+            "colunas_por_estacao": COLUNAS_POR_ESTACAO,
+            "deslocamento_12h": 2,
+            "poluentes": {p: i * 4 for i, p in enumerate(POLUENTES)},
+            "estacoes": estacoes,
+        }, f, indent=2)
+
+    return {"estacoes": len(estacoes), "linhas_qar": linhas_qar, "linhas_met": linhas_met}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos no formato do pipeline.")
+    parser.add_argument("--saida", default="sintetico", help="pasta de saída")
+    parser.add_argument("--estacoes", type=int, default=4, help="número de estações")
+    parser.add_argument("--ano-inicio", type=int, default=2022)
+    parser.add_argument("--ano-fim", type=int, default=2024)
+    parser.add_argument("--faltantes", type=float, default=0.05, help="taxa de valores ausentes (0–1)")
+    parser.add_argument("--passo-minutos", type=int, default=60, help="intervalo entre medições")
+    parser.add_argument("--planilhas", action="store_true", help="gera também qar.xlsx e met.xlsx")
+    parser.add_argument("--layout-qar", choices=LAYOUTS_QAR + ["misto"], default="misto")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    info = gerar(
+        args.saida,
+        n_estacoes=args.estacoes,
+        ano_inicio=args.ano_inicio,
+        ano_fim=args.ano_fim,
+        faltantes=args.faltantes,
+        passo_minutos=args.passo_minutos,
+        planilhas=args.planilhas,
+        layout_qar=args.layout_qar,
+        semente=args.semente,
+    )
+    print(f"Dados sintéticos gerados em '{args.saida}': {info}")
+
+
+if __name__ == "__main__":
+    main()
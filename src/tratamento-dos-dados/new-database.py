@@ -1,147 +1,178 @@
+import os
+import sys
+import shutil
+import argparse
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import multiprocessing as mp
-from config import DATABASE_PATH, NEW_DATABASE_PATH
+from config import DATABASE_PATH, NEW_DATABASE_PATH, NEW_DATABASE_PARTICOES_DIR
+from particoes import caminho_particao, gravar_arquivo, remover_particoes_antigas
 
 # Adiciona o caminho onde está o classifica.py
-from classifica import calculate_IQAr, classify_air_quality, columns_mapping            
-
-def extrair_valores(series):
-    """Converte os valores de uma série para float, ignorando erros."""
-    valores = []
-    for v in series:
-        try:
-            valores.append(float(v))
-        except:
-            continue
-    return valores
-
-# Variável global para compartilhar o DataFrame com os workers
-global_df = None
-
-def init_worker(df):
-    global global_df
-    global_df = df
-
-def process_timestamp(target):
+from classifica import (
+    PARAMS, calcular_iqar_array, classificar_iqar_array,
+    ESTACOES, POLUENTES_COLUNAS, INDICES_COLUNAS, ORDEM_POLUENTES, MINIMOS_POLUENTES,
+    JANELAS_POLUENTES, IndicePrefixos, medias_por_poluente
+)
+
+# Campos gerados para poluentes com IQAr (os demais recebem só a média)
+CAMPOS_IQAR = ["media", "I_ini", "I_fin", "C_ini", "C_fin", "IQAr", "class"]
+
+# Horas anteriores ao mês que a janela mais longa alcança (23 h para médias de 24 h):
+# cada partição recebe o seu mês mais esse "halo", e nada além disso
+HALO_HORAS = int(JANELAS_POLUENTES.max()) - 1
+
+def ler_database(database_path):
+    """
+    Lê o database.csv e retorna (ts, blocos): timestamps datetime64[s] ordenados e sem
+    repetições (vale o primeiro registro) e, por tipo de linha, os valores (T × estações × poluentes).
+    """
+    df = pd.read_csv(database_path, header=None, skiprows=1, low_memory=False)
+    df[0] = pd.to_datetime(df[0], format="%Y-%m-%d %H:%M:%S")
+
+    # Converte uma única vez todas as colunas de valores das estações para numérico ("n" vira NaN)
+    value_cols = np.unique(np.concatenate([c.ravel() for c in INDICES_COLUNAS.values()]))
+    df[value_cols] = df[value_cols].apply(pd.to_numeric, errors="coerce")
+
+    df = df.drop_duplicates(subset=0).sort_values(by=0)
+    ts = df[0].to_numpy("datetime64[s]")
+    blocos = {
+        row_type: df[cols.ravel()].to_numpy(dtype=float).reshape(len(df), *cols.shape)
+        for row_type, cols in INDICES_COLUNAS.items()
+    }
+    return ts, blocos
+
+def medias_moveis(ts, blocos):
+    """
+    Médias móveis de todas as estações/poluentes em todos os timestamps, de uma vez:
+    um IndicePrefixos por tipo de linha e, para cada poluente, a janela da sua tabela
+    de faixas terminando em cada timestamp (duas subtrações por célula).
+    A linha "12:00:00" usa as colunas de 24 h; as demais, as colunas normais.
+    Retorna (row_types, médias, válidos), alinhados aos timestamps.
     """
-    Processa um único timestamp (target) e para cada estação calcula os parâmetros.
-    Retorna um dicionário com uma linha de saída com os resultados agrupados.
+    e_12h = ts.astype(np.int64) % 86400 == 12 * 3600
+    row_types = np.where(e_12h, "12:00:00", "normal")
+
+    medias = validos = None
+    for row_type, bloco in blocos.items():
+        indice = IndicePrefixos(ts, bloco)
+        _, m, v = medias_por_poluente(lambda horas: indice.movel(horas))
+        if medias is None:
+            medias, validos = np.empty_like(m), np.empty_like(v)
+        sel = row_types == row_type
+        medias[sel] = m[sel]
+        validos[sel] = v[sel]
+    return row_types, medias, validos
+
+def montar_colunas(medias, validos):
+    """
+    Colunas de saída (na ordem estação → poluente → campo), calculadas por coluna inteira:
+    IQAr, limites da faixa e classificação saem de um searchsorted por poluente/estação.
+    Células com menos válidos que o mínimo da janela recebem "dados insuficientes".
+    """
+    colunas = {}
+    for i, station in enumerate(ESTACOES):
+        for j in ORDEM_POLUENTES:
+            pollutant = POLUENTES_COLUNAS[j]
+            chave = f"{station}_{pollutant}_"
+            ok = validos[:, i, j] >= MINIMOS_POLUENTES[j]
+            media = medias[ok, i, j]
+
+            # Poluentes sem tabela de faixas (PTS): apenas média horária
+            if pollutant not in PARAMS:
+                campos = {"media": media}
+            else:
+                iqar, I_ini, I_fin, C_ini, C_fin = calcular_iqar_array(media, pollutant)
+                campos = dict(zip(CAMPOS_IQAR, [media, I_ini, I_fin, C_ini, C_fin, iqar,
+                                                classificar_iqar_array(iqar)]))
+
+            for campo, valores in campos.items():
+                coluna = np.full(len(ok), "dados insuficientes", dtype=object)
+                coluna[ok] = valores
+                colunas[chave + campo] = coluna
+    return colunas
+
+def meses_com_halo(ts):
+    """
+    Uma tarefa por mês presente nos dados: ((ano, mês), início do halo, início do mês, fim),
+    como posições em 'ts'. O halo são as linhas das HALO_HORAS anteriores ao mês.
+    """
+    meses = np.unique(ts.astype("datetime64[M]"))
+    inicios = np.searchsorted(ts, meses.astype("datetime64[s]"))
+    fins = np.append(inicios[1:], len(ts))
+    halos = np.searchsorted(ts, meses.astype("datetime64[s]") - np.timedelta64(HALO_HORAS, "h"))
+    return [
+        ((mes.item().year, mes.item().month), int(h), int(i), int(f))
+        for mes, h, i, f in zip(meses, halos, inicios, fins)
+    ]
+
+def construir_particao(tarefa):
+    """
+    Calcula e grava a partição de um mês (<pasta>/AAAA/MM.csv, com cabeçalho; regravada
+    só se o conteúdo mudou). A tarefa traz só as linhas do mês e do halo; as do halo
+    entram nas janelas, mas não na saída. Retorna o caminho da partição.
+    """
+    (ano, mes), ts, blocos, n_halo, pasta = tarefa
+    row_types, medias, validos = medias_moveis(ts, blocos)
+    ts, row_types, medias, validos = ts[n_halo:], row_types[n_halo:], medias[n_halo:], validos[n_halo:]
+
+    texto = np.char.replace(np.datetime_as_string(ts, unit="s"), "T", " ")
+    parte = pd.DataFrame({"timestamp": texto, "row_type": row_types, **montar_colunas(medias, validos)})
+    caminho = caminho_particao(pasta, ano, mes)
+    gravar_arquivo(caminho, parte.to_csv(index=False))
+    return caminho
+
+def concatenar_partes(partes, output_path):
+    """
+    Junta as partes mensais (em ordem) no CSV final: o cabeçalho da primeira e as linhas
+    de todas, copiadas em blocos. Escrita atômica: o app pode estar lendo o CSV anterior.
+    """
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as saida:
+        saida.write("\ufeff".encode("utf-8"))  # mesmo BOM de utf-8-sig do CSV anterior
+        for k, caminho in enumerate(partes):
+            with open(caminho, "rb") as parte:
+                cabecalho = parte.readline()
+                if k == 0:
+                    saida.write(cabecalho)
+                shutil.copyfileobj(parte, saida, 1024 * 1024)
+    os.replace(tmp_path, output_path)
+
+def process_database_partitioned(database_path, output_path, pasta=NEW_DATABASE_PARTICOES_DIR, processos=None):
+    """
+    Gera o new_database.csv particionado por mês: cada processo do pool recebe apenas o
+    seu mês mais o halo (arrays NumPy, não o DataFrame inteiro), calcula e grava a partição
+    do mês (particoes.py); no fim, as partições são concatenadas em ordem no CSV final.
     """
-    global global_df
-    mmss = target.strftime("%M:%S")
-    start_time = target - timedelta(hours=23)
-    
-    # Filtra os registros do intervalo que tenham os mesmos mm:ss (usando a coluna auxiliar)
-    subset = global_df[(global_df[0] >= start_time) & 
-                       (global_df[0] <= target) & 
-                       (global_df["mmss"] == mmss)]
-    if subset.empty:
-        return None
-
-    row_data = {"timestamp": target.strftime("%Y-%m-%d %H:%M:%S")}
-    # Define o row_type: se o target for "12:00:00", é do tipo "12:00:00"; caso contrário, "normal".
-    row_type = "12:00:00" if target.strftime("%H:%M:%S") == "12:00:00" else "normal"
-    row_data["row_type"] = row_type
-
-    # Para cada estação, calcula os valores e adiciona com prefixo
-    for station in ["EAMA11", "EAMA21", "EAMA31", "EAMA41"]:
-        prefix = station + "_"
-        try:
-            mapping = columns_mapping[station][row_type]
-            col_mp10 = mapping["MP10"]
-            col_mp25 = mapping["MP2.5"]
-            col_pts  = mapping["PTS"]
-        except KeyError:
-            row_data[prefix + "MP10_media"] = "dados insuficientes"
-            row_data[prefix + "MP2.5_media"] = "dados insuficientes"
-            row_data[prefix + "PTS_media"] = "dados insuficientes"
-            continue
-
-        vals_mp10 = extrair_valores(subset[col_mp10])
-        vals_mp25 = extrair_valores(subset[col_mp25])
-        vals_pts  = extrair_valores(subset[col_pts])
-
-        # Processamento para MP10
-        if len(vals_mp10) < 16:
-            row_data[prefix + "MP10_media"] = "dados insuficientes"
-            row_data[prefix + "MP10_I_ini"] = "dados insuficientes"
-            row_data[prefix + "MP10_I_fin"] = "dados insuficientes"
-            row_data[prefix + "MP10_C_ini"] = "dados insuficientes"
-            row_data[prefix + "MP10_C_fin"] = "dados insuficientes"
-            row_data[prefix + "MP10_IQAr"]  = "dados insuficientes"
-            row_data[prefix + "MP10_class"] = "dados insuficientes"
-        else:
-            media_mp10 = np.mean(vals_mp10)
-            iqar_mp10, I_ini_mp10, I_fin_mp10, C_ini_mp10, C_fin_mp10 = calculate_IQAr(media_mp10, "MP10")
-            classificacao_mp10 = classify_air_quality(iqar_mp10)
-            row_data[prefix + "MP10_media"] = media_mp10
-            row_data[prefix + "MP10_I_ini"] = I_ini_mp10
-            row_data[prefix + "MP10_I_fin"] = I_fin_mp10
-            row_data[prefix + "MP10_C_ini"] = C_ini_mp10
-            row_data[prefix + "MP10_C_fin"] = C_fin_mp10
-            row_data[prefix + "MP10_IQAr"]  = iqar_mp10
-            row_data[prefix + "MP10_class"] = classificacao_mp10
-
-        # Processamento para MP2.5
-        if len(vals_mp25) < 16:
-            row_data[prefix + "MP2.5_media"] = "dados insuficientes"
-            row_data[prefix + "MP2.5_I_ini"] = "dados insuficientes"
-            row_data[prefix + "MP2.5_I_fin"] = "dados insuficientes"
-            row_data[prefix + "MP2.5_C_ini"] = "dados insuficientes"
-            row_data[prefix + "MP2.5_C_fin"] = "dados insuficientes"
-            row_data[prefix + "MP2.5_IQAr"]  = "dados insuficientes"
-            row_data[prefix + "MP2.5_class"] = "dados insuficientes"
-        else:
-            media_mp25 = np.mean(vals_mp25)
-            iqar_mp25, I_ini_mp25, I_fin_mp25, C_ini_mp25, C_fin_mp25 = calculate_IQAr(media_mp25, "MP2.5")
-            classificacao_mp25 = classify_air_quality(iqar_mp25)
-            row_data[prefix + "MP2.5_media"] = media_mp25
-            row_data[prefix + "MP2.5_I_ini"] = I_ini_mp25
-            row_data[prefix + "MP2.5_I_fin"] = I_fin_mp25
-            row_data[prefix + "MP2.5_C_ini"] = C_ini_mp25
-            row_data[prefix + "MP2.5_C_fin"] = C_fin_mp25
-            row_data[prefix + "MP2.5_IQAr"]  = iqar_mp25
-            row_data[prefix + "MP2.5_class"] = classificacao_mp25
-
-        # Processamento para PTS (apenas média horária)
-        if len(vals_pts) < 16:
-            row_data[prefix + "PTS_media"] = "dados insuficientes"
-        else:
-            media_pts = np.mean(vals_pts)
-            row_data[prefix + "PTS_media"] = media_pts
-
-    return row_data
-
-def process_database_grouped_parallel(database_path, output_path):
     try:
-        df = pd.read_csv(database_path, header=None, skiprows=1, low_memory=False)
+        ts, blocos = ler_database(database_path)
     except Exception as e:
         print(f"Erro ao ler o CSV: {e}")
-        return
-    try:
-        df[0] = pd.to_datetime(df[0], format="%Y-%m-%d %H:%M:%S")
-    except Exception as e:
-        print(f"Erro na conversão dos timestamps: {e}")
-        return
-
-    # Cria a coluna auxiliar "mmss" com os minutos e segundos
-    df["mmss"] = df[0].dt.strftime("%M:%S")
-    df = df.sort_values(by=0)
-    unique_timestamps = df[0].drop_duplicates().sort_values()
-
-    tasks = list(unique_timestamps)
-    with mp.Pool(initializer=init_worker, initargs=(df,)) as pool:
-        results = pool.map(process_timestamp, tasks)
-    rows = [r for r in results if r is not None]
-    if rows:
-        new_df = pd.DataFrame(rows)
-        new_df.to_csv(output_path, index=False, encoding="utf-8-sig")
-        print(f"New database saved to {output_path}")
-    else:
+        return False
+    if not len(ts):
         print("Nenhum dado foi processado.")
+        return False
+
+    tarefas = [
+        (mes, ts[h:f], {rt: bloco[h:f] for rt, bloco in blocos.items()}, i - h, pasta)
+        for mes, h, i, f in meses_com_halo(ts)
+    ]
+    processos = min(processos or os.cpu_count() or 1, len(tarefas))
+    if processos > 1:
+        with mp.Pool(processos) as pool:
+            partes = pool.map(construir_particao, tarefas, chunksize=1)
+    else:
+        partes = [construir_particao(t) for t in tarefas]
 
-if __name__ == "__main__":
-    process_database_grouped_parallel(DATABASE_PATH, NEW_DATABASE_PATH)
+    concatenar_partes(partes, output_path)
+    remover_particoes_antigas(pasta, partes)
+    print(f"New database saved to {output_path} ({len(partes)} partes mensais, {processos} processos)")
+    return True
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o new_database.csv (médias móveis, IQAr e classificação).")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="processos em paralelo (padrão: número de CPUs)")
+    args = parser.parse_args()
+    if not process_database_partitioned(DATABASE_PATH, NEW_DATABASE_PATH, processos=args.processos):
+        sys.exit(1)
@@ -0,0 +1,113 @@
+"""
+============================================
+Arquivo: particoes.py
+--------------------------------------------
+Armazenamento particionado por ano/mês dos CSVs do pipeline (database.csv,
+new_database.csv e database_met.csv), no mesmo arranjo de dados-coletados/<ano>/<mes>:
+- <pasta>/<AAAA>/<MM>.csv: uma partição por mês, com as linhas daquele mês no
+  formato do CSV consolidado correspondente.
+- gravar_particoes: divide um DataFrame pelo mês do timestamp e grava cada partição
+  de forma atômica; partições com o mesmo conteúdo não são regravadas (o mtime só
+  muda nos meses que mudaram) e as de meses que deixaram de existir são removidas.
+- particoes_no_intervalo: poda de partições — só os meses que cruzam [inicio, fim],
+  resolvidos pelo caminho, sem abrir (nem listar) os demais.
+- ler_particoes: lê e concatena apenas essas partições, então o custo de uma consulta
+  depende do intervalo pedido, não do tamanho do acervo.
+- Os CSVs consolidados continuam sendo gerados para quem precisa do histórico inteiro.
+============================================
+"""
+
+import os
+import pandas as pd
+
+
+def caminho_particao(pasta, ano, mes):
+    """<pasta>/<AAAA>/<MM>.csv"""
+    return os.path.join(pasta, f"{ano:04d}", f"{mes:02d}.csv")
+
+
+def listar_particoes(pasta):
+    """(ano, mês, caminho) de todas as partições de 'pasta', em ordem cronológica."""
+    encontradas = []
+    if not os.path.isdir(pasta):
+        return encontradas
+    for ano in os.scandir(pasta):
+        if not (ano.is_dir() and ano.name.isdigit()):
+            continue
+        for arquivo in os.scandir(ano.path):
+            nome, ext = os.path.splitext(arquivo.name)
+            if arquivo.is_file() and ext == ".csv" and nome.isdigit():
+                encontradas.append((int(ano.name), int(nome), arquivo.path))
+    return sorted(encontradas)
+
+
+def particoes_no_intervalo(pasta, inicio, fim):
+    """Caminhos das partições existentes dos meses que cruzam [inicio, fim] (datetime ou string)."""
+    inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+    caminhos = []
+    ano, mes = inicio.year, inicio.month
+    while (ano, mes) <= (fim.year, fim.month):
+        caminho = caminho_particao(pasta, ano, mes)
+        if os.path.isfile(caminho):
+            caminhos.append(caminho)
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return caminhos
+
+
+def ler_particoes(pasta, inicio, fim, **opcoes_csv):
+    """
+    DataFrame com as linhas das partições que cruzam [inicio, fim] (o recorte exato do
+    intervalo fica com quem chama). 'opcoes_csv' vai para pd.read_csv (padrão: header=None,
+    como nos CSVs consolidados). Sem partições no intervalo, devolve um DataFrame vazio.
+    """
+    opcoes_csv.setdefault("header", None)
+    caminhos = particoes_no_intervalo(pasta, inicio, fim)
+    if not caminhos:
+        return pd.DataFrame()
+    return pd.concat([pd.read_csv(c, **opcoes_csv) for c in caminhos], ignore_index=True)
+
+
+def gravar_arquivo(caminho, conteudo):
+    """Grava 'conteudo' (str) de forma atômica, só se for diferente do que já está em disco."""
+    dados = conteudo.encode("utf-8")
+    try:
+        with open(caminho, "rb") as f:
+            if f.read() == dados:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = caminho + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(dados)
+    os.replace(tmp, caminho)
+    return True
+
+
+def remover_particoes_antigas(pasta, manter):
+    """Apaga as partições de 'pasta' que não estão em 'manter' (e pastas de ano vazias)."""
+    manter = {os.path.abspath(c) for c in manter}
+    for _, _, caminho in listar_particoes(pasta):
+        if os.path.abspath(caminho) not in manter:
+            os.remove(caminho)
+    for ano in os.scandir(pasta):
+        if ano.is_dir() and not os.listdir(ano.path):
+            os.rmdir(ano.path)
+
+
+def gravar_particoes(df, pasta, coluna_ts=0, **opcoes_csv):
+    """
+    Grava 'df' particionado pelo mês da coluna de timestamps ("AAAA-MM-DD HH:MM:SS").
+    'opcoes_csv' vai para DataFrame.to_csv (padrão: sem cabeçalho e sem índice).
+    Linhas com timestamp inválido ficam de fora. Retorna quantas partições mudaram.
+    """
+    opcoes_csv.setdefault("header", False)
+    opcoes_csv.setdefault("index", False)
+    meses = pd.to_datetime(df[coluna_ts], format="%Y-%m-%d %H:%M:%S", errors="coerce").dt.to_period("M")
+    gravadas, mudaram = [], 0
+    for mes, parte in df.groupby(meses, sort=True):
+        caminho = caminho_particao(pasta, mes.year, mes.month)
+        mudaram += gravar_arquivo(caminho, parte.to_csv(**opcoes_csv))
+        gravadas.append(caminho)
+    remover_particoes_antigas(pasta, gravadas)
+    return mudaram